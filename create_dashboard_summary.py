@@ -1,6 +1,7 @@
-import json
 from pathlib import Path
 
+from utils import write_json_file
+
 summary = {
     "component": "Streamlit Dashboard Part 1",
     "created_date": "2025-11-29",
@@ -57,8 +58,7 @@ summary = {
 }
 
 output_file = Path("/app/hydra_x_v2_1804/data/dashboard_summary_part1.json")
-with open(output_file, 'w') as f:
-    json.dump(summary, f, indent=2)
+write_json_file(output_file, summary)
 
 print("Dashboard Part 1 Summary")
 print("=" * 60)
@@ -1,7 +1,20 @@
 import os
-import json
+from functools import lru_cache
 from pathlib import Path
 
+import yaml
+
+from utils import read_json_file, scan_file_stats
+
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+@lru_cache(maxsize=None)
+def load_yaml(path: str):
+    with open(path) as f:
+        return yaml.load(f, Loader=YamlLoader) or {}
+
+
 print("=" * 70)
 print("FINAL CYCLE 1 VERIFICATION - STREAMLIT DASHBOARD PART 1")
 print("=" * 70)
@@ -17,12 +30,12 @@ files_to_check = [
 ]
 
 base_dir = Path("/app/hydra_x_v2_1804")
+file_stats = scan_file_stats(base_dir, files_to_check)
 
 print("\n📋 File Existence Check:")
 all_exist = True
 for file_path in files_to_check:
-    full_path = base_dir / file_path
-    exists = full_path.exists()
+    exists = file_path in file_stats
     status = "✅" if exists else "❌"
     print(f"  {status} {file_path}")
     if not exists:
@@ -30,39 +43,32 @@ for file_path in files_to_check:
 
 print("\n📊 File Sizes:")
 for file_path in files_to_check:
-    full_path = base_dir / file_path
-    if full_path.exists():
-        size = full_path.stat().st_size
+    if file_path in file_stats:
+        size = file_stats[file_path].st_size
         size_str = f"{size:,} bytes" if size < 1024*1024 else f"{size/(1024*1024):.2f} MB"
         print(f"  • {file_path}: {size_str}")
 
 print("\n🔧 Dashboard Configuration:")
 config_file = base_dir / "config.yaml"
-if config_file.exists():
-    with open(config_file) as f:
-        content = f.read()
-        if "dashboard:" in content:
-            print("  ✅ Dashboard section present in config.yaml")
-            lines = content.split('\n')
-            for i, line in enumerate(lines):
-                if 'dashboard:' in line:
-                    for j in range(i, min(i+10, len(lines))):
-                        if lines[j].strip() and not lines[j].strip().startswith('#'):
-                            print(f"     {lines[j]}")
-                    break
-        else:
-            print("  ❌ Dashboard section missing from config.yaml")
+if "config.yaml" in file_stats:
+    dashboard_cfg = load_yaml(str(config_file)).get('dashboard')
+    if dashboard_cfg is not None:
+        print("  ✅ Dashboard section present in config.yaml")
+        print("     dashboard:")
+        for key, value in (dashboard_cfg or {}).items():
+            print(f"       {key}: {value}")
+    else:
+        print("  ❌ Dashboard section missing from config.yaml")
 
 print("\n✅ Validation Results:")
 report_file = base_dir / "data/dashboard_validation_report_part1.json"
-if report_file.exists():
-    with open(report_file) as f:
-        report = json.load(f)
-        print(f"  Tests Passed: {report['tests_passed']}")
-        print(f"  Tests Failed: {report['tests_failed']}")
-        for result in report['test_results']:
-            status_emoji = "✅" if result['status'] == "PASS" else "❌"
-            print(f"    {status_emoji} {result['test']}")
+if "data/dashboard_validation_report_part1.json" in file_stats:
+    report = read_json_file(report_file)
+    print(f"  Tests Passed: {report['tests_passed']}")
+    print(f"  Tests Failed: {report['tests_failed']}")
+    for result in report['test_results']:
+        status_emoji = "✅" if result['status'] == "PASS" else "❌"
+        print(f"    {status_emoji} {result['test']}")
 
 print("\n🚀 Dashboard Launch Instructions:")
 print("  Command: streamlit run /app/hydra_x_v2_1804/modules/dashboard.py")
@@ -1,6 +1,7 @@
-import json
 from pathlib import Path
 
+from utils import json_loads, read_json_file, scan_file_stats
+
 print("=" * 70)
 print("FINAL CYCLE 1 VERIFICATION - COMPLETE")
 print("=" * 70)
@@ -18,10 +19,11 @@ deliverables = [
     "config.yaml"
 ]
 
+deliverable_stats = scan_file_stats(project_dir, deliverables)
+
 for file in deliverables:
-    path = project_dir / file
-    if path.exists():
-        size = path.stat().st_size
+    if file in deliverable_stats:
+        size = deliverable_stats[file].st_size
         print(f"  ✅ {file} ({size:,} bytes)")
     else:
         print(f"  ❌ {file} (MISSING)")
@@ -30,25 +32,30 @@ print("\n✅ State Files Created:")
 state_files = [
     "data/daily_summary_state.json",
     "data/open_positions.json",
-    "data/trade_history.json",
+    "data/trade_history.jsonl",
     "data/trend_cache.json",
     "data/pa_confirmation_cache.json"
 ]
 
+state_file_stats = scan_file_stats(project_dir, state_files)
+
 for file in state_files:
-    path = project_dir / file
-    if path.exists():
-        with open(path) as f:
-            data = json.load(f)
-        print(f"  ✅ {file} (valid JSON)")
+    if file in state_file_stats:
+        if file.endswith(".jsonl"):
+            for line in (project_dir / file).read_bytes().splitlines():
+                if line.strip():
+                    json_loads(line)
+            print(f"  ✅ {file} (valid JSON Lines)")
+        else:
+            data = read_json_file(project_dir / file)
+            print(f"  ✅ {file} (valid JSON)")
     else:
         print(f"  ❌ {file} (MISSING)")
 
 print("\n✅ Validation Results:")
 report_file = data_dir / "dashboard_validation_report_part1_fixed.json"
 if report_file.exists():
-    with open(report_file) as f:
-        report = json.load(f)
+    report = read_json_file(report_file)
     print(f"  Tests Passed: {report['tests_passed']}/2")
     print(f"  Tests Failed: {report['tests_failed']}/2")
     for result in report['test_results']:
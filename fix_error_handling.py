@@ -1,10 +1,11 @@
-import json
 import sys
 from pathlib import Path
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent))
 
+from utils import json_dumps
+
 print("Fixing error handling for missing files...")
 print("=" * 60)
 
@@ -27,8 +28,6 @@ placeholder_metrics = {
 
 placeholder_positions = []
 
-placeholder_trades = []
-
 placeholder_trend = {
     "BTCUSDT": {"trend": "RANGING", "ema50": 0, "ema200": 0},
     "XAUTUSDT": {"trend": "RANGING", "ema50": 0, "ema200": 0}
@@ -43,17 +42,22 @@ placeholder_pa = {
 files_to_create = [
     ("daily_summary_state.json", placeholder_metrics),
     ("open_positions.json", placeholder_positions),
-    ("trade_history.json", placeholder_trades),
     ("trend_cache.json", placeholder_trend),
     ("pa_confirmation_cache.json", placeholder_pa)
 ]
 
-for filename, data in files_to_create:
-    filepath = data_dir / filename
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2)
+payloads = [(filename, json_dumps(data, indent=True)) for filename, data in files_to_create]
+
+for filename, payload in payloads:
+    (data_dir / filename).write_bytes(payload)
     print(f"✅ Created placeholder: {filename}")
 
+# The trade log is append-only JSON Lines: an empty file holds no trades
+trade_log = data_dir / "trade_history.jsonl"
+if not trade_log.exists():
+    trade_log.touch()
+print("✅ Created placeholder: trade_history.jsonl")
+
 print("\n" + "=" * 60)
 print("✅ Placeholder files created successfully")
 print("\nNow fixing DashboardStateReader error handling...")
\ No newline at end of file
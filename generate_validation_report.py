@@ -177,7 +177,7 @@ def main():
                     'status': 'IMPLEMENTED & TESTED',
                     'features': {
                         'trade_history_persistence': {
-                            'format': 'JSON (data/trade_history.json)',
+                            'format': 'JSON Lines (data/trade_history.jsonl, after legacy data/trade_history.json)',
                             'operation': 'APPEND new trades',
                             'fields': [
                                 'entry_time', 'exit_time', 'symbol', 'direction',
@@ -305,7 +305,7 @@ def main():
             },
             'known_limitations': [
                 'First-run detection depends on marker file persistence (must persist across restarts)',
-                'State recovery requires both trade_history.json and open_positions.json to exist',
+                'State recovery requires both trade_history.jsonl and open_positions.json to exist',
                 'Graceful shutdown has 30-second timeout (configurable)',
                 'Random delays are client-side only (server-side delays not controllable)'
             ],
@@ -1,62 +1,76 @@
 """Technical Indicators Module - EMA, ATR, and other calculations."""
 
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable, Hashable, Sequence
+from collections import OrderedDict
 import numpy as np
-from utils import get_logger
+from utils import get_logger, njit
+from modules.candles import Candles
 
 logger = get_logger("indicators")
 
+@njit(cache=True, fastmath=True)
+def _ema_kernel(prices: np.ndarray, period: int, out: np.ndarray) -> None:
+    """Fill out[period-1:] with the EMA recurrence seeded by the SMA of the first period prices."""
+    multiplier = 2.0 / (period + 1)
+    ema = np.mean(prices[:period])
+    out[period - 1] = ema
+    
+    for i in range(period, prices.shape[0]):
+        ema = (prices[i] - ema) * multiplier + ema
+        out[i] = ema
+
 def calculate_ema(prices: List[float], period: int) -> Optional[float]:
     """Calculate Exponential Moving Average for a list of prices."""
     if len(prices) < period:
         return None
     
-    prices = np.array(prices, dtype=np.float64)
-    multiplier = 2.0 / (period + 1)
-    
-    ema = np.mean(prices[:period])
-    
-    for price in prices[period:]:
-        ema = (price - ema) * multiplier + ema
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    out = np.empty(len(prices), dtype=np.float64)
+    _ema_kernel(prices, period, out)
     
-    return float(ema)
+    return float(out[-1])
 
 def calculate_ema_series(prices: List[float], period: int) -> List[Optional[float]]:
     """Calculate EMA for entire price series."""
     if len(prices) < period:
         return [None] * len(prices)
     
-    prices = np.array(prices, dtype=np.float64)
-    multiplier = 2.0 / (period + 1)
-    
-    ema_values = [None] * period
-    ema = np.mean(prices[:period])
-    ema_values.append(ema)
-    
-    for price in prices[period:]:
-        ema = (price - ema) * multiplier + ema
-        ema_values.append(ema)
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    out = np.empty(len(prices), dtype=np.float64)
+    out[:period - 1] = np.nan
+    _ema_kernel(prices, period, out)
     
-    return ema_values[-len(prices):]
+    ema_values = out.tolist()
+    ema_values[:period - 1] = [None] * (period - 1)
+    return ema_values
+
+# Compile the EMA kernel at import so the first signal cycle doesn't pay the JIT cost
+_ema_kernel(np.zeros(2, dtype=np.float64), 1, np.empty(2, dtype=np.float64))
+
+def true_range_from_arrays(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray) -> np.ndarray:
+    """Calculate True Range from price columns. The first candle has no previous close, so its TR is its range."""
+    tr = highs - lows
+    if len(tr) > 1:
+        prev_closes = closes[:-1]
+        tr[1:] = np.maximum.reduce([
+            tr[1:],
+            np.abs(highs[1:] - prev_closes),
+            np.abs(lows[1:] - prev_closes)
+        ])
+    
+    return tr
+
+def calculate_true_range(candles) -> np.ndarray:
+    """Calculate True Range for every candle (Candles or list of candle dicts)."""
+    soa = Candles.coerce(candles)
+    return true_range_from_arrays(soa.high, soa.low, soa.close)
 
 def calculate_atr(candles: List[Dict[str, float]], period: int = 14) -> Optional[float]:
     """Calculate Average True Range."""
     if len(candles) < period:
         return None
     
-    true_ranges = []
-    
-    for i in range(1, len(candles)):
-        high = candles[i]['high']
-        low = candles[i]['low']
-        prev_close = candles[i-1]['close']
-        
-        tr = max(
-            high - low,
-            abs(high - prev_close),
-            abs(low - prev_close)
-        )
-        true_ranges.append(tr)
+    true_ranges = calculate_true_range(candles)[1:]
     
     if len(true_ranges) < period:
         return None
@@ -65,30 +79,40 @@ def calculate_atr(candles: List[Dict[str, float]], period: int = 14) -> Optional
 
 def calculate_atr_series(candles: List[Dict[str, float]], period: int = 14) -> List[Optional[float]]:
     """Calculate ATR series for all candles."""
-    atr_values = []
+    if len(candles) <= period:
+        return [None] * len(candles)
     
-    for i in range(len(candles)):
-        if i + 1 < period:
-            atr_values.append(None)
-        else:
-            atr = calculate_atr(candles[:i+1], period)
-            atr_values.append(atr)
+    true_ranges = calculate_true_range(candles)[1:]
+    csum = np.concatenate(([0.0], np.cumsum(true_ranges)))
+    atr = (csum[period:] - csum[:-period]) / period
     
-    return atr_values
+    return [None] * period + atr.tolist()
+
+@njit(cache=True)
+def _rsi_averages(prices: np.ndarray, period: int):
+    """Mean gain and mean loss over the last period price changes, in one pass without temporaries."""
+    n = prices.shape[0]
+    count = min(period, n - 1)
+    if count <= 0:
+        return np.nan, np.nan
+    
+    gain_sum = 0.0
+    loss_sum = 0.0
+    for i in range(n - count, n):
+        delta = prices[i] - prices[i - 1]
+        if delta > 0:
+            gain_sum += delta
+        elif delta < 0:
+            loss_sum -= delta
+    
+    return gain_sum / count, loss_sum / count
 
 def calculate_rsi(prices: List[float], period: int = 14) -> Optional[float]:
     """Calculate Relative Strength Index."""
     if len(prices) < period:
         return None
     
-    prices = np.array(prices, dtype=np.float64)
-    deltas = np.diff(prices)
-    
-    gains = np.where(deltas > 0, deltas, 0)
-    losses = np.where(deltas < 0, -deltas, 0)
-    
-    avg_gain = np.mean(gains[-period:])
-    avg_loss = np.mean(losses[-period:])
+    avg_gain, avg_loss = _rsi_averages(np.ascontiguousarray(prices, dtype=np.float64), period)
     
     if avg_loss == 0:
         return 100.0 if avg_gain > 0 else 0.0
@@ -146,14 +170,108 @@ def detect_pin_bar(candle: Dict[str, float]) -> Optional[str]:
     
     return None
 
-def calculate_closes(candles: List[Dict[str, float]]) -> List[float]:
-    """Extract close prices from candles."""
+ENGULFING_NAMES = (None, "BULLISH_ENGULFING", "BEARISH_ENGULFING")
+PIN_BAR_NAMES = (None, "PIN_BAR_BULLISH", "PIN_BAR_BEARISH")
+
+@njit(cache=True)
+def engulfing_batch(opens: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+                    closes: np.ndarray, out: np.ndarray) -> None:
+    """Write 0/1/2 (none/bullish/bearish, see ENGULFING_NAMES) into out for each candle vs its predecessor."""
+    n = closes.shape[0]
+    if n > 0:
+        out[0] = 0
+    
+    for i in range(1, n):
+        out[i] = 0
+        prev_body_size = abs(closes[i - 1] - opens[i - 1])
+        curr_body_size = abs(closes[i] - opens[i])
+        
+        if curr_body_size > prev_body_size * 0.5:
+            prev_open_min = min(opens[i - 1], closes[i - 1])
+            prev_open_max = max(opens[i - 1], closes[i - 1])
+            
+            if closes[i] > prev_open_max and opens[i] < prev_open_min:
+                out[i] = 1
+            elif closes[i] < prev_open_min and opens[i] > prev_open_max:
+                out[i] = 2
+
+@njit(cache=True)
+def pin_bar_batch(opens: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+                  closes: np.ndarray, out: np.ndarray) -> None:
+    """Write 0/1/2 (none/bullish/bearish, see PIN_BAR_NAMES) into out for each candle."""
+    for i in range(closes.shape[0]):
+        out[i] = 0
+        body_size = abs(closes[i] - opens[i])
+        total_range = highs[i] - lows[i]
+        
+        if total_range == 0 or body_size / total_range > 0.25:
+            continue
+        
+        upper_wick = highs[i] - max(opens[i], closes[i])
+        lower_wick = min(opens[i], closes[i]) - lows[i]
+        
+        if upper_wick > body_size * 2 and lower_wick < body_size * 0.5:
+            out[i] = 2
+        elif lower_wick > body_size * 2 and upper_wick < body_size * 0.5:
+            out[i] = 1
+
+def calculate_closes(candles) -> Sequence[float]:
+    """Extract close prices from candles; Candles return their column array directly."""
+    if isinstance(candles, Candles):
+        return candles.close
     return [candle['close'] for candle in candles]
 
-def calculate_highs(candles: List[Dict[str, float]]) -> List[float]:
-    """Extract high prices from candles."""
+def calculate_highs(candles) -> Sequence[float]:
+    """Extract high prices from candles; Candles return their column array directly."""
+    if isinstance(candles, Candles):
+        return candles.high
     return [candle['high'] for candle in candles]
 
-def calculate_lows(candles: List[Dict[str, float]]) -> List[float]:
-    """Extract low prices from candles."""
-    return [candle['low'] for candle in candles]
\ No newline at end of file
+def calculate_lows(candles) -> Sequence[float]:
+    """Extract low prices from candles; Candles return their column array directly."""
+    if isinstance(candles, Candles):
+        return candles.low
+    return [candle['low'] for candle in candles]
+
+class IndicatorCache:
+    """LRU memo for indicator results keyed on (symbol, timeframe, name, period) and the latest candle."""
+    
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._store: "OrderedDict[tuple, Any]" = OrderedDict()
+    
+    @staticmethod
+    def candle_key(candles) -> Optional[tuple]:
+        """Identify a candle window by its length and last candle; None if it has no timestamp."""
+        if len(candles) == 0:
+            return None
+        if isinstance(candles, Candles):
+            if candles.timestamp is None:
+                return None
+            return (len(candles), int(candles.timestamp[-1]), float(candles.close[-1]))
+        last = candles[-1]
+        last_ts = last.get('timestamp')
+        if last_ts is None:
+            return None
+        return (len(candles), last_ts, last['close'])
+    
+    def get_or_compute(self, symbol: str, timeframe: str, name: str, period: Hashable,
+                       candles, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for this window, calling compute() only on a miss."""
+        window = self.candle_key(candles)
+        if window is None:
+            return compute()
+        
+        key = (symbol, timeframe, name, period) + window
+        if key in self._store:
+            self._store.move_to_end(key)
+            return self._store[key]
+        
+        value = compute()
+        self._store[key] = value
+        if len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+        return value
+    
+    def clear(self) -> None:
+        self._store.clear()
@@ -1,47 +1,62 @@
 import asyncio
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import os
-from datetime import datetime
-from typing import Dict, List
+from collections import deque
+from dataclasses import asdict
+from itertools import islice
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
 
 from modules.data_streamer import DataStreamer
 from modules.exchange_connector import ExchangeConnector
-from modules.signal_generator import SignalGenerator
+from modules.signal_generator import SignalGenerator, SignalResult
 from modules.telegram import TelegramNotifier
 
 # Ensure logs directory exists to avoid FileHandler errors
 os.makedirs('logs', exist_ok=True)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('logs/hydra_x_main.log')
-    ]
-)
+# Stream/file writes happen on the listener thread so log calls never block the event loop
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [logging.StreamHandler(sys.stdout), logging.FileHandler('logs/hydra_x_main.log')]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+
+_root_logger = logging.getLogger()
+_root_logger.setLevel(logging.INFO)
+_root_logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logger = logging.getLogger(__name__)
 
 
 class HydraXBot:
     def __init__(self, config: Dict = None):
         self.config = config or {}
-        self.exchange = ExchangeConnector(self.config)
-        self.data_streamer = DataStreamer(self.exchange)
+        # Connected in initialize() via ExchangeConnector.get_shared (process-wide instance and rate limiter)
+        self.exchange: Optional[ExchangeConnector] = None
+        self.data_streamer: Optional[DataStreamer] = None
         self.signal_generator = SignalGenerator(self.config)
         self.notifier = TelegramNotifier(self.config)
 
         self.symbols = self.config.get('symbols', ['BTCUSDT', 'XAUTUSDT'])
         self.timeframes = ['M5', 'M15', 'H1']
 
-        self.current_signals: Dict[str, object] = {}
-        self.signal_log: List[Dict] = []
+        self.current_signals: Dict[str, SignalResult] = {}
+        self.signal_log: Deque[Dict] = deque(maxlen=self.config.get('signal_log_max', 10_000))
 
     async def initialize(self):
         logger.info("Initializing HydraX Bot...")
         try:
-            await self.exchange.initialize()
+            self.exchange = await ExchangeConnector.get_shared(self.config)
+            self.data_streamer = DataStreamer(self.exchange, self.config)
             logger.info("Exchange connector initialized")
 
             await self.data_streamer.initialize()
@@ -58,19 +73,20 @@ class HydraXBot:
             logger.error(f"Initialization error: {e}")
             raise
 
-    async def fetch_candles(self, symbol: str, timeframe: str, limit: int = 100):
+    def fetch_candles(self, symbol: str, timeframe: str, limit: int = 100):
         try:
-            candles = await self.data_streamer.get_candles(symbol, timeframe, limit)
+            candles = self.data_streamer.get_candles(symbol, timeframe, limit)
             return candles
         except Exception as e:
             logger.warning(f"Error fetching {symbol} {timeframe}: {e}")
             return []
 
-    async def process_signal(self, symbol: str):
+    async def process_signal(self, symbol: str, tick_timestamp: str = None):
         try:
-            m5_candles = await self.fetch_candles(symbol, 'M5', 100)
-            m15_candles = await self.fetch_candles(symbol, 'M15', 100)
-            h1_candles = await self.fetch_candles(symbol, 'H1', 100)
+            # Served from the streamer's in-memory cache: no round-trip, so nothing to gather
+            m5_candles = self.fetch_candles(symbol, 'M5', 100)
+            m15_candles = self.fetch_candles(symbol, 'M15', 100)
+            h1_candles = self.fetch_candles(symbol, 'H1', 100)
 
             if not (m5_candles and m15_candles and h1_candles):
                 logger.warning(f"Incomplete candle data for {symbol}")
@@ -89,31 +105,23 @@ class HydraXBot:
             self.current_signals[symbol] = signal
 
             log_entry = {
-                'timestamp': datetime.utcnow().isoformat(),
+                **asdict(signal),
+                'timestamp': tick_timestamp or datetime.now(timezone.utc).isoformat(),
                 'symbol': symbol,
-                'direction': getattr(signal, 'direction', None),
-                'entry_price': getattr(signal, 'entry_price', None),
-                'stop_loss': getattr(signal, 'stop_loss', None),
-                'tp1': getattr(signal, 'tp1', None),
-                'tp2': getattr(signal, 'tp2', None),
-                'signal_strength': getattr(signal, 'signal_strength', None),
-                'confirmation_count': getattr(signal, 'confirmation_count', None),
-                'component_scores': getattr(signal, 'component_scores', None),
-                'skip_reason': getattr(signal, 'skip_reason', None),
             }
 
             self.signal_log.append(log_entry)
 
             # Log a concise summary if the signal has numeric attributes
-            strength = getattr(signal, 'signal_strength', None)
-            conf = getattr(signal, 'confirmation_count', None)
+            strength = signal.signal_strength
+            conf = signal.confirmation_count
             try:
                 strength_str = f"strength={strength:.3f}" if isinstance(strength, (int, float)) else f"strength={strength}"
             except Exception:
                 strength_str = f"strength={strength}"
 
             logger.info(
-                f"Signal processed for {symbol}: {getattr(signal, 'direction', None)} (" 
+                f"Signal processed for {symbol}: {signal.direction} (" 
                 f"{strength_str}, confirmations={conf})"
             )
         except Exception as e:
@@ -128,8 +136,8 @@ class HydraXBot:
             while True:
                 iteration += 1
 
-                for symbol in self.symbols:
-                    await self.process_signal(symbol)
+                tick_timestamp = datetime.now(timezone.utc).isoformat()
+                await asyncio.gather(*(self.process_signal(symbol, tick_timestamp) for symbol in self.symbols))
 
                 if iteration % 12 == 0:
                     logger.info(f"Bot running normally. Signals: {len(self.signal_log)} total")
@@ -145,8 +153,11 @@ class HydraXBot:
     async def shutdown(self):
         try:
             logger.info("Shutting down bot...")
-            await self.exchange.close()
-            await self.data_streamer.close()
+            # Stop the polling tasks before the connector they poll through is closed
+            if self.data_streamer is not None:
+                await self.data_streamer.close()
+            if self.exchange is not None:
+                await self.exchange.close()
             await self.notifier.shutdown()
             logger.info("Bot shutdown complete")
         except Exception as e:
@@ -156,7 +167,7 @@ class HydraXBot:
         return self.current_signals
 
     def get_signal_history(self, limit: int = 100) -> List[Dict]:
-        return self.signal_log[-limit:]
+        return list(islice(reversed(self.signal_log), limit))[::-1]
 
 
 async def main():
@@ -1,138 +1,158 @@
 import numpy as np
-import pandas as pd
 import logging
 
+from indicators import true_range_from_arrays
+from modules.candles import Candles
+
 logger = logging.getLogger(__name__)
 
+_DIRECTION_NAMES = {1: 'up', -1: 'down', 0: 'none'}
+
 
 class BreakoutEngine:
     """Detects compression boxes and ATR spikes for breakout signals."""
 
     def __init__(self, compression_candles=(20, 40), atr_threshold=1.5, 
-                 min_body_ratio=0.6, max_wick_ratio=0.25):
+                 min_body_ratio=0.6, max_wick_ratio=0.25, atr_period=14):
         self.compression_candles = compression_candles
         self.atr_threshold = atr_threshold
         self.min_body_ratio = min_body_ratio
         self.max_wick_ratio = max_wick_ratio
+        self.atr_period = atr_period
+
+    @staticmethod
+    def _to_soa(candles):
+        """Column arrays for candles: Candles as-is, a list of candle dicts converted once per call."""
+        if isinstance(candles, Candles):
+            return candles
+        return Candles.from_dicts(candles)
 
     def calculate_atr(self, candles, period=14):
         """Calculate Average True Range."""
         if len(candles) < period:
             return None
         
-        tr_values = []
-        for i in range(len(candles)):
-            high = candles[i]['high']
-            low = candles[i]['low']
-            close_prev = candles[i-1]['close'] if i > 0 else candles[i]['close']
-            
-            tr = max(
-                high - low,
-                abs(high - close_prev),
-                abs(low - close_prev)
-            )
-            tr_values.append(tr)
+        tr_values = self._true_range(self._to_soa(candles))
         
         atr = np.mean(tr_values[-period:])
         return float(atr)
 
-    def detect_compression(self, candles):
-        """
-        Detect compression box: consecutive candles with decreasing ATR.
-        Returns: {'compressed': bool, 'candle_count': int, 'avg_atr': float}
-        """
-        if len(candles) < self.compression_candles[0]:
-            return {'compressed': False, 'candle_count': 0, 'avg_atr': 0}
-        
-        atr_values = []
-        for i in range(len(candles) - 1):
-            candle = candles[i]
-            close_prev = candles[i-1]['close'] if i > 0 else candle['close']
-            
-            tr = max(
-                candle['high'] - candle['low'],
-                abs(candle['high'] - close_prev),
-                abs(candle['low'] - close_prev)
-            )
-            atr_values.append(tr)
-        
-        if len(atr_values) < self.compression_candles[0]:
+    def _true_range(self, soa):
+        return true_range_from_arrays(soa.high, soa.low, soa.close)
+
+    def _compression_from_tr(self, tr_values):
+        """Compression check on a precomputed TR array (the forming candle is excluded)."""
+        min_candles = self.compression_candles[0]
+        if len(tr_values) - 1 < min_candles:
             return {'compressed': False, 'candle_count': 0, 'avg_atr': 0}
         
-        recent_atr = atr_values[-self.compression_candles[0]:]
+        recent_atr = tr_values[-min_candles - 1:-1]
         
-        is_decreasing = all(
-            recent_atr[i] >= recent_atr[i+1] 
-            for i in range(len(recent_atr) - 1)
-        )
+        is_decreasing = bool(np.all(np.diff(recent_atr) <= 0))
         
         avg_atr = float(np.mean(recent_atr))
         
         return {
             'compressed': is_decreasing,
-            'candle_count': self.compression_candles[0],
+            'candle_count': min_candles,
             'avg_atr': avg_atr
         }
 
-    def detect_atr_spike(self, candles):
-        """
-        Detect ATR spike: current ATR > historical average * threshold.
-        Returns: {'spike': bool, 'current_atr': float, 'avg_atr': float, 'ratio': float}
-        """
-        if len(candles) < 50:
+    def _atr_spike_from_tr(self, tr_values):
+        """ATR spike check on a precomputed TR array: 14-candle ATR against 50-candle ATR."""
+        if len(tr_values) < 50:
             return {'spike': False, 'current_atr': 0, 'avg_atr': 0, 'ratio': 0}
         
-        current_atr = self.calculate_atr(candles[-20:], period=14)
-        historical_atr = self.calculate_atr(candles, period=50)
-        
-        if historical_atr is None or current_atr is None:
-            return {'spike': False, 'current_atr': 0, 'avg_atr': 0, 'ratio': 0}
+        current_atr = float(np.mean(tr_values[-14:]))
+        historical_atr = float(np.mean(tr_values[-50:]))
         
         ratio = current_atr / historical_atr if historical_atr > 0 else 0
         spike = ratio > self.atr_threshold
         
         return {
             'spike': spike,
-            'current_atr': float(current_atr),
-            'avg_atr': float(historical_atr),
+            'current_atr': current_atr,
+            'avg_atr': historical_atr,
             'ratio': float(ratio)
         }
 
+    def detect_compression(self, candles):
+        """
+        Detect compression box: consecutive candles with decreasing ATR.
+        Returns: {'compressed': bool, 'candle_count': int, 'avg_atr': float}
+        """
+        if len(candles) < self.compression_candles[0]:
+            return {'compressed': False, 'candle_count': 0, 'avg_atr': 0}
+        
+        return self._compression_from_tr(self._true_range(self._to_soa(candles)))
+
+    def detect_atr_spike(self, candles):
+        """
+        Detect ATR spike: current ATR > historical average * threshold.
+        Returns: {'spike': bool, 'current_atr': float, 'avg_atr': float, 'ratio': float}
+        """
+        if len(candles) < 50:
+            return {'spike': False, 'current_atr': 0, 'avg_atr': 0, 'ratio': 0}
+        
+        return self._atr_spike_from_tr(self._true_range(self._to_soa(candles)))
+
     def validate_body_wick(self, candle):
         """
         Validate candle body strength and wick weakness.
         Returns: {'valid': bool, 'body_ratio': float, 'wick_ratio': float, 'direction': 'up'|'down'}
         """
-        high = candle['high']
-        low = candle['low']
-        open_price = candle['open']
-        close_price = candle['close']
+        return self._body_wick(candle['open'], candle['high'], candle['low'], candle['close'])
+
+    def validate_body_wick_batch(self, opens, highs, lows, closes):
+        """
+        Branchless body/wick validation over arrays of candles.
+        Returns: {'valid': bool[], 'body_ratio': float[], 'wick_ratio': float[], 'direction': int8[] (+1 up, -1 down, 0 none)}
+        """
+        opens = np.asarray(opens, dtype=np.float64)
+        highs = np.asarray(highs, dtype=np.float64)
+        lows = np.asarray(lows, dtype=np.float64)
+        closes = np.asarray(closes, dtype=np.float64)
+        
+        full_range = highs - lows
+        has_range = full_range != 0
+        safe_range = np.where(has_range, full_range, 1.0)
+        
+        body = np.abs(closes - opens)
+        upper_wick = highs - np.maximum(opens, closes)
+        lower_wick = np.minimum(opens, closes) - lows
+        is_up = closes > opens
         
+        body_ratio = np.where(has_range, body / safe_range, 0.0)
+        wick_ratio = np.where(has_range, np.where(is_up, lower_wick, upper_wick) / safe_range, 0.0)
+        direction = np.where(has_range, np.where(is_up, 1, -1), 0).astype(np.int8)
+        valid = has_range & (body_ratio >= self.min_body_ratio) & (wick_ratio <= self.max_wick_ratio)
+        
+        return {
+            'valid': valid,
+            'body_ratio': body_ratio,
+            'wick_ratio': wick_ratio,
+            'direction': direction
+        }
+
+    def _body_wick(self, open_price, high, low, close_price):
+        """Scalar body/wick validation, same results as validate_body_wick_batch for one candle."""
         full_range = high - low
         if full_range == 0:
-            return {'valid': False, 'body_ratio': 0, 'wick_ratio': 0, 'direction': 'none'}
+            return {'valid': False, 'body_ratio': 0.0, 'wick_ratio': 0.0, 'direction': 'none'}
         
-        body_range = abs(close_price - open_price)
-        body_ratio = body_range / full_range
+        body_ratio = abs(close_price - open_price) / full_range
         
         if close_price > open_price:
-            upper_wick = high - close_price
-            lower_wick = open_price - low
             direction = 'up'
-            opposite_wick_ratio = lower_wick / full_range
+            wick_ratio = (min(open_price, close_price) - low) / full_range
         else:
-            upper_wick = high - open_price
-            lower_wick = close_price - low
             direction = 'down'
-            opposite_wick_ratio = upper_wick / full_range
-        
-        valid = (body_ratio >= self.min_body_ratio and 
-                opposite_wick_ratio <= self.max_wick_ratio)
+            wick_ratio = (high - max(open_price, close_price)) / full_range
         
         return {
-            'valid': valid,
+            'valid': bool(body_ratio >= self.min_body_ratio and wick_ratio <= self.max_wick_ratio),
             'body_ratio': float(body_ratio),
-            'wick_ratio': float(opposite_wick_ratio),
+            'wick_ratio': float(wick_ratio),
             'direction': direction
         }
 
@@ -140,18 +160,28 @@ class BreakoutEngine:
         """
         Generate breakout signal combining all conditions.
         Returns: {'signal': 'LONG'|'SHORT'|'NONE', 'strength': float, 'details': dict}
+        A LONG/SHORT result also carries 'atr' over atr_period, taken from the same true ranges.
         """
         if len(candles) < 20:
             return {'signal': 'NONE', 'strength': 0.0, 'details': {}}
         
-        current_candle = candles[-1]
-        compression = self.detect_compression(candles)
-        atr_spike = self.detect_atr_spike(candles)
-        body_wick = self.validate_body_wick(current_candle)
+        soa = self._to_soa(candles)
+        
+        body_wick = self._body_wick(soa.open[-1], soa.high[-1], soa.low[-1], soa.close[-1])
+        if not body_wick['valid']:
+            return {'signal': 'NONE', 'strength': 0.0, 'details': {'body_wick': body_wick}}
         
-        all_valid = (compression['compressed'] and atr_spike['spike'] and body_wick['valid'])
+        tr_values = self._true_range(soa)
+        
+        atr_spike = self._atr_spike_from_tr(tr_values)
+        if not atr_spike['spike']:
+            return {'signal': 'NONE', 'strength': 0.0, 'details': {
+                'atr_spike': atr_spike,
+                'body_wick': body_wick
+            }}
         
-        if not all_valid:
+        compression = self._compression_from_tr(tr_values)
+        if not compression['compressed']:
             return {'signal': 'NONE', 'strength': 0.0, 'details': {
                 'compression': compression,
                 'atr_spike': atr_spike,
@@ -164,6 +194,7 @@ class BreakoutEngine:
         return {
             'signal': signal,
             'strength': float(strength),
+            'atr': float(np.mean(tr_values[-self.atr_period:])),
             'details': {
                 'compression': compression,
                 'atr_spike': atr_spike,
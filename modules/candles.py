@@ -0,0 +1,115 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence
+
+
+CANDLE_DTYPE = np.dtype([
+    ('timestamp', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8')
+])
+
+
+@dataclass(frozen=True)
+class Candles:
+    """Column-oriented OHLC candles: one contiguous float64 array per price field."""
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    timestamp: Optional[np.ndarray] = None
+    volume: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_dicts(cls, candles: List[Dict]) -> 'Candles':
+        """Build column arrays from a list of candle dicts in a single pass per field."""
+        n = len(candles)
+        has_timestamp = n > 0 and 'timestamp' in candles[0]
+        has_volume = n > 0 and 'volume' in candles[0]
+        return cls(
+            open=np.fromiter((c['open'] for c in candles), dtype=np.float64, count=n),
+            high=np.fromiter((c['high'] for c in candles), dtype=np.float64, count=n),
+            low=np.fromiter((c['low'] for c in candles), dtype=np.float64, count=n),
+            close=np.fromiter((c['close'] for c in candles), dtype=np.float64, count=n),
+            timestamp=np.fromiter((c['timestamp'] for c in candles), dtype=np.int64, count=n) if has_timestamp else None,
+            volume=np.fromiter((c['volume'] for c in candles), dtype=np.float64, count=n) if has_volume else None
+        )
+
+    @classmethod
+    def from_ohlcv(cls, rows: Sequence[Sequence[float]]) -> 'Candles':
+        """Build columns from ccxt-style [timestamp, open, high, low, close, volume] rows."""
+        cols = np.ascontiguousarray(np.asarray(rows, dtype=np.float64).reshape(-1, 6).T)
+        return cls(
+            open=cols[1],
+            high=cols[2],
+            low=cols[3],
+            close=cols[4],
+            timestamp=cols[0].astype(np.int64),
+            volume=cols[5]
+        )
+
+    @classmethod
+    def from_records(cls, records: np.ndarray) -> 'Candles':
+        """Copy the fields of a structured candle array (see CANDLE_DTYPE) into contiguous columns."""
+        return cls(
+            open=np.ascontiguousarray(records['open']),
+            high=np.ascontiguousarray(records['high']),
+            low=np.ascontiguousarray(records['low']),
+            close=np.ascontiguousarray(records['close']),
+            timestamp=np.ascontiguousarray(records['timestamp']),
+            volume=np.ascontiguousarray(records['volume'])
+        )
+
+    @classmethod
+    def coerce(cls, candles) -> 'Candles':
+        """Return candles unchanged if already columnar, otherwise convert from candle dicts."""
+        if isinstance(candles, cls):
+            return candles
+        return cls.from_dicts(candles)
+
+    def astype(self, dtype) -> 'Candles':
+        """Copy with the price and volume columns cast to dtype (e.g. np.float32 for backtest sweeps)."""
+        return Candles(
+            open=self.open.astype(dtype),
+            high=self.high.astype(dtype),
+            low=self.low.astype(dtype),
+            close=self.close.astype(dtype),
+            timestamp=self.timestamp,
+            volume=self.volume.astype(dtype) if self.volume is not None else None
+        )
+
+    def to_dicts(self) -> List[Dict]:
+        return list(self)
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        """Slices return Candles views; an integer index returns that candle as a dict."""
+        if isinstance(index, slice):
+            return Candles(
+                open=self.open[index],
+                high=self.high[index],
+                low=self.low[index],
+                close=self.close[index],
+                timestamp=self.timestamp[index] if self.timestamp is not None else None,
+                volume=self.volume[index] if self.volume is not None else None
+            )
+        candle = {
+            'open': float(self.open[index]),
+            'high': float(self.high[index]),
+            'low': float(self.low[index]),
+            'close': float(self.close[index])
+        }
+        if self.timestamp is not None:
+            candle['timestamp'] = int(self.timestamp[index])
+        if self.volume is not None:
+            candle['volume'] = float(self.volume[index])
+        return candle
@@ -8,9 +8,16 @@ import pandas as pd
 import time
 import logging
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 import sys
 
+try:
+    from streamlit_autorefresh import st_autorefresh
+    HAS_AUTOREFRESH = True
+except ImportError:
+    HAS_AUTOREFRESH = False
+
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from modules.dashboard_state_reader import DashboardStateReader
 from utils import load_config
@@ -61,32 +68,60 @@ def get_config():
     except:
         return {"symbols": ["BTCUSDT", "XAUTUSDT"], "max_daily_trades": 4}
 
+_POSITION_COLUMNS = {
+    "symbol": st.column_config.TextColumn("Symbol"),
+    "direction": st.column_config.TextColumn("Direction"),
+    "entry_price": st.column_config.NumberColumn("Entry Price", format="$%.2f"),
+    "current_price": st.column_config.NumberColumn("Current Price", format="$%.2f"),
+    "unrealized_pnl": st.column_config.NumberColumn("Unrealized PnL", format="$%.2f"),
+    "sl": st.column_config.NumberColumn("SL", format="$%.2f"),
+    "tp": st.column_config.NumberColumn("TP", format="$%.2f"),
+    "pct_to_sl": st.column_config.NumberColumn("% to SL", format="%.1f%%"),
+    "risk_pct": st.column_config.NumberColumn("Risk %", format="%.2f%%")
+}
+
+_TRADE_COLUMNS = {
+    "entry_time": st.column_config.TextColumn("Entry Time"),
+    "symbol": st.column_config.TextColumn("Symbol"),
+    "direction": st.column_config.TextColumn("Direction"),
+    "entry_price": st.column_config.NumberColumn("Entry Price", format="$%.2f"),
+    "exit_price": st.column_config.NumberColumn("Exit Price", format="$%.2f"),
+    "pnl": st.column_config.NumberColumn("PnL", format="$%.2f"),
+    "pnl_pct": st.column_config.NumberColumn("PnL %", format="%.2f%%"),
+    "duration": st.column_config.TextColumn("Duration")
+}
+
+_METRIC_COLUMNS = {
+    "balance": st.column_config.NumberColumn("Balance", format="$%.2f"),
+    "equity": st.column_config.NumberColumn("Equity", format="$%.2f"),
+    "free_margin": st.column_config.NumberColumn("Free Margin", format="$%.2f"),
+    "margin_ratio_pct": st.column_config.NumberColumn("Margin Ratio %", format="%.2f%%"),
+    "drawdown_pct": st.column_config.NumberColumn("Current Drawdown %", format="%.2f%%"),
+    "daily_pnl": st.column_config.NumberColumn("Daily P&L", format="$%.2f"),
+    "daily_pnl_pct": st.column_config.NumberColumn("Daily P&L %", format="%+.2f%%")
+}
+
+_TREND_EMOJI = {"BULLISH": "📈", "BEARISH": "📉", "RANGING": "➡️"}
+_STATUS_EMOJI = {"RUNNING": "🚀", "PAUSED": "⏸️"}
+_STATUS_COLOR = {"RUNNING": "🟢", "PAUSED": "🟡"}
+
 def get_emoji_trend(trend: str) -> str:
-    if "bullish" in trend.lower():
-        return "📈"
-    elif "bearish" in trend.lower():
-        return "📉"
-    else:
-        return "➡️"
+    return _TREND_EMOJI.get(trend.upper(), "➡️")
 
 def get_emoji_status(status: str) -> str:
-    if "running" in status.lower():
-        return "🚀"
-    elif "paused" in status.lower():
-        return "⏸️"
-    else:
-        return "🛑"
+    return _STATUS_EMOJI.get(status.upper(), "🛑")
 
+@lru_cache(maxsize=2048)
 def format_currency(value: float) -> str:
     return f"${value:,.2f}"
 
+@lru_cache(maxsize=2048)
 def format_percent(value: float) -> str:
     sign = "+" if value >= 0 else ""
-    color = "green" if value >= 0 else "red"
     return f"{sign}{value:.2f}%"
 
 def render_account_metrics(metrics: dict):
-    """Render account metrics in 4-column layout."""
+    """Render account metrics as a one-row summary table."""
     st.subheader("📊 Account Metrics")
     
     if not metrics.get("available"):
@@ -102,55 +137,20 @@ def render_account_metrics(metrics: dict):
             "available": False
         }
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric(
-            label="Balance",
-            value=format_currency(metrics["balance"]),
-            delta=format_percent(metrics["daily_pnl_pct"]),
-            delta_color="off"
-        )
-    
-    with col2:
-        st.metric(
-            label="Equity",
-            value=format_currency(metrics["equity"]),
-            delta=None
-        )
+    summary = pd.DataFrame([{key: metrics[key] for key in _METRIC_COLUMNS}])
+    styled = (
+        summary.style
+        .map(lambda v: f"color: {'green' if v >= 0 else 'red'}", subset=["daily_pnl", "daily_pnl_pct"])
+        .map(lambda v: "color: red" if v > 3 else "", subset=["drawdown_pct"])
+    )
     
-    with col3:
-        st.metric(
-            label="Free Margin",
-            value=format_currency(metrics["free_margin"]),
-            delta=None
-        )
-    
-    with col4:
-        st.metric(
-            label="Margin Ratio %",
-            value=f"{metrics['margin_ratio_pct']:.2f}%",
-            delta=None
-        )
-    
-    col5, col6 = st.columns(2)
-    
-    with col5:
-        drawdown_color = "inverse" if metrics["drawdown_pct"] > 3 else "off"
-        st.metric(
-            label="Current Drawdown %",
-            value=f"{metrics['drawdown_pct']:.2f}%",
-            delta=None,
-            delta_color=drawdown_color
-        )
-    
-    with col6:
-        st.metric(
-            label="Daily P&L",
-            value=format_currency(metrics["daily_pnl"]),
-            delta=format_percent(metrics["daily_pnl_pct"]),
-            delta_color="off"
-        )
+    st.dataframe(
+        styled,
+        column_config=_METRIC_COLUMNS,
+        column_order=list(_METRIC_COLUMNS),
+        use_container_width=True,
+        hide_index=True
+    )
 
 def render_open_positions(positions: list):
     """Render open positions table."""
@@ -160,34 +160,30 @@ def render_open_positions(positions: list):
         st.info("No open positions")
         return
     
-    df_data = []
-    for pos in positions:
-        df_data.append({
-            "Symbol": pos["symbol"],
-            "Direction": pos["direction"],
-            "Entry Price": f"${pos['entry_price']:.2f}",
-            "Current Price": f"${pos['current_price']:.2f}",
-            "Unrealized PnL": f"${pos['unrealized_pnl']:.2f}",
-            "SL": f"${pos['sl']:.2f}",
-            "TP": f"${pos['tp']:.2f}",
-            "% to SL": f"{pos['pct_to_sl']:.1f}%",
-            "Risk %": f"{pos['risk_pct']:.2f}%"
-        })
-    
-    df = pd.DataFrame(df_data)
-    st.dataframe(df, use_container_width=True, hide_index=True)
-    
-    for idx, pos in enumerate(positions):
-        with st.expander(f"Details: {pos['symbol']} {pos['direction']}"):
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.write(f"**Entry Time:** {pos['entry_time']}")
-                st.write(f"**TP1:** ${pos['tp1']:.2f}")
-            with col2:
-                st.write(f"**Position Size:** {pos['position_size']:.4f}")
-                st.write(f"**TP2:** ${pos['tp2']:.2f}")
-            with col3:
-                st.write(f"**Unrealized %:** {pos['unrealized_pnl_pct']:.2f}%")
+    st.dataframe(
+        pd.DataFrame(positions),
+        column_config=_POSITION_COLUMNS,
+        column_order=list(_POSITION_COLUMNS),
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    idx = st.selectbox(
+        "Details",
+        options=range(len(positions)),
+        format_func=lambda i: f"{positions[i]['symbol']} {positions[i]['direction']}",
+        key="pos_detail"
+    )
+    pos = positions[idx]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.write(f"**Entry Time:** {pos['entry_time']}")
+        st.write(f"**TP1:** {format_currency(pos['tp1'])}")
+    with col2:
+        st.write(f"**Position Size:** {pos['position_size']:.4f}")
+        st.write(f"**TP2:** {format_currency(pos['tp2'])}")
+    with col3:
+        st.write(f"**Unrealized %:** {format_percent(pos['unrealized_pnl_pct'])}")
 
 def render_trade_history(trades: list):
     """Render trade history table."""
@@ -197,35 +193,31 @@ def render_trade_history(trades: list):
         st.info("No closed trades yet")
         return
     
-    win_count = len([t for t in trades if t["pnl"] > 0])
-    loss_count = len([t for t in trades if t["pnl"] < 0])
-    total_trades = len(trades)
-    win_rate = (win_count / total_trades * 100) if total_trades > 0 else 0
-    avg_profit = sum([t["pnl"] for t in trades if t["pnl"] > 0]) / max(1, win_count)
-    avg_loss = sum([t["pnl"] for t in trades if t["pnl"] < 0]) / max(1, loss_count)
+    df = pd.DataFrame(trades)
+    pnl = df["pnl"].to_numpy(dtype=float)
+    wins = pnl > 0
+    losses = pnl < 0
+    win_count = int(wins.sum())
+    loss_count = int(losses.sum())
+    total_trades = len(df)
+    win_rate = win_count / total_trades * 100
+    avg_profit = float(pnl[wins].mean()) if win_count else 0.0
+    avg_loss = float(pnl[losses].mean()) if loss_count else 0.0
     
     col1, col2, col3, col4, col5 = st.columns(5)
     col1.metric("Total Trades", total_trades)
     col2.metric("Wins", win_count)
     col3.metric("Losses", loss_count)
     col4.metric("Win Rate %", f"{win_rate:.1f}%")
-    col5.metric("Avg Profit/Loss", f"${avg_profit:.2f} / ${avg_loss:.2f}")
-    
-    df_data = []
-    for trade in trades:
-        df_data.append({
-            "Entry Time": trade["entry_time"],
-            "Symbol": trade["symbol"],
-            "Direction": trade["direction"],
-            "Entry Price": f"${trade['entry_price']:.2f}",
-            "Exit Price": f"${trade['exit_price']:.2f}",
-            "PnL": f"${trade['pnl']:.2f}",
-            "PnL %": f"{trade['pnl_pct']:.2f}%",
-            "Duration": trade["duration"]
-        })
-    
-    df = pd.DataFrame(df_data)
-    st.dataframe(df, use_container_width=True, hide_index=True)
+    col5.metric("Avg Profit/Loss", f"{format_currency(avg_profit)} / {format_currency(avg_loss)}")
+    
+    st.dataframe(
+        df,
+        column_config=_TRADE_COLUMNS,
+        column_order=list(_TRADE_COLUMNS),
+        use_container_width=True,
+        hide_index=True
+    )
 
 def render_bot_status(status: dict):
     """Render bot status display."""
@@ -239,7 +231,7 @@ def render_bot_status(status: dict):
     
     with col1:
         emoji = get_emoji_status(status["status"])
-        status_color = "🟢" if "RUNNING" in status["status"].upper() else ("🟡" if "PAUSED" in status["status"].upper() else "🔴")
+        status_color = _STATUS_COLOR.get(status["status"].upper(), "🔴")
         st.markdown(f"### {emoji} {status_color} Status: {status['status']}")
     
     with col2:
@@ -252,12 +244,11 @@ def render_bot_status(status: dict):
     if status.get("shutdown_reason"):
         st.error(f"**Shutdown Reason:** {status['shutdown_reason']}")
 
-def render_trend_bias(config: dict, reader: DashboardStateReader):
+def render_trend_bias(config: dict, trend_data: dict):
     """Render trend bias display."""
     st.subheader("📊 Trend Bias (M15)")
     
     symbols = config.get("symbols", ["BTCUSDT", "XAUTUSDT"])
-    trend_data = reader.read_trend_data()
     
     cols = st.columns(len(symbols))
     for idx, symbol in enumerate(symbols):
@@ -277,12 +268,10 @@ def render_trend_bias(config: dict, reader: DashboardStateReader):
             st.write(f"**EMA50:** {ema50:.2f}")
             st.write(f"**EMA200:** {ema200:.2f}")
 
-def render_pa_confirmation(reader: DashboardStateReader):
+def render_pa_confirmation(pa_data: dict):
     """Render price action confirmation display."""
     st.subheader("📍 Price Action Confirmation")
     
-    pa_data = reader.read_pa_confirmation()
-    
     col1, col2 = st.columns(2)
     
     with col1:
@@ -302,12 +291,10 @@ def render_sidebar(config: dict):
     """Render sidebar controls."""
     st.sidebar.title("⚙️ Configuration")
     
-    refresh_rate = st.sidebar.slider(
+    refresh_rate = st.sidebar.select_slider(
         "Refresh Rate (seconds)",
-        min_value=0.5,
-        max_value=5.0,
-        value=1.0,
-        step=0.5
+        options=[1, 2, 5, 10, 30],
+        value=1
     )
     
     symbols = config.get("symbols", ["BTCUSDT", "XAUTUSDT"])
@@ -327,6 +314,21 @@ def render_sidebar(config: dict):
     
     return refresh_rate, selected_symbols, view_mode, manual_refresh
 
+def load_view_payload(reader: DashboardStateReader, view_mode: str) -> dict:
+    """Read only the state the selected view renders."""
+    payload = {}
+    if view_mode == "Overview":
+        payload["metrics"] = reader.read_account_metrics()
+        payload["status"] = reader.read_bot_status()
+    if view_mode in ("Overview", "Trends"):
+        payload["trend"] = reader.read_trend_data()
+        payload["pa"] = reader.read_pa_confirmation()
+    if view_mode in ("Overview", "Positions"):
+        payload["positions"] = reader.read_open_positions()
+    if view_mode == "History":
+        payload["trades"] = reader.read_trade_history(limit=50)
+    return payload
+
 def main():
     """Main dashboard app."""
     st.title("🚀 HYDRA-X v2 Dashboard")
@@ -336,47 +338,52 @@ def main():
     
     refresh_rate, selected_symbols, view_mode, manual_refresh = render_sidebar(config)
     
+    if HAS_AUTOREFRESH:
+        st_autorefresh(interval=int(refresh_rate * 1000), key="refresh_tick")
+    
+    render_key = (view_mode, reader.snapshot())
+    if manual_refresh or st.session_state.get("prev_render_key") != render_key:
+        st.session_state["prev_render_key"] = render_key
+        st.session_state["prev_render_payload"] = load_view_payload(reader, view_mode)
+    payload = st.session_state["prev_render_payload"]
+    
     container = st.container()
     
     if view_mode == "Overview":
         with container:
-            metrics = reader.read_account_metrics()
-            render_account_metrics(metrics)
+            render_account_metrics(payload["metrics"])
             
             st.divider()
-            render_bot_status(reader.read_bot_status())
+            render_bot_status(payload["status"])
             
             st.divider()
             col1, col2 = st.columns(2)
             with col1:
-                render_trend_bias(config, reader)
+                render_trend_bias(config, payload["trend"])
             with col2:
-                render_pa_confirmation(reader)
+                render_pa_confirmation(payload["pa"])
             
             st.divider()
-            positions = reader.read_open_positions()
-            render_open_positions(positions)
+            render_open_positions(payload["positions"])
     
     elif view_mode == "Positions":
         with container:
-            positions = reader.read_open_positions()
-            render_open_positions(positions)
+            render_open_positions(payload["positions"])
     
     elif view_mode == "History":
         with container:
-            trades = reader.read_trade_history(limit=50)
-            render_trade_history(trades)
+            render_trade_history(payload["trades"])
     
     elif view_mode == "Trends":
         with container:
-            render_trend_bias(config, reader)
+            render_trend_bias(config, payload["trend"])
             st.divider()
-            render_pa_confirmation(reader)
+            render_pa_confirmation(payload["pa"])
     
     st.divider()
     st.caption(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
     
-    if manual_refresh or refresh_rate > 0:
+    if not HAS_AUTOREFRESH and (manual_refresh or refresh_rate > 0):
         time.sleep(refresh_rate)
         st.rerun()
 
@@ -5,222 +5,340 @@ Provides safe access to account metrics, positions, trades, and status.
 
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils import json_loads, jsonl_tail, scan_file_stats
+
+try:
+    import streamlit as st
+    HAS_STREAMLIT = True
+except ImportError:
+    HAS_STREAMLIT = False
 
 logger = logging.getLogger(__name__)
 
+STATE_FILES = ("daily_summary_state.json", "open_positions.json", "trade_history.jsonl",
+               "trade_history.json", "trend_cache.json", "pa_confirmation_cache.json")
+
+_TRADE_FIELDS = ["entry_time", "exit_time", "symbol", "direction", "entry_price",
+                 "exit_price", "position_size", "exit_reason"]
+
+
+def _load_json(path_str: str, mtime_ns: int, size: int) -> Any:
+    """Parse a JSON file. mtime_ns and size only key the cache so a rewrite invalidates it."""
+    return json_loads(Path(path_str).read_bytes())
+
+
+if HAS_STREAMLIT:
+    _load_json = st.cache_data(ttl=60, max_entries=16, show_spinner=False)(_load_json)
+
+
+def _cache_view(func):
+    """Cache a view builder on its (path_str, mtime_ns, size, ...) arguments; the _data argument is not hashed."""
+    if HAS_STREAMLIT:
+        return st.cache_data(ttl=30, max_entries=8, show_spinner=False)(func)
+    return func
+
+
+@_cache_view
+def _account_metrics_view(path_str: str, mtime_ns: int, size: int, _data) -> Dict[str, Any]:
+    """Account metrics derived from daily_summary_state.json contents."""
+    data = _data
+    
+    if not data:
+        logger.debug("Account metrics data is None or empty")
+        return {
+            "balance": 0.0,
+            "equity": 0.0,
+            "free_margin": 0.0,
+            "margin_ratio_pct": 0.0,
+            "drawdown_pct": 0.0,
+            "daily_pnl": 0.0,
+            "daily_pnl_pct": 0.0,
+            "available": False
+        }
+    
+    balance = float(data.get("balance", 0.0))
+    equity = float(data.get("equity", 0.0))
+    drawdown_pct = float(data.get("drawdown_pct", 0.0))
+    daily_pnl = float(data.get("daily_pnl", 0.0))
+    
+    free_margin = equity - (equity * float(data.get("margin_used_pct", 0.0)) / 100)
+    margin_ratio = float(data.get("margin_ratio_pct", 0.0))
+    
+    return {
+        "balance": balance,
+        "equity": equity,
+        "free_margin": max(0, free_margin),
+        "margin_ratio_pct": margin_ratio,
+        "drawdown_pct": drawdown_pct,
+        "daily_pnl": daily_pnl,
+        "daily_pnl_pct": (daily_pnl / balance * 100) if balance > 0 else 0.0,
+        "available": True
+    }
+
+
+@_cache_view
+def _open_positions_view(path_str: str, mtime_ns: int, size: int, _data) -> List[Dict[str, Any]]:
+    """Open positions derived from open_positions.json contents."""
+    data = _data
+    
+    if not data or not isinstance(data, list):
+        return []
+    
+    positions = []
+    for pos in data:
+        try:
+            entry_price = float(pos.get("entry_price", 0))
+            current_price = float(pos.get("current_price", 0))
+            position_size = float(pos.get("position_size", 0))
+            
+            unrealized_pnl = 0.0
+            if "direction" in pos and current_price > 0:
+                direction = pos.get("direction").upper()
+                if direction == "LONG":
+                    unrealized_pnl = position_size * (current_price - entry_price)
+                else:
+                    unrealized_pnl = position_size * (entry_price - current_price)
+            
+            sl_price = float(pos.get("sl", 0))
+            pct_to_sl = 0.0
+            if sl_price > 0 and entry_price > 0:
+                pct_to_sl = abs((current_price - sl_price) / (entry_price - sl_price) * 100) if entry_price != sl_price else 0
+            
+            positions.append({
+                "symbol": pos.get("symbol", "N/A"),
+                "direction": pos.get("direction", "N/A").upper(),
+                "entry_price": entry_price,
+                "current_price": current_price,
+                "unrealized_pnl": unrealized_pnl,
+                "unrealized_pnl_pct": (unrealized_pnl / (position_size * entry_price) * 100) if (position_size * entry_price) > 0 else 0,
+                "position_size": position_size,
+                "sl": sl_price,
+                "tp": float(pos.get("tp", 0)),
+                "tp1": float(pos.get("tp1", 0)),
+                "tp2": float(pos.get("tp2", 0)),
+                "entry_time": pos.get("entry_time", "N/A"),
+                "pct_to_sl": pct_to_sl,
+                "risk_pct": float(pos.get("risk_pct", 0.0))
+            })
+        except (ValueError, KeyError) as e:
+            logger.debug(f"Error parsing position: {str(e)}")
+            continue
+    
+    return positions
+
+
+@_cache_view
+def _trade_history_view(path_str: str, mtime_ns: int, size: int, limit: int, _data,
+                        legacy_version: Tuple[int, int] = (0, 0)) -> List[Dict[str, Any]]:
+    """Last limit closed trades, newest first; legacy_version keys records filled in from trade_history.json."""
+    data = _data
+    
+    if not data or not isinstance(data, list):
+        return []
+    
+    df = pd.DataFrame([t for t in data[-limit:] if isinstance(t, dict)], columns=_TRADE_FIELDS)
+    if df.empty:
+        return []
+    
+    entry_price = pd.to_numeric(df["entry_price"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    exit_price = pd.to_numeric(df["exit_price"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    position_size = pd.to_numeric(df["position_size"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    
+    direction = df["direction"].fillna("N/A").astype(str).str.upper()
+    sign = np.where(direction.eq("LONG").to_numpy(), 1.0, -1.0)
+    has_direction = df["direction"].notna().to_numpy()
+    pnl = np.where(has_direction & (entry_price > 0), sign * position_size * (exit_price - entry_price), 0.0)
+    
+    notional = position_size * entry_price
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_pct = np.where(notional > 0, pnl / notional * 100, 0.0)
+    
+    entry_time = df["entry_time"].fillna("N/A")
+    exit_time = df["exit_time"].fillna("N/A")
+    entry_dt = pd.to_datetime(entry_time.where(entry_time != "N/A"), utc=True, errors="coerce", format="ISO8601")
+    exit_dt = pd.to_datetime(exit_time.where(exit_time != "N/A"), utc=True, errors="coerce", format="ISO8601")
+    seconds = (exit_dt - entry_dt).dt.total_seconds()
+    has_duration = seconds.notna()
+    hours = (seconds[has_duration] // 3600).astype(int).astype(str).str.zfill(2)
+    minutes = ((seconds[has_duration] % 3600) // 60).astype(int).astype(str).str.zfill(2)
+    duration = pd.Series("N/A", index=df.index)
+    duration[has_duration] = hours + ":" + minutes
+    
+    trades = pd.DataFrame({
+        "entry_time": entry_time,
+        "symbol": df["symbol"].fillna("N/A"),
+        "direction": direction,
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "pnl": pnl,
+        "pnl_pct": pnl_pct,
+        "duration": duration,
+        "exit_reason": df["exit_reason"].fillna("N/A"),
+        "exit_time": exit_time
+    })
+    
+    # The writer appends chronologically, so the tail is normally already ordered and only needs
+    # reversing; anything else (ties, back-filled or missing entry times) goes through the stable sort.
+    if entry_time.is_monotonic_increasing and entry_time.is_unique:
+        return trades.iloc[::-1].to_dict("records")
+    return trades.sort_values("entry_time", ascending=False, kind="stable").to_dict("records")
+
+
+@_cache_view
+def _bot_status_view(path_str: str, mtime_ns: int, size: int, _data) -> Dict[str, Any]:
+    """Bot status derived from daily_summary_state.json contents."""
+    data = _data
+    
+    if not data:
+        return {
+            "status": "UNKNOWN",
+            "consecutive_losses": 0,
+            "daily_trade_count": 0,
+            "shutdown_reason": "",
+            "last_update": "N/A",
+            "available": False
+        }
+    
+    return {
+        "status": data.get("status", "UNKNOWN"),
+        "consecutive_losses": int(data.get("consecutive_losses", 0)),
+        "daily_trade_count": int(data.get("daily_trade_count", 0)),
+        "shutdown_reason": data.get("shutdown_reason", ""),
+        "last_update": data.get("last_update", "N/A"),
+        "available": True
+    }
+
+
 class DashboardStateReader:
     """Reads and parses bot state JSON files with error handling."""
     
     def __init__(self, data_dir: str = "/app/hydra_x_v2_1804/data"):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._json_cache: Dict[Path, Tuple[int, int, Any]] = {}
+        self._tail_cache: Dict[Tuple[Path, int], Tuple[int, int, List[Any], bool]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="state_reader")
     
     def read_json_safe(self, file_path: Path) -> Optional[Dict[str, Any]]:
-        """Safely read JSON file with error handling."""
+        """Safely read JSON file with error handling. Unchanged files return the cached (shared) object."""
         try:
-            if not file_path.exists():
-                logger.debug(f"File not found: {file_path.name}")
+            st_res = file_path.stat()
+            cached = self._json_cache.get(file_path)
+            if cached and cached[0] == st_res.st_mtime_ns and cached[1] == st_res.st_size:
+                return cached[2]
+            
+            data = _load_json(str(file_path), st_res.st_mtime_ns, st_res.st_size)
+            self._json_cache[file_path] = (st_res.st_mtime_ns, st_res.st_size, data)
+            if data is None:
                 return None
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                if data is None:
-                    return None
-                return data
+            return data
         except json.JSONDecodeError as e:
+            # Forget the last good parse so _file_version agrees with the None returned here
+            self._json_cache.pop(file_path, None)
             logger.error(f"Corrupted JSON in {file_path.name}: {str(e)}")
             return None
         except FileNotFoundError as e:
+            self._json_cache.pop(file_path, None)
             logger.debug(f"File not found: {file_path.name}")
             return None
         except Exception as e:
+            self._json_cache.pop(file_path, None)
             logger.error(f"Error reading {file_path.name}: {str(e)}")
             return None
     
+    def _file_version(self, file_path: Path) -> Tuple[int, int]:
+        """(mtime_ns, size) of the last successful parse of file_path, or (0, 0) if it is missing or unreadable."""
+        cached = self._json_cache.get(file_path)
+        return (cached[0], cached[1]) if cached else (0, 0)
+    
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """Stat all state files in one os.scandir pass and re-parse changed JSON files concurrently.
+        
+        Returns {file name: (mtime_ns, size)}; missing files are omitted.
+        """
+        stats = scan_file_stats(self.data_dir, list(STATE_FILES))
+        stale = []
+        for name, st_res in stats.items():
+            if not name.endswith(".json"):
+                continue
+            cached = self._json_cache.get(self.data_dir / name)
+            if not cached or cached[0] != st_res.st_mtime_ns or cached[1] != st_res.st_size:
+                stale.append(self.data_dir / name)
+        
+        if len(stale) > 1:
+            list(self._executor.map(self.read_json_safe, stale))
+        elif stale:
+            self.read_json_safe(stale[0])
+        
+        return {name: (st_res.st_mtime_ns, st_res.st_size) for name, st_res in stats.items()}
+    
     def read_account_metrics(self) -> Dict[str, Any]:
         """Read account metrics from daily_summary_state.json."""
         state_file = self.data_dir / "daily_summary_state.json"
-        
-        if not state_file.exists():
-            logger.debug(f"Account metrics file not found: {state_file}")
-            return {
-                "balance": 0.0,
-                "equity": 0.0,
-                "free_margin": 0.0,
-                "margin_ratio_pct": 0.0,
-                "drawdown_pct": 0.0,
-                "daily_pnl": 0.0,
-                "daily_pnl_pct": 0.0,
-                "available": False
-            }
-        
         data = self.read_json_safe(state_file)
-        
-        if not data:
-            logger.debug("Account metrics data is None or empty")
-            return {
-                "balance": 0.0,
-                "equity": 0.0,
-                "free_margin": 0.0,
-                "margin_ratio_pct": 0.0,
-                "drawdown_pct": 0.0,
-                "daily_pnl": 0.0,
-                "daily_pnl_pct": 0.0,
-                "available": False
-            }
-        
-        balance = float(data.get("balance", 0.0))
-        equity = float(data.get("equity", 0.0))
-        drawdown_pct = float(data.get("drawdown_pct", 0.0))
-        daily_pnl = float(data.get("daily_pnl", 0.0))
-        
-        free_margin = equity - (equity * float(data.get("margin_used_pct", 0.0)) / 100)
-        margin_ratio = float(data.get("margin_ratio_pct", 0.0))
-        
-        return {
-            "balance": balance,
-            "equity": equity,
-            "free_margin": max(0, free_margin),
-            "margin_ratio_pct": margin_ratio,
-            "drawdown_pct": drawdown_pct,
-            "daily_pnl": daily_pnl,
-            "daily_pnl_pct": (daily_pnl / balance * 100) if balance > 0 else 0.0,
-            "available": True
-        }
+        return _account_metrics_view(str(state_file), *self._file_version(state_file), data)
     
     def read_open_positions(self) -> List[Dict[str, Any]]:
         """Read open positions from open_positions.json."""
         state_file = self.data_dir / "open_positions.json"
         data = self.read_json_safe(state_file)
-        
-        if not data or not isinstance(data, list):
-            return []
-        
-        positions = []
-        for pos in data:
-            try:
-                entry_price = float(pos.get("entry_price", 0))
-                current_price = float(pos.get("current_price", 0))
-                position_size = float(pos.get("position_size", 0))
-                
-                unrealized_pnl = 0.0
-                if "direction" in pos and current_price > 0:
-                    direction = pos.get("direction").upper()
-                    if direction == "LONG":
-                        unrealized_pnl = position_size * (current_price - entry_price)
-                    else:
-                        unrealized_pnl = position_size * (entry_price - current_price)
-                
-                sl_price = float(pos.get("sl", 0))
-                pct_to_sl = 0.0
-                if sl_price > 0 and entry_price > 0:
-                    pct_to_sl = abs((current_price - sl_price) / (entry_price - sl_price) * 100) if entry_price != sl_price else 0
-                
-                positions.append({
-                    "symbol": pos.get("symbol", "N/A"),
-                    "direction": pos.get("direction", "N/A").upper(),
-                    "entry_price": entry_price,
-                    "current_price": current_price,
-                    "unrealized_pnl": unrealized_pnl,
-                    "unrealized_pnl_pct": (unrealized_pnl / (position_size * entry_price) * 100) if (position_size * entry_price) > 0 else 0,
-                    "position_size": position_size,
-                    "sl": sl_price,
-                    "tp": float(pos.get("tp", 0)),
-                    "tp1": float(pos.get("tp1", 0)),
-                    "tp2": float(pos.get("tp2", 0)),
-                    "entry_time": pos.get("entry_time", "N/A"),
-                    "pct_to_sl": pct_to_sl,
-                    "risk_pct": float(pos.get("risk_pct", 0.0))
-                })
-            except (ValueError, KeyError) as e:
-                logger.debug(f"Error parsing position: {str(e)}")
-                continue
-        
-        return positions
+        return _open_positions_view(str(state_file), *self._file_version(state_file), data)
+    
+    def read_jsonl_tail_safe(self, file_path: Path, limit: int) -> Optional[Tuple[int, int, List[Any], bool]]:
+        """Tail-read the last limit complete records of a JSONL file as (mtime_ns, size, records, reached_start); None if missing."""
+        try:
+            st_res = file_path.stat()
+            key = (file_path, limit)
+            cached = self._tail_cache.get(key)
+            if cached and cached[0] == st_res.st_mtime_ns and cached[1] == st_res.st_size:
+                return cached
+            
+            entry = (st_res.st_mtime_ns, st_res.st_size, *jsonl_tail(file_path, limit))
+            self._tail_cache[key] = entry
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error reading {file_path.name}: {str(e)}")
+            return None
     
     def read_trade_history(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """Read closed trade history from trade_history.json."""
-        state_file = self.data_dir / "trade_history.json"
-        data = self.read_json_safe(state_file)
-        
-        if not data or not isinstance(data, list):
-            return []
+        """Read closed trade history, tail-reading trade_history.jsonl when present, else trade_history.json.
         
-        trades = []
-        for trade in data[-limit:]:
-            try:
-                entry_price = float(trade.get("entry_price", 0))
-                exit_price = float(trade.get("exit_price", 0))
-                position_size = float(trade.get("position_size", 0))
-                
-                pnl = 0.0
-                if "direction" in trade and entry_price > 0:
-                    direction = trade.get("direction").upper()
-                    if direction == "LONG":
-                        pnl = position_size * (exit_price - entry_price)
-                    else:
-                        pnl = position_size * (entry_price - exit_price)
-                
-                pnl_pct = (pnl / (position_size * entry_price) * 100) if (position_size * entry_price) > 0 else 0
-                
-                entry_time = trade.get("entry_time", "N/A")
-                exit_time = trade.get("exit_time", "N/A")
-                
-                duration = "N/A"
-                if entry_time != "N/A" and exit_time != "N/A":
-                    try:
-                        entry_dt = datetime.fromisoformat(entry_time.replace("Z", "+00:00"))
-                        exit_dt = datetime.fromisoformat(exit_time.replace("Z", "+00:00"))
-                        delta = exit_dt - entry_dt
-                        hours = delta.total_seconds() // 3600
-                        minutes = (delta.total_seconds() % 3600) // 60
-                        duration = f"{int(hours):02d}:{int(minutes):02d}"
-                    except:
-                        pass
-                
-                trades.append({
-                    "entry_time": entry_time,
-                    "symbol": trade.get("symbol", "N/A"),
-                    "direction": trade.get("direction", "N/A").upper(),
-                    "entry_price": entry_price,
-                    "exit_price": exit_price,
-                    "pnl": pnl,
-                    "pnl_pct": pnl_pct,
-                    "duration": duration,
-                    "exit_reason": trade.get("exit_reason", "N/A"),
-                    "exit_time": exit_time
-                })
-            except (ValueError, KeyError) as e:
-                logger.debug(f"Error parsing trade: {str(e)}")
-                continue
+        As in StateManager.load_trade_history, pre-migration trades in trade_history.json come before
+        the log, so a log holding fewer than limit complete records is topped up from the tail of the
+        legacy file. A torn last line (write in progress) is skipped, not counted as a missing record.
+        """
+        jsonl_file = self.data_dir / "trade_history.jsonl"
+        state_file = self.data_dir / "trade_history.json"
+        tail = self.read_jsonl_tail_safe(jsonl_file, limit)
+        if tail is not None:
+            mtime_ns, size, records, reached_start = tail
+            if len(records) >= limit or not reached_start:
+                return _trade_history_view(str(jsonl_file), mtime_ns, size, limit, records)
+            
+            legacy = self.read_json_safe(state_file)
+            if not isinstance(legacy, list) or not legacy:
+                return _trade_history_view(str(jsonl_file), mtime_ns, size, limit, records)
+            combined = legacy[len(records) - limit:] + records
+            return _trade_history_view(str(jsonl_file), mtime_ns, size, limit, combined,
+                                       self._file_version(state_file))
         
-        return sorted(trades, key=lambda x: x["entry_time"], reverse=True)
+        data = self.read_json_safe(state_file)
+        return _trade_history_view(str(state_file), *self._file_version(state_file), limit, data)
     
     def read_bot_status(self) -> Dict[str, Any]:
         """Read bot status from daily_summary_state.json."""
         state_file = self.data_dir / "daily_summary_state.json"
         data = self.read_json_safe(state_file)
-        
-        if not data:
-            return {
-                "status": "UNKNOWN",
-                "consecutive_losses": 0,
-                "daily_trade_count": 0,
-                "shutdown_reason": "",
-                "last_update": "N/A",
-                "available": False
-            }
-        
-        return {
-            "status": data.get("status", "UNKNOWN"),
-            "consecutive_losses": int(data.get("consecutive_losses", 0)),
-            "daily_trade_count": int(data.get("daily_trade_count", 0)),
-            "shutdown_reason": data.get("shutdown_reason", ""),
-            "last_update": data.get("last_update", "N/A"),
-            "available": True
-        }
+        return _bot_status_view(str(state_file), *self._file_version(state_file), data)
     
     def read_trend_data(self) -> Dict[str, Any]:
         """Read trend data from signal_generator cache if available."""
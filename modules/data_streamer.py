@@ -1,12 +1,16 @@
 import asyncio
 import logging
 from typing import Dict, List, Optional, Any
-from collections import deque
-from datetime import datetime, timezone
-from utils import get_logger, validate_ohlc_data
+import numpy as np
+from utils import get_logger
+from modules.candles import CANDLE_DTYPE, Candles
 
 logger = get_logger("data_streamer")
 
+TIMEFRAME_MS = {
+    'M1': 60_000, 'M5': 300_000, 'M15': 900_000, 'H1': 3_600_000, 'H4': 14_400_000, 'D': 86_400_000
+}
+
 class DataStreamer:
     """Handle real-time OHLCV data streaming with WebSocket and REST fallback."""
     
@@ -14,98 +18,206 @@ class DataStreamer:
         self.connector = exchange_connector
         self.config = config
         self.candles_cache = {}
+        self._head = {}
+        self._count = {}
         self.cache_size = config['data_streaming'].get('candle_cache_size', 500)
         self.polling_interval = config['data_streaming'].get('polling_interval', 2)
         self.reconnect_max_delay = config['data_streaming'].get('reconnect_max_delay', 60)
         self.validation_enabled = config['data_streaming'].get('validation_enabled', True)
+        self.websocket_enabled = config['data_streaming'].get('websocket_enabled', True)
+        self._tasks: List[asyncio.Task] = []
         
         self._initialize_cache()
     
     def _initialize_cache(self) -> None:
-        """Initialize candle cache for each symbol and timeframe."""
+        """Initialize a fixed-size structured-array ring buffer for each symbol and timeframe."""
         for symbol in self.config['symbols']:
             self.candles_cache[symbol] = {}
+            self._head[symbol] = {}
+            self._count[symbol] = {}
             for timeframe in self.config['timeframes']:
-                self.candles_cache[symbol][timeframe] = deque(maxlen=self.cache_size)
+                self.candles_cache[symbol][timeframe] = np.zeros(self.cache_size, dtype=CANDLE_DTYPE)
+                self._head[symbol][timeframe] = 0
+                self._count[symbol][timeframe] = 0
+    
+    def _append_candle(self, symbol: str, timeframe: str, candle) -> None:
+        """Write a candle at the ring head; a repeat of the newest timestamp updates it in place, older ones are dropped."""
+        buf = self.candles_cache[symbol][timeframe]
+        head = self._head[symbol][timeframe]
+        count = self._count[symbol][timeframe]
+        row = (candle['timestamp'], candle['open'], candle['high'], candle['low'], candle['close'], candle['volume'])
+        
+        if count:
+            last = (head - 1) % self.cache_size
+            last_ts = buf[last]['timestamp']
+            if candle['timestamp'] == last_ts:
+                buf[last] = row
+                return
+            if candle['timestamp'] < last_ts:
+                return
+        
+        buf[head] = row
+        self._head[symbol][timeframe] = (head + 1) % self.cache_size
+        self._count[symbol][timeframe] = min(count + 1, self.cache_size)
+    
+    def _ordered(self, symbol: str, timeframe: str, count: Optional[int] = None) -> np.ndarray:
+        """Last count cached rows, oldest first; a view when they do not wrap the ring end."""
+        buf = self.candles_cache[symbol][timeframe]
+        head = self._head[symbol][timeframe]
+        n = self._count[symbol][timeframe]
+        if count and count < n:
+            n = count
+        
+        if n <= head:
+            return buf[head - n:head]
+        return np.concatenate((buf[head - n:], buf[:head]))
     
     async def fetch_historical_candles(self, symbol: str, timeframe: str, limit: int = 100) -> bool:
         """Fetch historical OHLCV data and populate cache."""
         try:
             candles = await self.connector.fetch_ohlcv(symbol, timeframe, limit=limit)
             
-            for candle in candles:
-                candle_dict = self._format_candle(candle, timeframe)
-                
-                if self.validation_enabled and not validate_ohlc_data(candle_dict):
-                    logger.warning(f"Invalid candle data for {symbol} {timeframe}: {candle_dict}")
-                    continue
-                
-                self.candles_cache[symbol][timeframe].append(candle_dict)
+            for record in self._to_records(candles, symbol, timeframe):
+                self._append_candle(symbol, timeframe, record)
             
-            logger.info(f"Loaded {len(self.candles_cache[symbol][timeframe])} candles for {symbol} {timeframe}")
+            logger.info(f"Loaded {self._count[symbol][timeframe]} candles for {symbol} {timeframe}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to fetch historical candles for {symbol} {timeframe}: {e}")
             return False
     
-    def _format_candle(self, candle: List, timeframe: str) -> Dict[str, Any]:
-        """Format ccxt candle data to standardized format."""
-        return {
-            'timestamp': candle[0],
-            'open': candle[1],
-            'high': candle[2],
-            'low': candle[3],
-            'close': candle[4],
-            'volume': candle[5],
-            'datetime': datetime.fromtimestamp(candle[0] / 1000, tz=timezone.utc),
-            'timeframe': timeframe
-        }
+    def _to_records(self, candles: List[List], symbol: str, timeframe: str) -> np.ndarray:
+        """Convert ccxt OHLCV rows to CANDLE_DTYPE records, dropping invalid rows in one vectorized pass."""
+        arr = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+        
+        if self.validation_enabled and len(arr):
+            o, h, l, c, v = arr[:, 1], arr[:, 2], arr[:, 3], arr[:, 4], arr[:, 5]
+            valid = (
+                np.isfinite(arr).all(axis=1)
+                & (h >= np.maximum(o, c)) & (h >= l)
+                & (l <= np.minimum(o, c))
+                & (v >= 0)
+            )
+            if not valid.all():
+                invalid = np.flatnonzero(~valid)
+                logger.warning(f"Dropped {len(invalid)} invalid candles for {symbol} {timeframe} at rows {invalid.tolist()}")
+                arr = arr[valid]
+        
+        records = np.empty(len(arr), dtype=CANDLE_DTYPE)
+        records['timestamp'] = arr[:, 0]
+        for i, name in enumerate(('open', 'high', 'low', 'close', 'volume'), start=1):
+            records[name] = arr[:, i]
+        return records
     
-    async def stream_real_time_candles(self, symbol: str, timeframe: str) -> None:
-        """Stream real-time candles via polling (REST fallback)."""
+    def _aggregate_timeframe(self, symbol: str, base_timeframe: str, timeframe: str, since_ts: int) -> None:
+        """Rebuild timeframe bars from base_timeframe candles for every bucket at or after since_ts."""
+        count = self._count[symbol][base_timeframe]
+        if not count:
+            return
+        
+        tf_ms = TIMEFRAME_MS[timeframe]
+        start_ts = since_ts - since_ts % tf_ms
+        newest_ts = int(self._ordered(symbol, base_timeframe, 1)['timestamp'][0])
+        span = (newest_ts - start_ts) // TIMEFRAME_MS[base_timeframe] + 1
+        rows = self._ordered(symbol, base_timeframe, max(span, 1))
+        rows = rows[rows['timestamp'] >= start_ts]
+        if not len(rows):
+            return
+        
+        buckets = rows['timestamp'] - rows['timestamp'] % tf_ms
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        ends = np.append(starts[1:], len(rows)) - 1
+        highs = np.maximum.reduceat(rows['high'], starts)
+        lows = np.minimum.reduceat(rows['low'], starts)
+        volumes = np.add.reduceat(rows['volume'], starts)
+        
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            self._append_candle(symbol, timeframe, {
+                'timestamp': int(buckets[start]),
+                'open': rows['open'][start],
+                'high': highs[i],
+                'low': lows[i],
+                'close': rows['close'][end],
+                'volume': volumes[i]
+            })
+    
+    def _base_timeframe(self) -> str:
+        """The lowest configured timeframe: the only one polled (and streamed) after the initial load."""
+        return min(self.config['timeframes'], key=lambda tf: TIMEFRAME_MS.get(tf, float('inf')))
+    
+    async def initialize(self) -> None:
+        """Load history for every symbol and timeframe, start the connector's WebSocket streams and the polling tasks."""
+        await asyncio.gather(*(
+            self.fetch_historical_candles(symbol, timeframe, limit=self.cache_size)
+            for symbol in self.config['symbols'] for timeframe in self.config['timeframes']
+        ))
+        
+        if self.websocket_enabled and hasattr(self.connector, 'start_streams'):
+            self.connector.start_streams(self.config['symbols'], [self._base_timeframe()])
+        
+        self._tasks = [asyncio.create_task(self.stream_symbol(symbol)) for symbol in self.config['symbols']]
+    
+    async def close(self) -> None:
+        """Stop the polling tasks."""
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+    
+    async def stream_symbol(self, symbol: str) -> None:
+        """Poll the lowest configured timeframe for symbol and derive the higher timeframes from it locally."""
+        timeframes = sorted(self.config['timeframes'], key=lambda tf: TIMEFRAME_MS.get(tf, float('inf')))
+        base_timeframe = timeframes[0]
+        derived = [tf for tf in timeframes[1:] if tf in TIMEFRAME_MS]
         reconnect_delay = 1
         
         while True:
             try:
-                candles = await self.connector.fetch_ohlcv(symbol, timeframe, limit=5)
+                candles = await self.connector.fetch_ohlcv(symbol, base_timeframe, limit=5)
+                records = self._to_records(candles, symbol, base_timeframe)
                 
-                for candle in candles:
-                    candle_dict = self._format_candle(candle, timeframe)
-                    
-                    if self.validation_enabled and not validate_ohlc_data(candle_dict):
-                        logger.warning(f"Invalid real-time candle for {symbol} {timeframe}")
-                        continue
-                    
-                    self.candles_cache[symbol][timeframe].append(candle_dict)
+                for record in records:
+                    self._append_candle(symbol, base_timeframe, record)
+                
+                if len(records):
+                    for timeframe in derived:
+                        self._aggregate_timeframe(symbol, base_timeframe, timeframe, int(records['timestamp'][0]))
                 
                 reconnect_delay = 1
                 await asyncio.sleep(self.polling_interval)
                 
             except Exception as e:
-                logger.error(f"Error streaming {symbol} {timeframe}: {e}")
+                logger.error(f"Error streaming {symbol} {base_timeframe}: {e}")
                 await asyncio.sleep(min(reconnect_delay, self.reconnect_max_delay))
                 reconnect_delay *= 2
     
-    def get_candles(self, symbol: str, timeframe: str, count: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Get cached candles for symbol and timeframe."""
+    async def stream_all(self) -> None:
+        """Run one polling stream per configured symbol."""
+        await asyncio.gather(*(self.stream_symbol(symbol) for symbol in self.config['symbols']))
+    
+    def get_candles(self, symbol: str, timeframe: str, count: Optional[int] = None) -> Candles:
+        """Get cached candles for symbol and timeframe as column arrays."""
         if symbol not in self.candles_cache or timeframe not in self.candles_cache[symbol]:
-            return []
-        
-        candles = list(self.candles_cache[symbol][timeframe])
+            return Candles.from_records(np.zeros(0, dtype=CANDLE_DTYPE))
         
-        if count and len(candles) > count:
-            return candles[-count:]
-        
-        return candles
+        return Candles.from_records(self._ordered(symbol, timeframe, count))
     
     def get_latest_candle(self, symbol: str, timeframe: str) -> Optional[Dict[str, Any]]:
         """Get most recent candle for symbol and timeframe."""
-        candles = self.get_candles(symbol, timeframe, count=1)
-        return candles[0] if candles else None
+        if symbol not in self.candles_cache or timeframe not in self.candles_cache[symbol]:
+            return None
+        if not self._count[symbol][timeframe]:
+            return None
+        
+        row = self.candles_cache[symbol][timeframe][(self._head[symbol][timeframe] - 1) % self.cache_size]
+        candle = {name: row[name].item() for name in CANDLE_DTYPE.names}
+        candle['timeframe'] = timeframe
+        return candle
     
     def get_cache_size(self, symbol: str, timeframe: str) -> int:
         """Get current cache size for symbol and timeframe."""
         if symbol not in self.candles_cache or timeframe not in self.candles_cache[symbol]:
             return 0
-        return len(self.candles_cache[symbol][timeframe])
\ No newline at end of file
+        return self._count[symbol][timeframe]
\ No newline at end of file
@@ -1,7 +1,10 @@
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any
-from utils import get_logger
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Any, Tuple, Union
+from utils import TokenBucket, get_logger
+from modules.candles import Candles
 
 try:
     import ccxt.pro as ccxt_pro
@@ -9,19 +12,92 @@ try:
 except ImportError:
     HAS_CCXT_PRO = False
 
-import ccxt
+import ccxt.async_support as ccxt_async
 
 logger = get_logger("exchange_connector")
 
+_TIMEFRAMES = {
+    'M1': {'bybit': '1', 'okx': '1m', 'mexc': '1m', 'gate': '1m', 'binance': '1m'},
+    'M5': {'bybit': '5', 'okx': '5m', 'mexc': '5m', 'gate': '5m', 'binance': '5m'},
+    'M15': {'bybit': '15', 'okx': '15m', 'mexc': '15m', 'gate': '15m', 'binance': '15m'},
+    'M30': {'bybit': '30', 'okx': '30m', 'mexc': '30m', 'gate': '30m', 'binance': '30m'},
+    'H1': {'bybit': '60', 'okx': '1h', 'mexc': '1h', 'gate': '1h', 'binance': '1h'},
+    'H4': {'bybit': '240', 'okx': '4h', 'mexc': '4h', 'gate': '4h', 'binance': '4h'},
+    'D': {'bybit': 'D', 'okx': '1D', 'mexc': '1D', 'gate': '1d', 'binance': '1d'},
+}
+
+TIMEFRAME_MAP = {
+    (timeframe, exchange): value
+    for timeframe, by_exchange in _TIMEFRAMES.items()
+    for exchange, value in by_exchange.items()
+}
+
+_INSTANCES: Dict[Tuple[str, str], 'ExchangeConnector'] = {}
+_INSTANCES_LOCK = asyncio.Lock()
+_BUCKETS: Dict[Tuple[str, str], TokenBucket] = {}
+
+def _account_key(config: Dict[str, Any]) -> Tuple[str, str]:
+    return config['exchange'].lower(), config['api'].get('api_key', '')
+
+def _shared_bucket(config: Dict[str, Any]) -> Optional[TokenBucket]:
+    """The process-wide request throttle for this exchange account, or None if exchange_rate_limit is not set."""
+    rate = config.get('exchange_rate_limit')
+    if not rate:
+        return None
+    key = _account_key(config)
+    if key not in _BUCKETS:
+        _BUCKETS[key] = TokenBucket(rate, config.get('exchange_rate_burst'))
+    return _BUCKETS[key]
+
 class ExchangeConnector:
-    """Handle exchange connectivity with automatic failover and testnet support."""
+    """Handle exchange connectivity with automatic failover and testnet support.
+    
+    ccxt rate-limits per exchange instance, so modules that talk to the exchange
+    should obtain it through ExchangeConnector.get_shared rather than constructing their own.
+    """
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.exchange_hierarchy = ['bybit', 'okx', 'mexc', 'gate', 'binance']
         self.exchange = None
         self.exchange_name = None
+        self.ticker_ttl = config.get('ticker_ttl', 1.0)
+        self._ticker_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # Rolling per-(symbol, timeframe) candle buffers, ordered by timestamp; only trusted while the key is live
+        self._ohlcv_cache: Dict[Tuple[str, str], List[List]] = {}
+        self._ohlcv_live: set = set()
+        self.ohlcv_buffer_size = config.get('ohlcv_buffer_size', 1000)
+        self._stream_tasks: List[asyncio.Task] = []
+        self._bucket = _shared_bucket(config)
+        self._endpoint_weights: Dict[str, float] = config.get('exchange_endpoint_weights', {})
+        self._base_exchange_config = {
+            'apiKey': config['api'].get('api_key', ''),
+            'secret': config['api'].get('api_secret', ''),
+            'enableRateLimit': True,
+            'timeout': 30000,
+        }
+        if 'rate_limit_ms' in config['api']:
+            self._base_exchange_config['rateLimit'] = config['api']['rate_limit_ms']
+        
+    @classmethod
+    async def get_shared(cls, config: Dict[str, Any]) -> 'ExchangeConnector':
+        """Return the process-wide connected instance for (exchange, api_key), connecting it on first use."""
+        key = _account_key(config)
+        connector = _INSTANCES.get(key)
+        if connector is not None and connector.exchange is not None:
+            return connector
         
+        async with _INSTANCES_LOCK:
+            connector = _INSTANCES.get(key)
+            if connector is not None and connector.exchange is not None:
+                return connector
+            
+            connector = cls(config)
+            if not await connector.connect():
+                raise ConnectionError(f"Could not connect to {config['exchange']} or any failover exchange")
+            _INSTANCES[key] = connector
+            return connector
+    
     async def connect(self) -> bool:
         """Attempt to connect to configured exchange with failover."""
         preferred_exchange = self.config['exchange'].lower()
@@ -41,14 +117,9 @@ class ExchangeConnector:
     async def _try_connect(self, exchange_name: str) -> bool:
         """Attempt connection to specific exchange."""
         try:
-            exchange_class = getattr(ccxt, exchange_name)
+            exchange_class = getattr(ccxt_pro if HAS_CCXT_PRO else ccxt_async, exchange_name)
             
-            exchange_config = {
-                'apiKey': self.config['api'].get('api_key', ''),
-                'secret': self.config['api'].get('api_secret', ''),
-                'enableRateLimit': True,
-                'timeout': 30000,
-            }
+            exchange_config = dict(self._base_exchange_config)
             
             if exchange_name == 'okx':
                 exchange_config['password'] = self.config['api'].get('passphrase', '')
@@ -59,58 +130,126 @@ class ExchangeConnector:
                     logger.info(f"Connecting to {exchange_name} testnet")
             
             self.exchange = exchange_class(exchange_config)
-            self.exchange_name = exchange_name
+            self.exchange_name = exchange_name.lower()
+            self._ticker_cache.clear()
+            self._ohlcv_cache.clear()
+            self._ohlcv_live.clear()
             
+            await self.exchange.load_markets()
             await self._test_connection()
             logger.info(f"Successfully connected to {exchange_name}")
             return True
             
         except Exception as e:
             logger.warning(f"Failed to connect to {exchange_name}: {e}")
+            await self.close()
             return False
     
     async def _test_connection(self) -> None:
-        """Test exchange connection with ping."""
-        try:
-            ticker = self.exchange.fetch_ticker(self.config['symbols'][0])
-            logger.info(f"Exchange connection test successful - {self.config['symbols'][0]} price: {ticker['last']}")
-        except Exception as e:
-            raise Exception(f"Connection test failed: {e}")
-    
-    def _convert_timeframe(self, timeframe: str) -> str:
-        """Convert standard timeframe format to exchange-specific format."""
-        timeframe_map = {
-            'M1': {'bybit': '1', 'okx': '1m', 'mexc': '1m', 'gate': '1m', 'binance': '1m'},
-            'M5': {'bybit': '5', 'okx': '5m', 'mexc': '5m', 'gate': '5m', 'binance': '5m'},
-            'M15': {'bybit': '15', 'okx': '15m', 'mexc': '15m', 'gate': '15m', 'binance': '15m'},
-            'M30': {'bybit': '30', 'okx': '30m', 'mexc': '30m', 'gate': '30m', 'binance': '30m'},
-            'H1': {'bybit': '60', 'okx': '1h', 'mexc': '1h', 'gate': '1h', 'binance': '1h'},
-            'H4': {'bybit': '240', 'okx': '4h', 'mexc': '4h', 'gate': '4h', 'binance': '4h'},
-            'D': {'bybit': 'D', 'okx': '1D', 'mexc': '1D', 'gate': '1d', 'binance': '1d'},
-        }
+        """Test the connection by fetching every configured symbol's ticker concurrently, priming the ticker cache."""
+        symbols = self.config['symbols']
+        if not symbols:
+            raise Exception("Connection test failed: no symbols configured")
+        started = time.monotonic()
         
-        if timeframe not in timeframe_map:
-            return timeframe
+        async def fetch(symbol: str) -> Dict[str, Any]:
+            await self._throttle('fetch_ticker')
+            return await self.exchange.fetch_ticker(symbol)
         
-        exchange_name = self.exchange_name.lower()
-        if exchange_name not in timeframe_map[timeframe]:
-            return timeframe
+        results = await asyncio.gather(*(fetch(symbol) for symbol in symbols), return_exceptions=True)
+        fetched_at = time.monotonic()
         
-        return timeframe_map[timeframe][exchange_name]
+        errors = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                errors[symbol] = result
+            else:
+                self._ticker_cache[symbol] = (fetched_at, result)
+        
+        if len(errors) == len(symbols):
+            raise Exception(f"Connection test failed: {errors[symbols[0]]}")
+        for symbol, error in errors.items():
+            logger.warning(f"Ticker prefetch failed for {symbol}: {error}")
+        
+        prices = ", ".join(f"{symbol}={self._ticker_cache[symbol][1]['last']}" for symbol in symbols if symbol not in errors)
+        logger.info(f"Exchange connection test successful in {(fetched_at - started) * 1000:.0f}ms - {prices}")
+    
+    async def _throttle(self, endpoint: str) -> None:
+        """Wait for the shared token bucket, charging the endpoint's configured weight (default 1)."""
+        if self._bucket is not None:
+            await self._bucket.acquire(self._endpoint_weights.get(endpoint, 1))
+    
+    def _convert_timeframe(self, timeframe: str) -> str:
+        """Convert standard timeframe format to exchange-specific format."""
+        return TIMEFRAME_MAP.get((timeframe, self.exchange_name), timeframe)
+    
+    def _merge_ohlcv(self, key: Tuple[str, str], rows: List[List], replace: bool = True) -> None:
+        """
+        Merge candles into the rolling buffer for key by timestamp. A repeated timestamp replaces the
+        buffered candle only when replace is set (stream updates); REST rows just fill the gaps.
+        """
+        buf = self._ohlcv_cache.setdefault(key, [])
+        for row in rows:
+            if not buf or row[0] > buf[-1][0]:
+                buf.append(row)
+                continue
+            i = len(buf) - 1 if row[0] == buf[-1][0] else bisect_left(buf, row[0], key=lambda r: r[0])
+            if i < len(buf) and buf[i][0] == row[0]:
+                if replace:
+                    buf[i] = row
+            else:
+                buf.insert(i, row)
+        if len(buf) > self.ohlcv_buffer_size:
+            del buf[:len(buf) - self.ohlcv_buffer_size]
     
     async def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 100) -> List[List]:
-        """Fetch historical OHLCV data."""
+        """
+        Fetch historical OHLCV data, served from the WebSocket buffer when it is live and holds enough candles.
+        A REST result for a streamed key seeds that buffer, so the stream only has to supply new candles.
+        """
+        key = (symbol, timeframe)
+        live = key in self._ohlcv_live
+        streamed = self._ohlcv_cache.get(key)
+        if live and streamed is not None and len(streamed) >= limit:
+            return list(streamed[-limit:])
+        
         try:
             converted_tf = self._convert_timeframe(timeframe)
-            return self.exchange.fetch_ohlcv(symbol, converted_tf, limit=limit)
+            await self._throttle('fetch_ohlcv')
+            rows = await self.exchange.fetch_ohlcv(symbol, converted_tf, limit=limit)
         except Exception as e:
             logger.error(f"Failed to fetch OHLCV for {symbol} {timeframe}: {e}")
             raise
+        
+        if live:
+            self._merge_ohlcv(key, rows, replace=False)
+        return rows
+    
+    async def fetch_candles(self, symbol: str, timeframe: str, limit: int = 100) -> Candles:
+        """Fetch OHLCV data as column arrays, converted once from the raw ccxt rows."""
+        return Candles.from_ohlcv(await self.fetch_ohlcv(symbol, timeframe, limit=limit))
+    
+    async def fetch_ohlcv_many(self, pairs: List[Tuple[str, str]], limit: int = 100) -> List[Union[List[List], Exception]]:
+        """Fetch OHLCV for several (symbol, timeframe) pairs concurrently on the shared, rate-limited exchange.
+        
+        Results are in pair order; a failed fetch yields its exception instead of failing the batch.
+        """
+        return await asyncio.gather(
+            *(self.fetch_ohlcv(symbol, timeframe, limit=limit) for symbol, timeframe in pairs),
+            return_exceptions=True
+        )
     
     async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
-        """Fetch current ticker data."""
+        """Fetch current ticker data, reusing a result younger than ticker_ttl seconds."""
+        cached = self._ticker_cache.get(symbol)
+        if cached and time.monotonic() - cached[0] < self.ticker_ttl:
+            return cached[1]
+        
         try:
-            return self.exchange.fetch_ticker(symbol)
+            await self._throttle('fetch_ticker')
+            ticker = await self.exchange.fetch_ticker(symbol)
+            self._ticker_cache[symbol] = (time.monotonic(), ticker)
+            return ticker
         except Exception as e:
             logger.error(f"Failed to fetch ticker for {symbol}: {e}")
             raise
@@ -118,11 +257,94 @@ class ExchangeConnector:
     async def fetch_balance(self) -> Dict[str, Any]:
         """Fetch account balance."""
         try:
-            return self.exchange.fetch_balance()
+            await self._throttle('fetch_balance')
+            return await self.exchange.fetch_balance()
         except Exception as e:
             logger.error(f"Failed to fetch balance: {e}")
             raise
     
+    async def create_order(self, symbol: str, order_type: str, side: str, amount: float, price: Optional[float] = None) -> Dict[str, Any]:
+        """Place an order through the shared throttle."""
+        await self._throttle('create_order')
+        return await self.exchange.create_order(symbol, order_type, side, amount, price)
+    
+    def supports_streaming(self) -> bool:
+        """True if the connected exchange can push tickers and candles over WebSocket (ccxt.pro)."""
+        return HAS_CCXT_PRO and self.exchange is not None and bool(self.exchange.has.get('watchTicker'))
+    
+    async def watch_ticker(self, symbol: str) -> None:
+        """Keep the ticker cache for symbol updated from a persistent WebSocket subscription."""
+        reconnect_delay = 1
+        while True:
+            try:
+                ticker = await self.exchange.watch_ticker(symbol)
+                self._ticker_cache[symbol] = (time.monotonic(), ticker)
+                reconnect_delay = 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Ticker stream for {symbol} interrupted: {e}")
+                await asyncio.sleep(reconnect_delay)
+                reconnect_delay = min(reconnect_delay * 2, 60)
+    
+    async def watch_ohlcv(self, symbol: str, timeframe: str) -> None:
+        """
+        Keep the rolling candle buffer for symbol/timeframe updated from a persistent WebSocket subscription.
+        
+        ccxt.pro returns only the newest candle(s) per update (newUpdates), so each update is merged by
+        timestamp. An interrupted stream may have missed candles: its buffer is dropped until it is live again.
+        """
+        key = (symbol, timeframe)
+        converted_tf = self._convert_timeframe(timeframe)
+        reconnect_delay = 1
+        while True:
+            try:
+                rows = await self.exchange.watch_ohlcv(symbol, converted_tf)
+                self._merge_ohlcv(key, rows)
+                self._ohlcv_live.add(key)
+                reconnect_delay = 1
+            except asyncio.CancelledError:
+                self._ohlcv_live.discard(key)
+                raise
+            except Exception as e:
+                self._ohlcv_live.discard(key)
+                self._ohlcv_cache.pop(key, None)
+                logger.warning(f"OHLCV stream for {symbol} {timeframe} interrupted: {e}")
+                await asyncio.sleep(reconnect_delay)
+                reconnect_delay = min(reconnect_delay * 2, 60)
+    
+    def start_streams(self, symbols: List[str], timeframes: List[str]) -> bool:
+        """Start background WebSocket tasks for every symbol's ticker and candles; False if streaming is unavailable."""
+        if not self.supports_streaming():
+            logger.info("WebSocket streaming unavailable, using REST polling")
+            return False
+        
+        for symbol in symbols:
+            self._stream_tasks.append(asyncio.create_task(self.watch_ticker(symbol)))
+            if self.exchange.has.get('watchOHLCV'):
+                for timeframe in timeframes:
+                    self._stream_tasks.append(asyncio.create_task(self.watch_ohlcv(symbol, timeframe)))
+        return True
+    
+    async def close(self) -> None:
+        """Stop WebSocket tasks, close the exchange's sessions and drop the instance."""
+        for task in self._stream_tasks:
+            task.cancel()
+        if self._stream_tasks:
+            await asyncio.gather(*self._stream_tasks, return_exceptions=True)
+        self._stream_tasks.clear()
+        self._ohlcv_live.clear()
+        
+        if self.exchange is None:
+            return
+        
+        try:
+            await self.exchange.close()
+        except Exception as e:
+            logger.warning(f"Error closing {self.exchange_name} session: {e}")
+        finally:
+            self.exchange = None
+    
     def get_exchange_name(self) -> str:
         """Get current connected exchange name."""
         return self.exchange_name
\ No newline at end of file
@@ -1,17 +1,22 @@
 import asyncio
+import atexit
 import logging
 import sys
-import json
-import random
 import tempfile
+import time
+import hashlib
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, Tuple, Optional, List, Any
+from typing import Dict, Tuple, Optional, List, Any, Set
 import os
 import signal
 import functools
 from unittest.mock import AsyncMock
 
+import numpy as np
+
+from utils import atomic_write_bytes, fsync_directory, json_dumps, json_loads, read_json_file, read_jsonl_tail, write_json_file
+
 sys.stdout.flush()
 logging.basicConfig(
     level=logging.INFO,
@@ -20,41 +25,135 @@ logging.basicConfig(
 )
 
 
+_ENSURED: Set[Path] = set()
+
+
+def _ensure_dir(path: Path) -> None:
+    """mkdir -p, at most once per path per process."""
+    if path not in _ENSURED:
+        path.mkdir(parents=True, exist_ok=True)
+        _ENSURED.add(path)
+
+
+def _file_version(path: Path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _read_jsonl_from(path: Path, offset: int = 0) -> Tuple[List[Dict], int]:
+    """Parse the complete lines of a JSONL file after offset; returns the records and the offset past the last newline."""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except OSError:
+        return [], offset
+    
+    end = data.rfind(b'\n') + 1
+    records = []
+    for line in data[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            records.append(json_loads(line))
+        except ValueError:
+            continue
+    return records, offset + end
+
+
+def _read_legacy_trade_history(legacy_file: Path) -> List[Dict]:
+    try:
+        return list(read_json_file(legacy_file))
+    except (OSError, ValueError, TypeError):
+        return []
+
+
 class StateManager:
-    def __init__(self, data_dir: str = 'data'):
+    def __init__(self, data_dir: str = 'data', batch_size: int = 1, flush_interval: float = 0.0):
         self.data_dir = Path(data_dir)
-        self.data_dir.mkdir(parents=True, exist_ok=True)
-        self.trade_history_file = self.data_dir / "trade_history.json"
+        _ensure_dir(self.data_dir)
+        self.trade_history_file = self.data_dir / "trade_history.jsonl"
+        self.legacy_trade_history_file = self.data_dir / "trade_history.json"
         self.open_positions_file = self.data_dir / "open_positions.json"
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._pending_trades: List[bytes] = []
+        self._last_flush = time.monotonic()
+        self._positions_digest: Optional[bytes] = None
+        self._history_cache: Optional[Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]], int, List[Dict]]] = None
         self.logger = logging.getLogger('OrderExecutor')
+        if self.batch_size > 1 or self.flush_interval > 0:
+            # Batched trades are only in memory until the next flush; don't lose them on exit
+            atexit.register(self.flush_trade_history)
         self.logger.info("StateManager initialized")
     
     def save_trade_history(self, trade: Dict[str, Any]) -> None:
-        trades = self.load_trade_history()
-        trades.append(trade)
+        """Queue one trade for the append-only log; flushed every batch_size trades or flush_interval seconds."""
+        self._pending_trades.append(json_dumps(trade, default=str, newline=True))
+        
+        if len(self._pending_trades) >= self.batch_size or (
+            self.flush_interval > 0 and time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush_trade_history()
+    
+    def save_trade_history_bulk(self, trades: List[Dict[str, Any]]) -> None:
+        """Append many trades (plus anything already queued) with one write and fsync."""
+        self._pending_trades.extend(json_dumps(trade, default=str, newline=True) for trade in trades)
+        self.flush_trade_history()
+    
+    def flush_trade_history(self) -> None:
+        """Append queued trades to trade_history.jsonl with a single write and fsync."""
+        if not self._pending_trades:
+            return
         
-        temp_file = self.trade_history_file.with_suffix('.tmp')
-        with open(temp_file, 'w') as f:
-            json.dump(trades, f, indent=2, default=str)
-        os.rename(temp_file, self.trade_history_file)
+        created = not self.trade_history_file.exists()
+        with open(self.trade_history_file, 'ab') as f:
+            f.write(b''.join(self._pending_trades))
+            f.flush()
+            os.fsync(f.fileno())
+        if created:
+            fsync_directory(self.data_dir)
         
-        self.logger.info(f"Trade history saved: {len(trades)} trades total")
+        self.logger.info(f"Trade history saved: {len(self._pending_trades)} trade(s) appended")
+        self._pending_trades.clear()
+        self._last_flush = time.monotonic()
     
     def load_trade_history(self) -> List[Dict]:
-        if not self.trade_history_file.exists():
-            return []
+        """All trades, memoized on the files' (mtime, size); growth of the append-only log is parsed incrementally."""
+        self.flush_trade_history()
+        legacy_version = _file_version(self.legacy_trade_history_file)
+        log_version = _file_version(self.trade_history_file)
         
-        try:
-            with open(self.trade_history_file, 'r') as f:
-                return json.load(f)
-        except:
-            return []
+        cache = self._history_cache
+        if cache is not None and cache[0] == legacy_version:
+            _, cached_log_version, offset, trades = cache
+            if cached_log_version == log_version:
+                return list(trades)
+            if log_version is not None and log_version[1] >= offset:
+                appended, offset = _read_jsonl_from(self.trade_history_file, offset)
+                trades.extend(appended)
+                self._history_cache = (legacy_version, log_version, offset, trades)
+                return list(trades)
+        
+        trades = _read_legacy_trade_history(self.legacy_trade_history_file)
+        appended, offset = _read_jsonl_from(self.trade_history_file)
+        trades.extend(appended)
+        self._history_cache = (legacy_version, log_version, offset, trades)
+        return list(trades)
     
     def save_open_positions(self, positions: List[Dict]) -> None:
-        temp_file = self.open_positions_file.with_suffix('.tmp')
-        with open(temp_file, 'w') as f:
-            json.dump(positions, f, indent=2, default=str)
-        os.rename(temp_file, self.open_positions_file)
+        """Rewrite open_positions.json, skipping the write when the content is unchanged since the last save."""
+        payload = json_dumps(positions, default=str)
+        digest = hashlib.blake2b(payload, digest_size=16).digest()
+        if digest == self._positions_digest and self.open_positions_file.exists():
+            return
+        
+        atomic_write_bytes(self.open_positions_file, payload)
+        self._positions_digest = digest
         
         self.logger.info(f"Open positions saved: {len(positions)} positions")
     
@@ -63,18 +162,27 @@ class StateManager:
             return []
         
         try:
-            with open(self.open_positions_file, 'r') as f:
-                return json.load(f)
+            return read_json_file(self.open_positions_file)
         except:
             return []
+    
+    def dump_json(self, filepath) -> Path:
+        """One-shot, indented export of trade history and open positions for humans."""
+        path = Path(filepath)
+        write_json_file(path, {
+            'trades': self.load_trade_history(),
+            'open_positions': self.load_open_positions()
+        }, indent=True, default=str)
+        return path
 
 
 class FirstRunSafetyTrade:
     def __init__(self, data_dir: str = 'data'):
         self.data_dir = Path(data_dir)
-        self.data_dir.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(self.data_dir)
         self.marker_file = self.data_dir / "hydra_first_run.done"
-        self.trade_history_file = self.data_dir / "trade_history.json"
+        self.trade_history_file = self.data_dir / "trade_history.jsonl"
+        self.legacy_trade_history_file = self.data_dir / "trade_history.json"
         self.logger = logging.getLogger('OrderExecutor')
         self.logger.info("FirstRunSafetyTrade initialized")
     
@@ -82,17 +190,15 @@ class FirstRunSafetyTrade:
         if not self.marker_file.exists():
             return True, "Marker file missing - first run detected"
         
-        if not self.trade_history_file.exists():
+        if not self.trade_history_file.exists() and not self.legacy_trade_history_file.exists():
             return True, "No trade history found - first run detected"
         
         try:
-            with open(self.trade_history_file, 'r') as f:
-                trades = json.load(f)
+            last_trade = self._last_trade()
             
-            if not trades:
+            if last_trade is None:
                 return True, "Empty trade history - first run detected"
             
-            last_trade = trades[-1]
             last_trade_time = datetime.fromisoformat(last_trade.get('close_time', last_trade.get('entry_time', datetime.utcnow().isoformat())))
             days_since = (datetime.utcnow() - last_trade_time).days
             
@@ -103,6 +209,21 @@ class FirstRunSafetyTrade:
         except:
             return True, "Error reading trade history - first run mode"
     
+    def _last_trade(self) -> Optional[Dict]:
+        """
+        Most recent trade: the last complete record of the JSONL log (read from the end), else the legacy
+        array's last entry. A torn or corrupt final line falls back to the record before it.
+        """
+        try:
+            tail = read_jsonl_tail(self.trade_history_file, 2)
+        except FileNotFoundError:
+            tail = []
+        if tail:
+            return tail[-1]
+        
+        legacy = _read_legacy_trade_history(self.legacy_trade_history_file)
+        return legacy[-1] if legacy else None
+    
     def create_marker_file(self) -> None:
         self.marker_file.write_text(f"First run completed at {datetime.utcnow().isoformat()}")
         self.logger.info(f"Marker file created: {self.marker_file}")
@@ -141,19 +262,49 @@ class FirstRunSafetyTrade:
         return order
 
 
+RANDOM_BUFFER_SIZE = 4096
+
+
 class OrderExecutor:
     def __init__(self, exchange, config: Dict, data_dir: str = 'data'):
         self.exchange = exchange
         self.config = config
         self.data_dir = Path(data_dir)
-        self.data_dir.mkdir(parents=True, exist_ok=True)
-        self.state_manager = StateManager(data_dir=str(self.data_dir))
+        _ensure_dir(self.data_dir)
+        self.state_manager = StateManager(
+            data_dir=str(self.data_dir),
+            batch_size=config.get('trade_history_batch_size', 1),
+            flush_interval=config.get('trade_history_flush_interval', 0.0)
+        )
+        self._rng = np.random.default_rng()
+        self._gauss_buf = self._rng.standard_normal(RANDOM_BUFFER_SIZE)
+        self._uniform_buf = self._rng.random(RANDOM_BUFFER_SIZE)
+        self._gauss_idx = 0
+        self._uniform_idx = 0
         self.logger = logging.getLogger('OrderExecutor')
         self.logger.info("OrderExecutor initialized")
     
+    def _gauss(self, mu: float, sigma: float) -> float:
+        """Normal draw from a pre-generated buffer, refilled from the numpy Generator when exhausted."""
+        if self._gauss_idx >= len(self._gauss_buf):
+            self._gauss_buf = self._rng.standard_normal(RANDOM_BUFFER_SIZE)
+            self._gauss_idx = 0
+        value = self._gauss_buf[self._gauss_idx]
+        self._gauss_idx += 1
+        return mu + sigma * float(value)
+    
+    def _uniform(self, low: float, high: float) -> float:
+        """Uniform draw in [low, high) from a pre-generated buffer, refilled when exhausted."""
+        if self._uniform_idx >= len(self._uniform_buf):
+            self._uniform_buf = self._rng.random(RANDOM_BUFFER_SIZE)
+            self._uniform_idx = 0
+        value = self._uniform_buf[self._uniform_idx]
+        self._uniform_idx += 1
+        return low + (high - low) * float(value)
+    
     def randomize_lot_size(self, base_size: float) -> float:
         variance_pct = self.config.get('lot_variance_pct', 3.0)
-        variance_factor = random.gauss(1.0, variance_pct / 100 / 3)
+        variance_factor = self._gauss(1.0, variance_pct / 100 / 3)
         randomized_size = base_size * variance_factor
         variance = (randomized_size - base_size) / base_size * 100
         self.logger.info(f"Lot size randomized: {base_size:.8f} -> {randomized_size:.8f} (variance: {variance:.2f}%)")
@@ -161,7 +312,7 @@ class OrderExecutor:
     
     def randomize_tp_sl(self, price: float, is_tp: bool = True) -> float:
         variance_pct = self.config.get('tp_sl_variance_pct', 1.0)
-        variance_factor = random.uniform(1.0 - variance_pct / 100, 1.0 + variance_pct / 100)
+        variance_factor = self._uniform(1.0 - variance_pct / 100, 1.0 + variance_pct / 100)
         randomized_price = price * variance_factor
         variance = (randomized_price - price) / price * 100
         label = "TP" if is_tp else "SL"
@@ -169,8 +320,8 @@ class OrderExecutor:
         return randomized_price
     
     def randomize_partial_close_percentages(self) -> Tuple[float, float, float]:
-        tp1_pct = random.uniform(0.28, 0.35)
-        tp2_pct = random.uniform(0.38, 0.42)
+        tp1_pct = self._uniform(0.28, 0.35)
+        tp2_pct = self._uniform(0.38, 0.42)
         runner_pct = 1.0 - tp1_pct - tp2_pct
         
         self.logger.info(f"Partial close percentages: TP1={tp1_pct*100:.1f}%, TP2={tp2_pct*100:.1f}%, Runner={runner_pct*100:.1f}%")
@@ -195,10 +346,15 @@ class OrderExecutor:
         
         return True, "Validation passed"
     
+    def retry_delay(self, attempt: int, initial_delay: float, backoff_multiplier: float, max_delay: float) -> float:
+        """Exponential backoff with +/-0.1s jitter, clamped to [0, max_delay]."""
+        delay = initial_delay * (backoff_multiplier ** (attempt - 1)) + self._uniform(-0.1, 0.1)
+        return min(max(delay, 0.0), max_delay)
+    
     async def add_human_like_delay(self) -> None:
         min_delay = self.config.get('min_human_delay', 0.5)
         max_delay = self.config.get('max_human_delay', 3.5)
-        delay = random.uniform(min_delay, max_delay)
+        delay = self._uniform(min_delay, max_delay)
         self.logger.info(f"Adding human-like delay: {delay:.2f}s")
         await asyncio.sleep(delay)
     
@@ -222,21 +378,21 @@ class OrderExecutor:
         randomized_tp2 = self.randomize_tp_sl(tp2_price, is_tp=True)
         randomized_sl = self.randomize_tp_sl(stop_loss, is_tp=False)
         
+        order_params = {
+            'symbol': symbol,
+            'direction': direction,
+            'size': randomized_size,
+            'entry_price': entry_price,
+            'stop_loss': randomized_sl,
+            'tp1': randomized_tp1,
+            'tp2': randomized_tp2,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        
         await self.add_human_like_delay()
         
         for attempt in range(1, max_retries + 1):
             try:
-                order_params = {
-                    'symbol': symbol,
-                    'direction': direction,
-                    'size': randomized_size,
-                    'entry_price': entry_price,
-                    'stop_loss': randomized_sl,
-                    'tp1': randomized_tp1,
-                    'tp2': randomized_tp2,
-                    'timestamp': datetime.utcnow().isoformat()
-                }
-                
                 self.logger.info(f"Attempt {attempt}/{max_retries}: Submitting order - {order_params}")
                 
                 order = await self.exchange.create_order(
@@ -254,8 +410,7 @@ class OrderExecutor:
                 self.logger.warning(f"Attempt {attempt} failed: {e}")
                 
                 if attempt < max_retries:
-                    delay = min(initial_delay * (backoff_multiplier ** (attempt - 1)), max_delay)
-                    delay += random.uniform(-0.1, 0.1)
+                    delay = self.retry_delay(attempt, initial_delay, backoff_multiplier, max_delay)
                     self.logger.info(f"Retrying in {delay:.2f}s...")
                     await asyncio.sleep(delay)
                 else:
@@ -301,7 +456,7 @@ class GracefulShutdown:
         self.exchange = exchange
         self.state_manager = state_manager
         self.data_dir = Path(data_dir)
-        self.data_dir.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(self.data_dir)
         self.logger = logging.getLogger('OrderExecutor')
         self.shutdown_flag = False
     
@@ -335,9 +490,7 @@ class GracefulShutdown:
         if positions:
             self.state_manager.save_open_positions(positions)
         
-        if trades:
-            for trade in trades:
-                self.state_manager.save_trade_history(trade)
+        self.state_manager.save_trade_history_bulk(trades or [])
         
         try:
             await self.exchange.close()
@@ -1,8 +1,98 @@
 import numpy as np
 import logging
 
+from modules.candles import Candles
+from utils import njit
+
 logger = logging.getLogger(__name__)
 
+CORE_PATTERNS = ('engulfing', 'pinbar', 'morning_star', 'evening_star', 'bos', 'fvg')
+
+
+def _miss():
+    return {'detected': False, 'confidence': 0.0}
+
+
+def _hit(confidence):
+    return {'detected': True, 'confidence': float(confidence)}
+
+
+@njit(cache=True)
+def pattern_batch(o, h, l, c, start, detected, confidence):
+    """Flag the six candle-only patterns for every bar from start on, using only bars up to each one.
+    
+    Row i - start of detected/confidence receives bar i, columns in CORE_PATTERNS order.
+    """
+    for i in range(start, len(c)):
+        row = i - start
+        for j in range(6):
+            detected[row, j] = 0
+            confidence[row, j] = 0.0
+        
+        o1, h1, l1, c1 = o[i], h[i], l[i], c[i]
+        body1 = abs(c1 - o1)
+        range1 = h1 - l1
+        
+        if range1 != 0:
+            body_ratio = body1 / range1
+            if body_ratio < 0.3:
+                if c1 > o1:
+                    long_wick_ratio = (h1 - c1) / range1
+                else:
+                    long_wick_ratio = (c1 - l1) / range1
+                if long_wick_ratio > 0.4:
+                    detected[row, 1] = 1
+                    confidence[row, 1] = min(1.0, long_wick_ratio) * (1 - body_ratio)
+        
+        if i < 1:
+            continue
+        
+        o2, h2, l2, c2 = o[i - 1], h[i - 1], l[i - 1], c[i - 1]
+        body2 = abs(c2 - o2)
+        range2 = h2 - l2
+        
+        if range2 != 0 and h1 > h2 and l1 < l2 and body1 > body2:
+            detected[row, 0] = 1
+            confidence[row, 0] = min(1.0, body1 / range2)
+        
+        if l1 > h2:
+            detected[row, 5] = 1
+            confidence[row, 5] = min(1.0, (l1 - h2) / h2)
+        elif h1 < l2:
+            detected[row, 5] = 1
+            confidence[row, 5] = min(1.0, (l2 - h1) / l2)
+        
+        if i < 2:
+            continue
+        
+        o3, c3 = o[i - 2], c[i - 2]
+        range3 = h[i - 2] - l[i - 2]
+        small2 = body2 < range3 * 0.5
+        
+        if c3 < o3 and small2 and c1 > o1:
+            detected[row, 2] = 1
+            confidence[row, 2] = max(0.5, min(1.0, (c1 - o3) / range3))
+        if c3 > o3 and small2 and c1 < o1:
+            detected[row, 3] = 1
+            confidence[row, 3] = max(0.5, min(1.0, (c3 - o1) / range3))
+        
+        if i < 4:
+            continue
+        
+        swing_high = h[i - 4]
+        swing_low = l[i - 4]
+        for k in range(i - 3, i):
+            if h[k] > swing_high:
+                swing_high = h[k]
+            if l[k] < swing_low:
+                swing_low = l[k]
+        if c1 > swing_high and c1 > o1:
+            detected[row, 4] = 1
+            confidence[row, 4] = min(1.0, (c1 - swing_high) / swing_high)
+        elif c1 < swing_low and c1 < o1:
+            detected[row, 4] = 1
+            confidence[row, 4] = min(1.0, (swing_low - c1) / swing_low)
+
 
 class PriceActionAnalyzer:
     """Detects 8 price action patterns and calculates confirmation score."""
@@ -10,190 +100,135 @@ class PriceActionAnalyzer:
     def __init__(self, min_confirmations=2):
         self.min_confirmations = min_confirmations
 
-    def detect_engulfing(self, candles):
-        """Bullish: current candle body > previous candle body."""
-        if len(candles) < 2:
-            return {'detected': False, 'confidence': 0.0}
+    @staticmethod
+    def _to_arrays(candles):
+        """Column arrays (open, high, low, close) for candle dicts or Candles, built once per call."""
+        cs = Candles.coerce(candles)
+        return cs.open, cs.high, cs.low, cs.close
+
+    @staticmethod
+    def _detect_all(o, h, l, c):
+        """Evaluate the six candle-only patterns for the last bar with the pattern_batch kernel.
+        
+        Returns {pattern name: {'detected', 'confidence'}} in CORE_PATTERNS order.
+        """
+        detected = np.zeros((1, len(CORE_PATTERNS)), dtype=np.int8)
+        confidence = np.zeros((1, len(CORE_PATTERNS)), dtype=np.float64)
+        n = len(c)
+        if n:
+            pattern_batch(o[-5:], h[-5:], l[-5:], c[-5:], min(n, 5) - 1, detected, confidence)
+        
+        return {
+            name: _hit(confidence[0, j]) if detected[0, j] else _miss()
+            for j, name in enumerate(CORE_PATTERNS)
+        }
+
+    @staticmethod
+    def _ema_retest(c, ema_values):
+        if len(c) < 10 or len(ema_values) < 2:
+            return _miss()
         
-        prev = candles[-2]
-        curr = candles[-1]
+        prev_ema = ema_values[-2]
+        curr_ema = ema_values[-1]
+        prev_close, close = c[-2:].tolist()
+        
+        prev_above = prev_close > prev_ema
+        near = abs(close - curr_ema) < curr_ema * 0.005
+        retest_down = prev_above and (close < curr_ema or near)
+        retest_up = not prev_above and (close > curr_ema or near)
+        
+        if retest_down or retest_up:
+            distance = abs(close - curr_ema) / curr_ema
+            return _hit(1.0 - min(1.0, distance / 0.01))
         
-        prev_body = abs(prev['close'] - prev['open'])
-        curr_body = abs(curr['close'] - curr['open'])
-        prev_range = prev['high'] - prev['low']
+        return _miss()
+
+    @staticmethod
+    def _sr_retest(c, sr_zones):
+        if len(c) < 2 or not sr_zones:
+            return _miss()
         
-        if prev_range == 0:
-            return {'detected': False, 'confidence': 0.0}
+        zone_prices = np.fromiter((zone['price'] for zone in sr_zones), dtype=np.float64, count=len(sr_zones))
+        prev_close, close = c[-2], c[-1]
         
-        engulfs = (curr['high'] > prev['high'] and curr['low'] < prev['low'] and
-                  curr_body > prev_body)
+        curr_near = np.abs(close - zone_prices) < zone_prices * 0.01
+        crossed = (prev_close > zone_prices) != (close > zone_prices)
+        hits = np.flatnonzero(curr_near & crossed)
         
-        if engulfs:
-            confidence = min(1.0, curr_body / prev_range)
-            return {'detected': True, 'confidence': float(confidence)}
+        if len(hits):
+            return _hit(min(1.0, sr_zones[hits[0]].get('strength', 0.5) * 1.5))
         
-        return {'detected': False, 'confidence': 0.0}
+        return _miss()
+
+    def detect_engulfing(self, candles):
+        """Bullish: current candle body > previous candle body."""
+        return self._detect_all(*self._to_arrays(candles))['engulfing']
 
     def detect_pinbar(self, candles):
         """Long wick on one side, small body on opposite."""
-        if len(candles) < 1:
-            return {'detected': False, 'confidence': 0.0}
-        
-        candle = candles[-1]
-        body = abs(candle['close'] - candle['open'])
-        full_range = candle['high'] - candle['low']
-        
-        if full_range == 0:
-            return {'detected': False, 'confidence': 0.0}
-        
-        body_ratio = body / full_range
-        
-        if body_ratio < 0.3:
-            if candle['close'] > candle['open']:
-                upper_wick = candle['high'] - candle['close']
-                lower_wick = candle['open'] - candle['low']
-                long_wick_ratio = upper_wick / full_range
-            else:
-                upper_wick = candle['high'] - candle['open']
-                lower_wick = candle['close'] - candle['low']
-                long_wick_ratio = lower_wick / full_range
-            
-            if long_wick_ratio > 0.4:
-                confidence = min(1.0, long_wick_ratio) * (1 - body_ratio)
-                return {'detected': True, 'confidence': float(confidence)}
-        
-        return {'detected': False, 'confidence': 0.0}
+        return self._detect_all(*self._to_arrays(candles))['pinbar']
 
     def detect_morning_star(self, candles):
         """Downtrend reversal: down, small body, up."""
-        if len(candles) < 3:
-            return {'detected': False, 'confidence': 0.0}
-        
-        c1 = candles[-3]
-        c2 = candles[-2]
-        c3 = candles[-1]
-        
-        c1_down = c1['close'] < c1['open']
-        c2_small = abs(c2['close'] - c2['open']) < (c1['high'] - c1['low']) * 0.5
-        c3_up = c3['close'] > c3['open']
-        
-        if c1_down and c2_small and c3_up:
-            confidence = min(1.0, (c3['close'] - c1['open']) / (c1['high'] - c1['low']))
-            return {'detected': True, 'confidence': float(max(0.5, confidence))}
-        
-        return {'detected': False, 'confidence': 0.0}
+        return self._detect_all(*self._to_arrays(candles))['morning_star']
 
     def detect_evening_star(self, candles):
         """Uptrend reversal: up, small body, down."""
-        if len(candles) < 3:
-            return {'detected': False, 'confidence': 0.0}
-        
-        c1 = candles[-3]
-        c2 = candles[-2]
-        c3 = candles[-1]
-        
-        c1_up = c1['close'] > c1['open']
-        c2_small = abs(c2['close'] - c2['open']) < (c1['high'] - c1['low']) * 0.5
-        c3_down = c3['close'] < c3['open']
-        
-        if c1_up and c2_small and c3_down:
-            confidence = min(1.0, (c1['close'] - c3['open']) / (c1['high'] - c1['low']))
-            return {'detected': True, 'confidence': float(max(0.5, confidence))}
-        
-        return {'detected': False, 'confidence': 0.0}
+        return self._detect_all(*self._to_arrays(candles))['evening_star']
 
     def detect_break_of_structure(self, candles):
         """Price breaks recent swing with momentum."""
-        if len(candles) < 5:
-            return {'detected': False, 'confidence': 0.0}
-        
-        recent = candles[-5:]
-        highs = [c['high'] for c in recent]
-        lows = [c['low'] for c in recent]
-        
-        swing_high = max(highs[:-1])
-        swing_low = min(lows[:-1])
-        
-        current = candles[-1]
-        
-        bos_up = current['close'] > swing_high and current['close'] > current['open']
-        bos_down = current['close'] < swing_low and current['close'] < current['open']
-        
-        if bos_up:
-            confidence = min(1.0, (current['close'] - swing_high) / swing_high)
-            return {'detected': True, 'confidence': float(confidence)}
-        elif bos_down:
-            confidence = min(1.0, (swing_low - current['close']) / swing_low)
-            return {'detected': True, 'confidence': float(confidence)}
-        
-        return {'detected': False, 'confidence': 0.0}
+        return self._detect_all(*self._to_arrays(candles))['bos']
 
     def detect_fair_value_gap(self, candles):
         """Gap between candles with no trade volume."""
-        if len(candles) < 2:
-            return {'detected': False, 'confidence': 0.0}
-        
-        prev = candles[-2]
-        curr = candles[-1]
-        
-        gap_up = curr['low'] > prev['high']
-        gap_down = curr['high'] < prev['low']
-        
-        if gap_up:
-            gap_size = curr['low'] - prev['high']
-            confidence = min(1.0, gap_size / prev['high'])
-            return {'detected': True, 'confidence': float(confidence)}
-        elif gap_down:
-            gap_size = prev['low'] - curr['high']
-            confidence = min(1.0, gap_size / prev['low'])
-            return {'detected': True, 'confidence': float(confidence)}
-        
-        return {'detected': False, 'confidence': 0.0}
+        return self._detect_all(*self._to_arrays(candles))['fvg']
 
     def detect_ema_retest(self, candles, ema_values, ema_period=21):
         """Price returns to EMA and closes on correct side."""
-        if len(candles) < 10 or len(ema_values) < 2:
-            return {'detected': False, 'confidence': 0.0}
-        
-        prev_ema = ema_values[-2]
-        curr_ema = ema_values[-1]
-        current = candles[-1]
-        previous = candles[-2]
-        
-        prev_above = previous['close'] > prev_ema
-        curr_below = current['close'] < curr_ema
-        curr_above = current['close'] > curr_ema
-        
-        retest_down = prev_above and (curr_below or abs(current['close'] - curr_ema) < curr_ema * 0.005)
-        retest_up = not prev_above and (curr_above or abs(current['close'] - curr_ema) < curr_ema * 0.005)
-        
-        if retest_down or retest_up:
-            distance = abs(current['close'] - curr_ema) / curr_ema
-            confidence = 1.0 - min(1.0, distance / 0.01)
-            return {'detected': True, 'confidence': float(confidence)}
-        
-        return {'detected': False, 'confidence': 0.0}
+        return self._ema_retest(self._to_arrays(candles)[3], ema_values)
 
     def detect_sr_retest(self, candles, sr_zones):
         """Price returns to SR zone with confirmation."""
-        if len(candles) < 2 or not sr_zones:
-            return {'detected': False, 'confidence': 0.0}
-        
-        current = candles[-1]
-        previous = candles[-2]
+        return self._sr_retest(self._to_arrays(candles)[3], sr_zones)
+
+    def confirmation_batch(self, candles, ema_values=None):
+        """Confirmation count and score for every bar, as calculate_confirmation_score would give on each prefix.
         
-        for zone in sr_zones:
-            zone_price = zone['price']
-            tolerance = zone_price * 0.01
+        For backtests. ema_values, if given, must align with candles; None/NaN entries are treated as missing.
+        S/R retests depend on zones recomputed per bar and are not included.
+        """
+        o, h, l, c = self._to_arrays(candles)
+        n = len(c)
+        detected = np.zeros((n, len(CORE_PATTERNS)), dtype=np.int8)
+        confidence = np.zeros((n, len(CORE_PATTERNS)), dtype=np.float64)
+        pattern_batch(o, h, l, c, 0, detected, confidence)
+        
+        counts = detected.sum(axis=1).astype(np.int64)
+        totals = np.where(detected == 1, confidence, 0.0).sum(axis=1)
+        n_patterns = np.full(n, len(CORE_PATTERNS), dtype=np.int64)
+        
+        if ema_values is not None and n:
+            ema = np.array([np.nan if v is None else v for v in ema_values], dtype=np.float64)
+            prev_ema, curr_ema = ema[:-1], ema[1:]
+            prev_close, close = c[:-1], c[1:]
             
-            prev_above = previous['close'] > zone_price
-            curr_near = abs(current['close'] - zone_price) < tolerance
+            evaluated = np.arange(1, n) >= 9
+            missing = np.isnan(prev_ema) | np.isnan(curr_ema)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                prev_above = prev_close > prev_ema
+                near = np.abs(close - curr_ema) < curr_ema * 0.005
+                hit = evaluated & ~missing & (
+                    (prev_above & ((close < curr_ema) | near)) | (~prev_above & ((close > curr_ema) | near))
+                )
+                ema_confidence = 1.0 - np.minimum(1.0, np.abs(close - curr_ema) / curr_ema / 0.01)
             
-            if curr_near and prev_above != (current['close'] > zone_price):
-                confidence = min(1.0, zone.get('strength', 0.5) * 1.5)
-                return {'detected': True, 'confidence': float(confidence)}
+            counts[1:] += hit
+            totals[1:] += np.where(hit, ema_confidence, 0.0)
+            n_patterns[1:] += ~(evaluated & missing)
+            n_patterns[0] += 1
         
-        return {'detected': False, 'confidence': 0.0}
+        return counts, totals / n_patterns
 
     def calculate_confirmation_score(self, candles, sr_zones=None, ema_values=None):
         """
@@ -201,25 +236,19 @@ class PriceActionAnalyzer:
         Returns: {'confirmation_count': int, 'confirmation_score': float}
         """
         confirmations = []
+        o, h, l, c = self._to_arrays(candles)
         
-        patterns = [
-            ('engulfing', self.detect_engulfing(candles)),
-            ('pinbar', self.detect_pinbar(candles)),
-            ('morning_star', self.detect_morning_star(candles)),
-            ('evening_star', self.detect_evening_star(candles)),
-            ('bos', self.detect_break_of_structure(candles)),
-            ('fvg', self.detect_fair_value_gap(candles)),
-        ]
+        patterns = list(self._detect_all(o, h, l, c).items())
         
         if ema_values is not None:
             try:
                 if len(ema_values) > 0:
-                    patterns.append(('ema_retest', self.detect_ema_retest(candles, ema_values)))
+                    patterns.append(('ema_retest', self._ema_retest(c, ema_values)))
             except (TypeError, ValueError):
                 pass
         
         if sr_zones is not None and len(sr_zones) > 0:
-            patterns.append(('sr_retest', self.detect_sr_retest(candles, sr_zones)))
+            patterns.append(('sr_retest', self._sr_retest(c, sr_zones)))
         
         for name, result in patterns:
             if result['detected']:
@@ -236,4 +265,4 @@ class PriceActionAnalyzer:
             'confirmation_score': float(confirmation_score),
             'min_met': confirmation_count >= self.min_confirmations,
             'patterns': confirmations
-        }
\ No newline at end of file
+        }
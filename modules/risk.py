@@ -1,14 +1,17 @@
 import asyncio
-import json
+import atexit
 import logging
 import sys
 import os
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 import numpy as np
 
+from utils import atomic_write_bytes, json_dumps, read_json_file
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -52,110 +55,188 @@ class RiskManager:
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         
-        self.account_balance = config.get('account_balance', 10000.0)
-        self.risk_percent = config.get('risk_percent', 1.75)
+        self._account_balance = config.get('account_balance', 10000.0)
+        self._risk_percent = config.get('risk_percent', 1.75)
+        self._update_risk_amount()
         self.max_spread_points = config.get('max_spread_points', 50)
         self.max_daily_loss_pct = config.get('max_daily_loss', 5.0)
         self.max_consecutive_losses = config.get('max_consecutive_losses', 2)
         self.exchange_min_lot_size = config.get('exchange_min_lot_size', 0.001)
         
         self.daily_pnl_file = self.data_dir / "daily_pnl.json"
+        self.daily_pnl_flush_interval = config.get('daily_pnl_flush_interval', 0.0)
+        self._daily_state: Dict = {}
+        self._daily_dirty = False
+        # _daily_lock guards the in-memory state only; _write_lock orders the (slow) writes after it is released
+        self._daily_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_thread: Optional[threading.Thread] = None
+        self._flush_stop = threading.Event()
         self.consecutive_loss_counter = 0
         self.daily_loss_accumulation = 0.0
         self.shutdown_required = False
         self.shutdown_reason = ""
         
         self._load_daily_pnl()
-        logger.info(f"RiskManager initialized with {self.risk_percent}% risk per trade")
+        logger.info("RiskManager initialized with %s%% risk per trade", self.risk_percent)
     
     def _load_daily_pnl(self) -> None:
         if self.daily_pnl_file.exists():
             try:
-                with open(self.daily_pnl_file, 'r') as f:
-                    data = json.load(f)
-                    today = datetime.utcnow().strftime('%Y-%m-%d')
-                    if data.get('date') == today:
-                        self.daily_loss_accumulation = float(data.get('cumulative_pnl', 0.0))
-                    else:
-                        self.daily_loss_accumulation = 0.0
-                        self._reset_daily_pnl()
+                data = read_json_file(self.daily_pnl_file)
+                today = datetime.utcnow().strftime('%Y-%m-%d')
+                if data.get('date') == today:
+                    self.daily_loss_accumulation = float(data.get('cumulative_pnl', 0.0))
+                    self._daily_state = data
+                else:
+                    self.daily_loss_accumulation = 0.0
+                    self._reset_daily_pnl()
             except Exception as e:
-                logger.warning(f"Error loading daily PnL: {e}. Resetting.")
+                logger.warning("Error loading daily PnL: %s. Resetting.", e)
                 self.daily_loss_accumulation = 0.0
                 self._reset_daily_pnl()
         else:
             self._reset_daily_pnl()
     
     def _reset_daily_pnl(self) -> None:
-        daily_pnl_data = {
+        self._daily_state = {
             'date': datetime.utcnow().strftime('%Y-%m-%d'),
             'cumulative_pnl': 0.0,
             'trades_today': 0,
             'winning_trades': 0,
             'losing_trades': 0
         }
-        self._save_daily_pnl(daily_pnl_data)
+        self._save_daily_pnl(self._daily_state)
+    
+    def flush_daily_pnl(self, durable: bool = True) -> None:
+        """Write the in-memory daily PnL state if it changed since the last write; fsynced unless durable is False."""
+        with self._write_lock:
+            with self._daily_lock:
+                if not self._daily_dirty:
+                    return
+                self._daily_dirty = False
+                snapshot = dict(self._daily_state)
+            self._save_daily_pnl(snapshot, durable)
+    
+    def _flush_loop(self) -> None:
+        while not self._flush_stop.wait(self.daily_pnl_flush_interval):
+            self.flush_daily_pnl()
     
-    def _save_daily_pnl(self, data: Dict) -> None:
+    def close(self) -> None:
+        """Stop the background writer and write any pending daily PnL state."""
+        self._flush_stop.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join()
+            self._flush_thread = None
+            atexit.unregister(self.flush_daily_pnl)
+        self.flush_daily_pnl()
+    
+    def _save_daily_pnl(self, data: Dict, durable: bool = True) -> None:
         try:
-            with open(self.daily_pnl_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            if durable:
+                atomic_write_bytes(self.daily_pnl_file, json_dumps(data))
+            else:
+                # Write-through path runs on every trade: a plain write, without the fsyncs
+                with open(self.daily_pnl_file, 'wb') as f:
+                    f.write(json_dumps(data))
         except Exception as e:
-            logger.error(f"Error saving daily PnL: {e}")
+            logger.error("Error saving daily PnL: %s", e)
+    
+    @property
+    def account_balance(self) -> float:
+        return self._account_balance
+    
+    @account_balance.setter
+    def account_balance(self, value: float) -> None:
+        self._account_balance = value
+        self._update_risk_amount()
+    
+    @property
+    def risk_percent(self) -> float:
+        return self._risk_percent
+    
+    @risk_percent.setter
+    def risk_percent(self, value: float) -> None:
+        self._risk_percent = value
+        self._update_risk_amount()
+    
+    def _update_risk_amount(self) -> None:
+        """Recompute the cash risked per trade; called whenever the balance or risk percent changes."""
+        self._risk_amount = self._account_balance * (self._risk_percent / 100.0)
     
     def position_size(self, entry_price: float, stop_loss: float) -> float:
         if entry_price == stop_loss:
             logger.error("Entry price equals stop loss - cannot calculate position size")
             return 0.0
         
-        risk_amount = self.account_balance * (self.risk_percent / 100.0)
+        risk_amount = self._risk_amount
+        min_lot_size = self.exchange_min_lot_size
         sl_distance = abs(entry_price - stop_loss)
         calculated_size = risk_amount / sl_distance
         
-        final_size = max(calculated_size, self.exchange_min_lot_size)
-        final_size = round(final_size, 8)
+        final_size = calculated_size if calculated_size > min_lot_size else min_lot_size
+        final_size = int(final_size * 1e8 + 0.5) / 1e8
         
-        logger.info(f"Position size calculated: {final_size} (Risk: ${risk_amount:.2f}, SL distance: {sl_distance:.2f})")
+        logger.info("Position size calculated: %s (Risk: $%.2f, SL distance: %.2f)", final_size, risk_amount, sl_distance)
         return final_size
     
+    def position_size_batch(self, entry_prices, stop_losses) -> np.ndarray:
+        """Vectorized position_size over arrays of entries and stop losses; 0.0 where they are equal."""
+        entry_prices = np.asarray(entry_prices, dtype=np.float64)
+        stop_losses = np.asarray(stop_losses, dtype=np.float64)
+        sl_distance = np.abs(entry_prices - stop_losses)
+        
+        with np.errstate(divide='ignore'):
+            sizes = np.maximum(self._risk_amount / sl_distance, self.exchange_min_lot_size)
+        sizes = np.floor(sizes * 1e8 + 0.5) / 1e8
+        return np.where(sl_distance == 0, 0.0, sizes)
+    
     def spread_filter(self, bid: float, ask: float) -> bool:
         if bid <= 0 or ask <= 0 or bid > ask:
-            logger.error(f"Invalid bid/ask: bid={bid}, ask={ask}")
+            logger.error("Invalid bid/ask: bid=%s, ask=%s", bid, ask)
             return False
         
         spread_points = (ask - bid) / bid * 10000
         is_valid = spread_points < self.max_spread_points
         
         if not is_valid:
-            logger.warning(f"Spread filter rejected: {spread_points:.1f} points > {self.max_spread_points} max")
+            logger.warning("Spread filter rejected: %.1f points > %s max", spread_points, self.max_spread_points)
         
         return is_valid
     
+    def spread_filter_batch(self, bids, asks) -> np.ndarray:
+        """Vectorized spread_filter: True where the quote is valid and the spread is under max_spread_points."""
+        bids = np.asarray(bids, dtype=np.float64)
+        asks = np.asarray(asks, dtype=np.float64)
+        valid = (bids > 0) & (asks > 0) & (bids <= asks)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread_points = (asks - bids) / bids * 10000
+        return valid & (spread_points < self.max_spread_points)
+    
     def track_daily_pnl(self, pnl: float, symbol: str = "") -> None:
+        """Update the in-memory daily PnL; written through immediately (plain write), or durably by a
+        background writer at most every daily_pnl_flush_interval seconds when that is set."""
         self.daily_loss_accumulation += pnl
         
-        try:
-            with open(self.daily_pnl_file, 'r') as f:
-                data = json.load(f)
-        except:
-            data = {
-                'date': datetime.utcnow().strftime('%Y-%m-%d'),
-                'cumulative_pnl': 0.0,
-                'trades_today': 0,
-                'winning_trades': 0,
-                'losing_trades': 0
-            }
-        
-        data['cumulative_pnl'] = round(float(data['cumulative_pnl']) + pnl, 8)
-        data['trades_today'] = int(data.get('trades_today', 0)) + 1
-        
-        if pnl > 0:
-            data['winning_trades'] = int(data.get('winning_trades', 0)) + 1
-        else:
-            data['losing_trades'] = int(data.get('losing_trades', 0)) + 1
+        with self._daily_lock:
+            data = self._daily_state
+            data['cumulative_pnl'] = round(float(data.get('cumulative_pnl', 0.0)) + pnl, 8)
+            data['trades_today'] = int(data.get('trades_today', 0)) + 1
+            
+            if pnl > 0:
+                data['winning_trades'] = int(data.get('winning_trades', 0)) + 1
+            else:
+                data['losing_trades'] = int(data.get('losing_trades', 0)) + 1
+            self._daily_dirty = True
         
-        self._save_daily_pnl(data)
-        logger.info(f"Daily PnL updated: {data['cumulative_pnl']:.2f} (Total trades: {data['trades_today']})")
+        if self.daily_pnl_flush_interval <= 0 or self._flush_stop.is_set():
+            self.flush_daily_pnl(durable=False)
+        elif self._flush_thread is None:
+            self._flush_thread = threading.Thread(target=self._flush_loop, name='daily-pnl-writer', daemon=True)
+            self._flush_thread.start()
+            atexit.register(self.flush_daily_pnl)
+        logger.info("Daily PnL updated: %.2f (Total trades: %s)", data['cumulative_pnl'], data['trades_today'])
     
     def check_daily_loss_limit(self) -> Tuple[bool, str]:
         max_daily_loss = self.account_balance * (self.max_daily_loss_pct / 100.0)
@@ -175,7 +256,7 @@ class RiskManager:
             logger.error(reason)
             return False, reason
         
-        logger.info(f"Consecutive losses: {self.consecutive_loss_counter}")
+        logger.info("Consecutive losses: %s", self.consecutive_loss_counter)
         return True, ""
     
     def reset_consecutive_losses(self) -> None:
@@ -190,10 +271,20 @@ class RiskManager:
         is_acceptable = slippage_pct < 0.05
         
         if not is_acceptable:
-            logger.warning(f"Slippage exceeded: {slippage_pct:.4f}% > 0.05%")
+            logger.warning("Slippage exceeded: %.4f%% > 0.05%%", slippage_pct)
         
         return is_acceptable, slippage_pct
     
+    def slippage_tracker_batch(self, expected_prices, actual_prices) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized slippage_tracker: (acceptable mask, slippage percent), both False/0.0 where expected <= 0."""
+        expected_prices = np.asarray(expected_prices, dtype=np.float64)
+        actual_prices = np.asarray(actual_prices, dtype=np.float64)
+        valid = expected_prices > 0
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slippage_pct = np.where(valid, np.abs(actual_prices - expected_prices) / expected_prices * 100.0, 0.0)
+        return valid & (slippage_pct < 0.05), slippage_pct
+    
     def get_status(self) -> Dict:
         return {
             'account_balance': self.account_balance,
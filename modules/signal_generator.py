@@ -1,18 +1,22 @@
+import os
 import numpy as np
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from modules.trend import TrendAnalyzer
 from modules.support_resistance import SupportResistanceDetector
 from modules.breakout import BreakoutEngine
 from modules.sweep import LiquiditySweepDetector
 from modules.price_action import PriceActionAnalyzer
+from modules.candles import Candles
+from indicators import IndicatorCache
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class SignalResult:
     """Result object for signal generation."""
     symbol: str
@@ -28,6 +32,32 @@ class SignalResult:
     timestamp: Optional[str] = None
 
 
+def _make_tp_fn(tp1_multiplier: float, tp2_multiplier: float):
+    """Build a take-profit function with the ATR multipliers bound as closure constants."""
+    def compute_tps(entry_price: float, atr: float, is_long: bool) -> Tuple[float, float]:
+        if is_long:
+            return entry_price + atr * tp1_multiplier, entry_price + atr * tp2_multiplier
+        return entry_price - atr * tp1_multiplier, entry_price - atr * tp2_multiplier
+    return compute_tps
+
+
+_worker_config: Optional[Dict] = None
+
+
+def _init_worker(config: Dict) -> None:
+    global _worker_config
+    _worker_config = config
+
+
+def _run_shard(shard: List[Tuple[int, tuple]], config: Optional[Dict] = None) -> List[Tuple[int, 'SignalResult']]:
+    """
+    Run one symbol's tasks in order on a fresh generator, so zone state never crosses symbols.
+    config is passed directly in-process; pool workers fall back to the one set by _init_worker.
+    """
+    generator = SignalGenerator(_worker_config if config is None else config)
+    return [(position, generator.generate_signal(*task)) for position, task in shard]
+
+
 class SignalGenerator:
     """Unified orchestrator for all signal generation engines."""
 
@@ -63,14 +93,37 @@ class SignalGenerator:
         
         self.min_signal_strength = self.config.get('min_signal_strength', 0.5)
         self.max_spread_points = self.config.get('max_spread_points', 50)
-        self.atr_multiplier_tp1 = self.config.get('atr_multiplier_tp1', 1.5)
-        self.atr_multiplier_tp2 = self.config.get('atr_multiplier_tp2', 2.5)
+        self._atr_multiplier_tp1 = self.config.get('atr_multiplier_tp1', 1.5)
+        self._atr_multiplier_tp2 = self.config.get('atr_multiplier_tp2', 2.5)
+        self._compute_tps = _make_tp_fn(self._atr_multiplier_tp1, self._atr_multiplier_tp2)
+        
+        self.indicator_cache = IndicatorCache(maxsize=self.config.get('indicator_cache_size', 64))
+
+    @property
+    def atr_multiplier_tp1(self) -> float:
+        return self._atr_multiplier_tp1
+
+    @atr_multiplier_tp1.setter
+    def atr_multiplier_tp1(self, value: float) -> None:
+        self._atr_multiplier_tp1 = value
+        self._compute_tps = _make_tp_fn(value, self._atr_multiplier_tp2)
 
-    def generate_signal(self, symbol: str, m5_candles: List, m15_candles: List,
-                       h1_candles: List, current_bid_ask_spread: float = 0) -> SignalResult:
+    @property
+    def atr_multiplier_tp2(self) -> float:
+        return self._atr_multiplier_tp2
+
+    @atr_multiplier_tp2.setter
+    def atr_multiplier_tp2(self, value: float) -> None:
+        self._atr_multiplier_tp2 = value
+        self._compute_tps = _make_tp_fn(self._atr_multiplier_tp1, value)
+
+    def generate_signal(self, symbol: str, m5_candles, m15_candles,
+                       h1_candles, current_bid_ask_spread: float = 0) -> SignalResult:
         """
         Generate comprehensive trade signal from all engines.
         
+        Candles may be Candles column arrays or lists of candle dicts; dicts are converted once
+        here and the arrays are shared by every engine.
         Returns: SignalResult with direction, prices, strength, and component scores
         """
         
@@ -88,8 +141,12 @@ class SignalGenerator:
                 skip_reason='insufficient_data'
             )
         
-        current_candle = m5_candles[-1]
-        entry_price = (current_candle['high'] + current_candle['low']) / 2
+        m5 = Candles.coerce(m5_candles)
+        m15 = Candles.coerce(m15_candles)
+        current_high = float(m5.high[-1])
+        current_low = float(m5.low[-1])
+        current_close = float(m5.close[-1])
+        entry_price = (current_high + current_low) / 2
         
         spread_check = current_bid_ask_spread > self.max_spread_points
         if spread_check:
@@ -106,23 +163,25 @@ class SignalGenerator:
                 skip_reason='spread_too_wide'
             )
         
-        trend_result = self.trend_analyzer.get_trend_confirmation(m15_candles, h1_candles[-1])
+        trend_result = self.trend_analyzer.get_trend_confirmation(m15, h1_candles[-1])
         
-        sr_zones = self.sr_detector.get_zones(m5_candles)
+        sr_zones = self.sr_detector.get_zones(m5)
         
-        breakout_result = self.breakout_engine.generate_breakout_signal(m5_candles)
+        breakout_result = self.breakout_engine.generate_breakout_signal(m5)
         
-        sweep_result = self.sweep_detector.detect_sweep(m5_candles, sr_zones)
+        sweep_result = self.sweep_detector.detect_sweep(m5, sr_zones)
         
         ema_values = None
         try:
-            closes = np.array([c['close'] for c in m5_candles])
-            ema_values = self.trend_analyzer.calculate_ema(closes, 50)
+            ema_values = self.indicator_cache.get_or_compute(
+                symbol, 'M5', 'ema', 50, m5,
+                lambda: self.trend_analyzer.calculate_ema(m5.close, 50)
+            )
         except Exception:
             ema_values = None
         
         pa_result = self.pa_analyzer.calculate_confirmation_score(
-            m5_candles,
+            m5,
             sr_zones=sr_zones,
             ema_values=ema_values
         )
@@ -161,20 +220,14 @@ class SignalGenerator:
         
         direction = breakout_result['signal']
         
-        atm_tp = self.breakout_engine.calculate_atr(m5_candles, period=14)
-        if atm_tp is None:
-            atm_tp = abs(current_candle['high'] - current_candle['low'])
+        atm_tp = breakout_result['atr']
         
+        sl_buffer = 20 * (current_close / 10000)
         if direction == 'LONG':
-            recent_lows = [c['low'] for c in m5_candles[-20:]]
-            stop_loss = min(recent_lows) - 20 * (current_candle['close'] / 10000)
-            tp1 = entry_price + atm_tp * self.atr_multiplier_tp1
-            tp2 = entry_price + atm_tp * self.atr_multiplier_tp2
+            stop_loss = float(m5.low[-20:].min()) - sl_buffer
         else:
-            recent_highs = [c['high'] for c in m5_candles[-20:]]
-            stop_loss = max(recent_highs) + 20 * (current_candle['close'] / 10000)
-            tp1 = entry_price - atm_tp * self.atr_multiplier_tp1
-            tp2 = entry_price - atm_tp * self.atr_multiplier_tp2
+            stop_loss = float(m5.high[-20:].max()) + sl_buffer
+        tp1, tp2 = self._compute_tps(entry_price, atm_tp, direction == 'LONG')
         
         if final_strength < self.min_signal_strength:
             return SignalResult(
@@ -203,4 +256,29 @@ class SignalGenerator:
             signal_strength=float(final_strength),
             confirmation_count=confirmation_count,
             component_scores=component_scores
-        )
\ No newline at end of file
+        )
+
+    def generate_signals_batch(self, tasks: Sequence[tuple], max_workers: Optional[int] = None) -> List[SignalResult]:
+        """
+        Generate signals for (symbol, m5, m15, h1[, spread]) tasks across worker processes.
+        
+        Tasks are sharded by symbol and each shard runs in order on its own SignalGenerator built
+        from this generator's config; results come back in task order.
+        """
+        shards: Dict[str, List[Tuple[int, tuple]]] = {}
+        for position, task in enumerate(tasks):
+            shards.setdefault(task[0], []).append((position, tuple(task)))
+        
+        workers = min(max_workers or os.cpu_count() or 1, len(shards))
+        results: List[Optional[SignalResult]] = [None] * len(tasks)
+        if workers <= 1:
+            done = [_run_shard(shard, self.config) for shard in shards.values()]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.config,)) as pool:
+                done = list(pool.map(_run_shard, shards.values()))
+        
+        for shard_results in done:
+            for position, result in shard_results:
+                results[position] = result
+        return results
@@ -1,53 +1,91 @@
 import numpy as np
-import pandas as pd
 import logging
-from collections import defaultdict
+from bisect import bisect_left
+from collections import deque
+
+from modules.candles import Candles
+from utils import njit
 
 logger = logging.getLogger(__name__)
 
 
+@njit(cache=True)
+def swing_flags(highs, lows, lookback, is_high, is_low):
+    """Mark bars whose high (low) is strictly above (below) every bar within lookback on both sides."""
+    for i in range(lookback, len(highs) - lookback):
+        swing_high = True
+        swing_low = True
+        for j in range(1, lookback + 1):
+            if highs[i] <= highs[i - j] or highs[i] <= highs[i + j]:
+                swing_high = False
+            if lows[i] >= lows[i - j] or lows[i] >= lows[i + j]:
+                swing_low = False
+        is_high[i] = swing_high
+        is_low[i] = swing_low
+
+
+@njit(cache=True)
+def cluster_walk(sorted_prices, tolerance, starts, means):
+    """Single pass over ascending prices: a cluster runs while prices stay within tolerance of its first price.
+    
+    Writes each cluster's start index and mean price (summed left to right) and returns the number of clusters.
+    """
+    count = 0
+    anchor = 0.0
+    total = 0.0
+    for i in range(len(sorted_prices)):
+        if i == 0 or not abs(sorted_prices[i] - anchor) <= anchor * tolerance:
+            if count:
+                means[count - 1] = total / (i - starts[count - 1])
+            anchor = sorted_prices[i]
+            starts[count] = i
+            total = 0.0
+            count += 1
+        total += sorted_prices[i]
+    if count:
+        means[count - 1] = total / (len(sorted_prices) - starts[count - 1])
+    return count
+
+
 class SupportResistanceDetector:
     """Detects swing highs/lows and clusters them into support/resistance zones."""
 
-    def __init__(self, lookback=3, cluster_tolerance=0.0005, min_touches=2):
+    def __init__(self, lookback=3, cluster_tolerance=0.0005, min_touches=2, window=500):
         self.lookback = lookback
         self.cluster_tolerance = cluster_tolerance
         self.min_touches = min_touches
+        self.window = window
         self.candle_count = 0
+        self._nearest_index = {}
         self.zones = []
+        self._swing_window = None
+        self._cluster_cache = None
+        self._highs = deque(maxlen=window)
+        self._lows = deque(maxlen=window)
+        self._rolling_swings = deque()
+        self._bars_seen = 0
 
     def detect_swings(self, candles):
         """
         Detect swing highs and swing lows using lookback period.
         Returns: {'swings': [{'price': float, 'type': 'high'|'low', 'index': int}]}
         """
-        swings = []
-        highs = np.array([c['high'] for c in candles])
-        lows = np.array([c['low'] for c in candles])
+        cs = Candles.coerce(candles)
+        n = len(cs)
+        lb = self.lookback
+        if n < 2 * lb + 1:
+            return []
         
-        for i in range(self.lookback, len(candles) - self.lookback):
-            is_swing_high = True
-            is_swing_low = True
-            
-            for j in range(1, self.lookback + 1):
-                if highs[i] <= highs[i - j] or highs[i] <= highs[i + j]:
-                    is_swing_high = False
-                if lows[i] >= lows[i - j] or lows[i] >= lows[i + j]:
-                    is_swing_low = False
-            
-            if is_swing_high:
-                swings.append({
-                    'price': float(highs[i]),
-                    'type': 'high',
-                    'index': i
-                })
-            
-            if is_swing_low:
-                swings.append({
-                    'price': float(lows[i]),
-                    'type': 'low',
-                    'index': i
-                })
+        is_high = np.zeros(n, dtype=np.bool_)
+        is_low = np.zeros(n, dtype=np.bool_)
+        swing_flags(cs.high, cs.low, lb, is_high, is_low)
+        
+        swings = []
+        for i in np.flatnonzero(is_high | is_low).tolist():
+            if is_high[i]:
+                swings.append({'price': float(cs.high[i]), 'type': 'high', 'index': i})
+            if is_low[i]:
+                swings.append({'price': float(cs.low[i]), 'type': 'low', 'index': i})
         
         return swings
 
@@ -59,46 +97,113 @@ class SupportResistanceDetector:
         if not swings:
             return []
         
-        highs = [s for s in swings if s['type'] == 'high']
-        lows = [s for s in swings if s['type'] == 'low']
-        
+        all_prices = np.fromiter((s['price'] for s in swings), dtype=np.float64, count=len(swings))
+        types = [s['type'] for s in swings]
         zones = []
         
-        for swing_list, zone_type in [(highs, 'high'), (lows, 'low')]:
-            if not swing_list:
+        for zone_type in ('high', 'low'):
+            prices = all_prices[np.fromiter((t == zone_type for t in types), dtype=np.bool_, count=len(types))]
+            if len(prices) == 0:
                 continue
+            prices.sort()
             
-            sorted_swings = sorted(swing_list, key=lambda x: x['price'])
-            clustered = []
-            current_cluster = [sorted_swings[0]]
-            
-            for swing in sorted_swings[1:]:
-                tolerance = current_cluster[0]['price'] * self.cluster_tolerance
-                
-                if abs(swing['price'] - current_cluster[0]['price']) <= tolerance:
-                    current_cluster.append(swing)
-                else:
-                    avg_price = np.mean([s['price'] for s in current_cluster])
-                    clustered.append({
-                        'price': float(avg_price),
-                        'type': zone_type,
-                        'touches': len(current_cluster),
-                        'strength': min(1.0, len(current_cluster) / 5.0)
-                    })
-                    current_cluster = [swing]
+            starts = np.empty(len(prices), dtype=np.int64)
+            means = np.empty(len(prices), dtype=np.float64)
+            count = cluster_walk(prices, self.cluster_tolerance, starts, means)
+            bounds = starts[:count].tolist() + [len(prices)]
             
-            if current_cluster:
-                avg_price = np.mean([s['price'] for s in current_cluster])
-                clustered.append({
-                    'price': float(avg_price),
+            for k, (a, b) in enumerate(zip(bounds, bounds[1:])):
+                if b - a < self.min_touches:
+                    continue
+                # np.mean sums pairwise from 8 elements on; match it exactly for large clusters
+                price = means[k] if b - a < 8 else np.mean(prices[a:b])
+                zones.append({
+                    'price': float(price),
                     'type': zone_type,
-                    'touches': len(current_cluster),
-                    'strength': min(1.0, len(current_cluster) / 5.0)
+                    'touches': b - a,
+                    'strength': min(1.0, (b - a) / 5.0)
                 })
-            
-            zones.extend(clustered)
         
-        return [z for z in zones if z['touches'] >= self.min_touches]
+        return zones
+
+    def _window_swings(self, candles):
+        """
+        detect_swings for this window, reusing the previous window's swings wherever the two overlap
+        with identical candles (matched by timestamp) and re-scanning only the new tail.
+        """
+        cs = Candles.coerce(candles)
+        n = len(cs)
+        lb = self.lookback
+        prev = self._swing_window
+        offset = stable = 0
+        
+        if prev is not None and cs.timestamp is not None and n:
+            prev_ts, prev_high, prev_low, prev_swings = prev
+            offset = int(np.searchsorted(prev_ts, cs.timestamp[0]))
+            if offset < len(prev_ts) and prev_ts[offset] == cs.timestamp[0]:
+                m = min(len(prev_ts) - offset, n)
+                same = ((prev_ts[offset:offset + m] == cs.timestamp[:m])
+                        & (prev_high[offset:offset + m] == cs.high[:m])
+                        & (prev_low[offset:offset + m] == cs.low[:m]))
+                stable = m if same.all() else int(same.argmin())
+        
+        if stable > 2 * lb:
+            swings = [
+                dict(s, index=s['index'] - offset) for s in prev_swings
+                if lb <= s['index'] - offset < stable - lb
+            ]
+            start = stable - 2 * lb
+            swings.extend(dict(s, index=s['index'] + start) for s in self.detect_swings(cs[start:]))
+        else:
+            swings = self.detect_swings(cs)
+        
+        if cs.timestamp is not None:
+            self._swing_window = (cs.timestamp.copy(), cs.high.copy(), cs.low.copy(), swings)
+        return swings
+
+    def _cluster_cached(self, swings):
+        """cluster_zones, returning the previous zone list unchanged when the swing prices are the same."""
+        key = tuple((s['type'], s['price']) for s in swings)
+        if self._cluster_cache is not None and self._cluster_cache[0] == key:
+            return self._cluster_cache[1]
+        zones = self.cluster_zones(swings)
+        self._cluster_cache = (key, zones)
+        return zones
+
+    def on_new_candle(self, candle):
+        """
+        Rolling alternative to update_zones: feed closed candles one at a time.
+        
+        Keeps the last `window` highs/lows, tests only the candle `lookback` bars back for a swing,
+        drops swings that leave the window and re-clusters only when the swing set changed.
+        Zones always equal cluster_zones(detect_swings(last window candles)).
+        """
+        highs, lows, swings = self._highs, self._lows, self._rolling_swings
+        highs.append(float(candle['high']))
+        lows.append(float(candle['low']))
+        self._bars_seen += 1
+        lb = self.lookback
+        changed = False
+        
+        first_kept = self._bars_seen - len(highs) + lb
+        while swings and swings[0]['index'] < first_kept:
+            swings.popleft()
+            changed = True
+        
+        if len(highs) >= 2 * lb + 1:
+            pos = len(highs) - lb - 1
+            high, low = highs[pos], lows[pos]
+            index = self._bars_seen - lb - 1
+            if all(high > highs[pos - j] and high > highs[pos + j] for j in range(1, lb + 1)):
+                swings.append({'price': high, 'type': 'high', 'index': index})
+                changed = True
+            if all(low < lows[pos - j] and low < lows[pos + j] for j in range(1, lb + 1)):
+                swings.append({'price': low, 'type': 'low', 'index': index})
+                changed = True
+        
+        if changed:
+            self.zones = self.cluster_zones(list(swings))
+        return self.zones
 
     def update_zones(self, candles):
         """
@@ -107,8 +212,8 @@ class SupportResistanceDetector:
         self.candle_count += len(candles)
         
         if self.candle_count >= 100 or not self.zones:
-            swings = self.detect_swings(candles)
-            self.zones = self.cluster_zones(swings)
+            swings = self._window_swings(candles)
+            self.zones = self._cluster_cached(swings)
             self.candle_count = 0
         
         return self.zones
@@ -121,22 +226,54 @@ class SupportResistanceDetector:
             return self.update_zones(candles)
         return self.zones
 
+    @property
+    def zones(self):
+        """
+        Current zones. The list is replaced, never edited in place: assign a new list (or reassign this one)
+        after changing it, so the nearest-zone index is rebuilt.
+        """
+        return self._zones
+
+    @zones.setter
+    def zones(self, zones):
+        self._zones = zones
+        self._nearest_index = {}
+
+    def _sorted_zones(self, zone_type):
+        """
+        Positions in self.zones of zone_type zones (all when None) and their prices, in ascending price order.
+        Built on first use after each assignment to self.zones.
+        """
+        index = self._nearest_index.get(zone_type)
+        if index is None:
+            order = [i for i, z in enumerate(self._zones) if not zone_type or z['type'] == zone_type]
+            order.sort(key=lambda i: self._zones[i]['price'])
+            index = ([self._zones[i]['price'] for i in order], order)
+            self._nearest_index[zone_type] = index
+        return index
+
     def find_nearest_zone(self, price, zone_type=None):
         """
-        Find nearest zone to current price.
+        Find nearest zone to current price by binary search over the price-sorted zones.
+        Ties go to the zone listed first, as a linear scan would pick.
         Returns: {'price': float, 'distance': float, 'type': str, 'strength': float} or None
         """
         if not self.zones:
             return None
         
-        filtered_zones = self.zones
-        if zone_type:
-            filtered_zones = [z for z in self.zones if z['type'] == zone_type]
-        
-        if not filtered_zones:
+        prices, order = self._sorted_zones(zone_type or None)
+        if not order:
             return None
         
-        nearest = min(filtered_zones, key=lambda z: abs(z['price'] - price))
+        idx = bisect_left(prices, price)
+        candidates = []
+        if idx > 0:
+            candidates.append(order[bisect_left(prices, prices[idx - 1])])
+        if idx < len(prices):
+            candidates.append(order[idx])
+        
+        best = min(candidates, key=lambda i: (abs(self.zones[i]['price'] - price), i))
+        nearest = self.zones[best]
         distance = abs(nearest['price'] - price)
         
         return {
@@ -145,4 +282,4 @@ class SupportResistanceDetector:
             'type': nearest['type'],
             'strength': nearest['strength'],
             'touches': nearest['touches']
-        }
\ No newline at end of file
+        }
@@ -3,6 +3,8 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+_DIRECTION_NAMES = {1: 'up', -1: 'down', 0: 'none'}
+
 
 class LiquiditySweepDetector:
     """Detects SMC-style liquidity sweeps at key price levels."""
@@ -11,34 +13,29 @@ class LiquiditySweepDetector:
         self.wick_touch_tolerance = wick_touch_tolerance
         self.min_closure_ratio = min_closure_ratio
 
+    def _wick_touch(self, high, low, zone_price):
+        """Scalar wick-touch test as (direction code, distance): 1 high wick, -1 low wick, 0 untouched."""
+        tolerance = zone_price * self.wick_touch_tolerance
+        lower = zone_price - tolerance
+        upper = zone_price + tolerance
+        
+        if lower <= high <= upper:
+            return 1, abs(high - zone_price)
+        if lower <= low <= upper:
+            return -1, abs(low - zone_price)
+        return 0, min(abs(high - zone_price), abs(low - zone_price))
+
     def detect_wick_touch(self, current_candle, previous_candle, zone_price):
         """
         Detect if current candle wick touches zone price level.
+        detect_sweep applies the same test to all zones at once on arrays.
         Returns: {'touched': bool, 'direction': 'up'|'down', 'distance': float}
         """
-        high = current_candle['high']
-        low = current_candle['low']
-        
-        tolerance = zone_price * self.wick_touch_tolerance
-        
-        if high >= zone_price - tolerance and high <= zone_price + tolerance:
-            return {
-                'touched': True,
-                'direction': 'up',
-                'distance': float(abs(high - zone_price))
-            }
-        
-        if low >= zone_price - tolerance and low <= zone_price + tolerance:
-            return {
-                'touched': True,
-                'direction': 'down',
-                'distance': float(abs(low - zone_price))
-            }
-        
+        code, distance = self._wick_touch(current_candle['high'], current_candle['low'], zone_price)
         return {
-            'touched': False,
-            'direction': 'none',
-            'distance': float(min(abs(high - zone_price), abs(low - zone_price)))
+            'touched': code != 0,
+            'direction': _DIRECTION_NAMES[code],
+            'distance': float(distance)
         }
 
     def validate_closure_inside(self, current_candle, previous_candle):
@@ -49,71 +46,65 @@ class LiquiditySweepDetector:
         prev_high = previous_candle['high']
         prev_low = previous_candle['low']
         curr_close = current_candle['close']
-        curr_open = current_candle['open']
         
-        inside = curr_close >= prev_low and curr_close <= prev_high
+        inside = prev_low <= curr_close <= prev_high
         
-        if inside:
-            prev_range = prev_high - prev_low
-            if prev_range == 0:
-                closure_ratio = 0.5
-            else:
-                closure_ratio = (curr_close - prev_low) / prev_range
-        else:
-            closure_ratio = 0.0
+        # Straight-line form: a zero range divides 0.5 by 1, and outside closes are zeroed by the bool factor (+ 0.0 drops the sign of -0.0)
+        prev_range = prev_high - prev_low
+        flat = prev_range == 0
+        closure_ratio = inside * ((curr_close - prev_low + 0.5 * flat) / (prev_range + flat)) + 0.0
         
         return {
             'inside': inside,
             'closure_ratio': float(closure_ratio)
         }
 
+    @staticmethod
+    def _zone_arrays(sr_zones):
+        """Zone prices and strengths as arrays, rebuilt on every call (O(zones)) so in-place zone edits are seen."""
+        prices = np.fromiter((z['price'] for z in sr_zones), dtype=np.float64, count=len(sr_zones))
+        strengths = np.fromiter((z.get('strength', 0.5) for z in sr_zones), dtype=np.float64, count=len(sr_zones))
+        return prices, strengths
+
     def detect_sweep(self, candles, sr_zones):
         """
-        Detect liquidity sweep pattern.
+        Detect liquidity sweep pattern, scoring every zone at once.
         Returns: {'sweep_detected': bool, 'direction': 'up'|'down', 'score': float, 'touched_level': float}
         """
-        if len(candles) < 2:
-            return {'sweep_detected': False, 'direction': 'none', 'score': 0.0, 'touched_level': None}
+        no_sweep = {'sweep_detected': False, 'direction': 'none', 'score': 0.0, 'touched_level': None}
+        if len(candles) < 2 or not sr_zones:
+            return no_sweep
         
         current = candles[-1]
         previous = candles[-2]
         
-        best_sweep = None
-        best_score = 0.0
+        closure = self.validate_closure_inside(current, previous)
+        if not closure['inside']:
+            return no_sweep
+        closure_score = closure['closure_ratio'] if closure['closure_ratio'] > self.min_closure_ratio else 0
+        
+        prices, strengths = self._zone_arrays(sr_zones)
+        high = current['high']
+        low = current['low']
+        tolerance = prices * self.wick_touch_tolerance
+        touch_up = (high >= prices - tolerance) & (high <= prices + tolerance)
+        touch_down = ~touch_up & (low >= prices - tolerance) & (low <= prices + tolerance)
         
-        for zone in sr_zones:
-            wick_touch = self.detect_wick_touch(current, previous, zone['price'])
-            
-            if not wick_touch['touched']:
-                continue
-            
-            closure = self.validate_closure_inside(current, previous)
-            
-            if not closure['inside']:
-                continue
-            
-            touch_score = 1.0 - min(1.0, wick_touch['distance'] / (zone['price'] * 0.01))
-            closure_score = closure['closure_ratio'] if closure['closure_ratio'] > self.min_closure_ratio else 0
-            
-            final_score = (touch_score + closure_score) / 2.0 * zone.get('strength', 0.5)
-            
-            if final_score > best_score:
-                best_score = final_score
-                best_sweep = {
-                    'direction': wick_touch['direction'],
-                    'touched_level': zone['price'],
-                    'zone_strength': zone.get('strength', 0.5)
-                }
+        distance = np.where(touch_up, np.abs(high - prices), np.abs(low - prices))
+        touch_score = 1.0 - np.minimum(1.0, distance / (prices * 0.01))
+        final_score = (touch_score + closure_score) / 2.0 * strengths
         
-        if best_sweep is None:
-            return {'sweep_detected': False, 'direction': 'none', 'score': 0.0, 'touched_level': None}
+        candidates = (touch_up | touch_down) & (final_score > 0)
+        if not candidates.any():
+            return no_sweep
         
+        best = int(np.where(candidates, final_score, -np.inf).argmax())
         return {
             'sweep_detected': True,
-            'direction': best_sweep['direction'],
-            'score': float(min(1.0, best_score)),
-            'touched_level': float(best_sweep['touched_level']),
-            'zone_strength': float(best_sweep['zone_strength'])
+            'direction': 'up' if touch_up[best] else 'down',
+            'score': float(min(1.0, final_score[best])),
+            'touched_level': float(prices[best]),
+            'zone_strength': float(strengths[best])
         }
 
     def validate_confirmation(self, candles):
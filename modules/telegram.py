@@ -1,37 +1,119 @@
 import asyncio
-import json
+import atexit
 import logging
 import sys
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional, Dict, Any
 
 from telegram import Bot
+from telegram.request import HTTPXRequest
 from telegram.error import TelegramError, BadRequest, TimedOut, RetryAfter
 
+from utils import TokenBucket, atomic_write_bytes, json_dumps, read_json_file
+
 logger = logging.getLogger(__name__)
 handler = logging.StreamHandler(sys.stdout)
 logger.addHandler(handler)
 
+# Alert bodies, formatted once per alert with str.format
+_RULE = "━━━━━━━━━━━━━━━━━━\n"
+
+TRADE_ENTRY_TPL = (
+    "🚀 *TRADE ENTRY ALERT*\n" + _RULE +
+    "*Symbol:* `{symbol}`\n"
+    "*Direction:* {direction_emoji} *{direction}*\n"
+    "*Entry Price:* `${entry_price:.2f}`\n"
+    "*Stop Loss:* ❌ `${stop_loss:.2f}`\n"
+    "*Take Profit 1:* 🎯 `${tp1:.2f}` (30% close)\n"
+    "*Take Profit 2:* 🎯 `${tp2:.2f}` (40% close)\n"
+    "*Position Size:* `{lot_size:.4f}`\n"
+    "*Risk:* `{risk_pct:.2f}%`\n"
+    "*Time:* `{timestamp}`"
+)
+
+PARTIAL_CLOSE_TPL = (
+    "🎯 *PARTIAL CLOSE ALERT*\n" + _RULE +
+    "*Symbol:* `{symbol}`\n"
+    "*TP Level:* `TP{tp_level}`\n"
+    "*Profit:* {profit_emoji} `{profit_pct:+.2f}%`\n"
+    "*Amount Closed:* `{amount_closed:.4f}`\n"
+    "*Remaining Position:* `{remaining_position:.4f}`\n"
+    "*Time:* `{timestamp}`"
+)
+
+FULL_CLOSE_TPL = (
+    "✅ *TRADE CLOSED*\n" + _RULE +
+    "*Symbol:* `{symbol}`\n"
+    "*Exit Reason:* `{exit_reason}`\n"
+    "*Final PnL:* {pnl_emoji} `${pnl:+.2f}`\n"
+    "*PnL %:* `{pnl_pct:+.2f}%`\n"
+    "*Duration:* `{duration}`\n"
+    "*Time:* `{timestamp}`"
+)
+
+DAILY_SUMMARY_TPL = (
+    "📊 *DAILY SUMMARY*\n" + _RULE +
+    "*Trades Taken:* `{trades_count}`\n"
+    "*Win Rate:* {win_rate_emoji} `{win_rate_pct:.1f}%`\n"
+    "*Daily PnL:* {pnl_emoji} `${daily_pnl:+.2f}`\n"
+    "*Max Drawdown:* `${max_drawdown:.2f}`\n"
+    "*Report Time:* `{timestamp}`"
+)
+
+ERROR_TPL = (
+    "{severity_emoji} *{severity_level} ALERT*\n" + _RULE +
+    "*Error:* `{error_message}`\n"
+    "*Time:* `{timestamp}`"
+)
+
+
+# (epoch second / epoch day, formatted string) so bursts of alerts reuse one strftime
+_ts_cache = [-1, '']
+_date_cache = [-1, '']
+
+
+def _ts_hms_utc() -> str:
+    """Current UTC time as 'HH:MM:SS UTC', reformatted at most once per second."""
+    t = int(time.time())
+    if t != _ts_cache[0]:
+        _ts_cache[:] = [t, time.strftime('%H:%M:%S UTC', time.gmtime(t))]
+    return _ts_cache[1]
+
+
+def _utc_date() -> str:
+    """Current UTC date as 'YYYY-MM-DD', reformatted at most once per day."""
+    day = int(time.time()) // 86400
+    if day != _date_cache[0]:
+        _date_cache[:] = [day, time.strftime('%Y-%m-%d', time.gmtime(day * 86400))]
+    return _date_cache[1]
+
 
 class DailySummaryTracker:
     """Tracks daily trading statistics for summary alerts."""
 
-    def __init__(self, state_file: str = "/app/hydra_x_v2_1804/data/daily_summary_state.json"):
+    def __init__(self, state_file: str = "/app/hydra_x_v2_1804/data/daily_summary_state.json",
+                 flush_interval: float = 0.0):
         self.state_file = Path(state_file)
         self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        # Bumped on every state change; get_daily_summary reuses its result while it is unchanged
+        self._version = 0
+        self._summary_cache = (-1, None)
         self.state = self._load_state()
+        if flush_interval > 0:
+            atexit.register(self.force_flush)
 
     def _load_state(self) -> Dict[str, Any]:
         """Load state from JSON file if it exists and is from today."""
         if self.state_file.exists():
             try:
-                with open(self.state_file, 'r') as f:
-                    saved_state = json.load(f)
-                    saved_date = saved_state.get('date')
-                    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-                    if saved_date == today:
-                        return saved_state
+                saved_state = read_json_file(self.state_file)
+                if saved_state.get('date') == _utc_date():
+                    return saved_state
             except Exception as e:
                 logger.warning(f"Failed to load daily summary state: {e}")
         return self._init_state()
@@ -39,7 +121,7 @@ class DailySummaryTracker:
     def _init_state(self) -> Dict[str, Any]:
         """Initialize fresh state for a new day."""
         return {
-            'date': datetime.now(timezone.utc).strftime('%Y-%m-%d'),
+            'date': _utc_date(),
             'trades_taken': 0,
             'wins_count': 0,
             'losses_count': 0,
@@ -50,10 +132,9 @@ class DailySummaryTracker:
         }
 
     def _save_state(self):
-        """Persist state to JSON file."""
+        """Persist state as compact JSON in one write, atomically replacing the previous file."""
         try:
-            with open(self.state_file, 'w') as f:
-                json.dump(self.state, f, indent=2)
+            atomic_write_bytes(self.state_file, json_dumps(self.state))
         except Exception as e:
             logger.error(f"Failed to save daily summary state: {e}")
 
@@ -76,28 +157,48 @@ class DailySummaryTracker:
         if drawdown > self.state['max_drawdown']:
             self.state['max_drawdown'] = drawdown
         
+        self._version += 1
+        self._dirty = True
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.force_flush()
+
+    def force_flush(self):
+        """Write recorded trades that are still only in memory (write-behind when flush_interval > 0)."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._last_flush = time.monotonic()
         self._save_state()
 
     def get_daily_summary(self) -> Dict[str, Any]:
-        """Get current daily summary statistics."""
-        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        """Get current daily summary statistics (a shared dict, rebuilt only after the state changes)."""
+        today = _utc_date()
         if self.state['date'] != today:
             self.state = self._init_state()
+            self._version += 1
+            self._dirty = False
             self._save_state()
         
+        if self._summary_cache[0] == self._version:
+            return self._summary_cache[1]
+        
         trades = self.state['trades_taken']
         win_rate = (self.state['wins_count'] / trades * 100) if trades > 0 else 0
         
-        return {
+        summary = {
             'trades_count': trades,
             'win_rate_pct': win_rate,
             'daily_pnl': self.state['total_daily_pnl'],
             'max_drawdown': self.state['max_drawdown']
         }
+        self._summary_cache = (self._version, summary)
+        return summary
 
     def reset_daily_stats(self):
         """Reset stats at 00:00 UTC."""
         self.state = self._init_state()
+        self._version += 1
+        self._dirty = False
         self._save_state()
 
 
@@ -111,7 +212,17 @@ class TelegramNotifier:
         self.token = config_dict.get('telegram', {}).get('token', '')
         self.chat_id = config_dict.get('telegram', {}).get('chat_id', '')
         self.bot = None
-        self.summary_tracker = DailySummaryTracker()
+        self._queue: Optional[asyncio.Queue] = None
+        self._sender_task: Optional[asyncio.Task] = None
+        self._retry_until = 0.0
+        # Telegram allows about one message per second per chat; short bursts are absorbed by the bucket
+        self._bucket = TokenBucket(
+            rate=config_dict.get('telegram', {}).get('rate_limit', 1.0),
+            burst=config_dict.get('telegram', {}).get('rate_burst', 5)
+        )
+        self.summary_tracker = DailySummaryTracker(
+            flush_interval=config_dict.get('telegram', {}).get('summary_flush_interval', 0.0)
+        )
         
         if not self.enabled:
             logger.info("Telegram notifications disabled in config")
@@ -124,9 +235,14 @@ class TelegramNotifier:
             return
         
         try:
-            self.bot = Bot(token=self.token)
-            test_msg = await self.bot.get_me()
-            logger.info(f"Telegram bot initialized: {test_msg.username}")
+            # One pooled keep-alive HTTP client for every alert instead of a fresh TLS handshake per send
+            request = HTTPXRequest(connection_pool_size=8, connect_timeout=5.0, read_timeout=10.0,
+                                   write_timeout=10.0, pool_timeout=5.0)
+            self.bot = Bot(token=self.token, request=request)
+            await self.bot.initialize()
+            self._queue = asyncio.Queue(maxsize=256)
+            self._sender_task = asyncio.create_task(self._drain())
+            logger.info(f"Telegram bot initialized: {self.bot.username}")
         except Exception as e:
             logger.error(f"Failed to initialize Telegram bot: {e}")
             self.enabled = False
@@ -140,23 +256,27 @@ class TelegramNotifier:
         
         for attempt in range(max_retries):
             try:
-                await asyncio.wait_for(
-                    self.bot.send_message(
-                        chat_id=self.chat_id,
-                        text=text,
-                        parse_mode='Markdown'
-                    ),
-                    timeout=10.0
+                # Timeouts are enforced by the HTTP layer, not a wait_for task per send
+                await self.bot.send_message(
+                    chat_id=self.chat_id,
+                    text=text,
+                    parse_mode='Markdown',
+                    read_timeout=10,
+                    write_timeout=10
                 )
                 logger.info(f"Telegram message sent successfully (attempt {attempt + 1})")
                 return True
-            except asyncio.TimeoutError:
+            except (TimedOut, asyncio.TimeoutError):
                 logger.warning(f"Telegram send timeout on attempt {attempt + 1}")
                 if attempt < max_retries - 1:
                     await asyncio.sleep(delays[attempt])
             except RetryAfter as e:
-                logger.warning(f"Telegram rate limit: waiting {e.retry_after}s")
-                await asyncio.sleep(e.retry_after)
+                retry_after = e.retry_after
+                if hasattr(retry_after, 'total_seconds'):
+                    retry_after = retry_after.total_seconds()
+                logger.warning(f"Telegram rate limit: waiting {retry_after}s")
+                self._retry_until = time.monotonic() + retry_after
+                await asyncio.sleep(retry_after)
             except BadRequest as e:
                 logger.error(f"Permanent Telegram error (bad request): {e}")
                 return False
@@ -171,6 +291,32 @@ class TelegramNotifier:
         logger.error(f"Failed to send Telegram message after {max_retries} attempts")
         return False
 
+    async def _dispatch(self, text: str) -> None:
+        """Queue a message for the sender task; sends inline when no sender is running."""
+        if self._queue is None:
+            await self._send_message(text)
+            return
+        
+        try:
+            self._queue.put_nowait(text)
+        except asyncio.QueueFull:
+            logger.warning("Telegram send queue full - dropping message")
+
+    async def _drain(self) -> None:
+        """Sender task: deliver queued messages under the rate limit and any Retry-After cooldown."""
+        while True:
+            text = await self._queue.get()
+            try:
+                await self._bucket.acquire()
+                cooldown = self._retry_until - time.monotonic()
+                if cooldown > 0:
+                    await asyncio.sleep(cooldown)
+                await self._send_message(text)
+            except Exception as e:
+                logger.error(f"Telegram sender error: {e}")
+            finally:
+                self._queue.task_done()
+
     async def trade_entry_alert(
         self, symbol: str, direction: str, entry_price: float, stop_loss: float,
         tp1: float, tp2: float, lot_size: float, risk_pct: float
@@ -178,23 +324,15 @@ class TelegramNotifier:
         """Send trade entry alert."""
         try:
             direction_emoji = "🟢" if direction == "LONG" else "🔴"
-            timestamp = datetime.now(timezone.utc).strftime('%H:%M:%S UTC')
+            timestamp = _ts_hms_utc()
             
-            message = (
-                f"🚀 *TRADE ENTRY ALERT*\n"
-                f"━━━━━━━━━━━━━━━━━━\n"
-                f"*Symbol:* `{symbol}`\n"
-                f"*Direction:* {direction_emoji} *{direction}*\n"
-                f"*Entry Price:* `${entry_price:.2f}`\n"
-                f"*Stop Loss:* ❌ `${stop_loss:.2f}`\n"
-                f"*Take Profit 1:* 🎯 `${tp1:.2f}` (30% close)\n"
-                f"*Take Profit 2:* 🎯 `${tp2:.2f}` (40% close)\n"
-                f"*Position Size:* `{lot_size:.4f}`\n"
-                f"*Risk:* `{risk_pct:.2f}%`\n"
-                f"*Time:* `{timestamp}`"
+            message = TRADE_ENTRY_TPL.format(
+                symbol=symbol, direction_emoji=direction_emoji, direction=direction,
+                entry_price=entry_price, stop_loss=stop_loss, tp1=tp1, tp2=tp2,
+                lot_size=lot_size, risk_pct=risk_pct, timestamp=timestamp
             )
             
-            await self._send_message(message)
+            await self._dispatch(message)
         except Exception as e:
             logger.error(f"Error sending trade entry alert: {e}")
 
@@ -204,21 +342,15 @@ class TelegramNotifier:
     ):
         """Send partial close alert."""
         try:
-            timestamp = datetime.now(timezone.utc).strftime('%H:%M:%S UTC')
+            timestamp = _ts_hms_utc()
             profit_emoji = "📈" if profit_pct >= 0 else "📉"
             
-            message = (
-                f"🎯 *PARTIAL CLOSE ALERT*\n"
-                f"━━━━━━━━━━━━━━━━━━\n"
-                f"*Symbol:* `{symbol}`\n"
-                f"*TP Level:* `TP{tp_level}`\n"
-                f"*Profit:* {profit_emoji} `{profit_pct:+.2f}%`\n"
-                f"*Amount Closed:* `{amount_closed:.4f}`\n"
-                f"*Remaining Position:* `{remaining_position:.4f}`\n"
-                f"*Time:* `{timestamp}`"
+            message = PARTIAL_CLOSE_TPL.format(
+                symbol=symbol, tp_level=tp_level, profit_emoji=profit_emoji, profit_pct=profit_pct,
+                amount_closed=amount_closed, remaining_position=remaining_position, timestamp=timestamp
             )
             
-            await self._send_message(message)
+            await self._dispatch(message)
         except Exception as e:
             logger.error(f"Error sending partial close alert: {e}")
 
@@ -228,21 +360,15 @@ class TelegramNotifier:
     ):
         """Send full close alert."""
         try:
-            timestamp = datetime.now(timezone.utc).strftime('%H:%M:%S UTC')
+            timestamp = _ts_hms_utc()
             pnl_emoji = "✅" if pnl >= 0 else "❌"
             
-            message = (
-                f"✅ *TRADE CLOSED*\n"
-                f"━━━━━━━━━━━━━━━━━━\n"
-                f"*Symbol:* `{symbol}`\n"
-                f"*Exit Reason:* `{exit_reason}`\n"
-                f"*Final PnL:* {pnl_emoji} `${pnl:+.2f}`\n"
-                f"*PnL %:* `{pnl_pct:+.2f}%`\n"
-                f"*Duration:* `{duration}`\n"
-                f"*Time:* `{timestamp}`"
+            message = FULL_CLOSE_TPL.format(
+                symbol=symbol, exit_reason=exit_reason, pnl_emoji=pnl_emoji, pnl=pnl,
+                pnl_pct=pnl_pct, duration=duration, timestamp=timestamp
             )
             
-            await self._send_message(message)
+            await self._dispatch(message)
             
             is_win = pnl > 0
             self.summary_tracker.record_trade(pnl, is_win)
@@ -252,49 +378,60 @@ class TelegramNotifier:
     async def daily_summary_alert(self):
         """Send daily summary alert at 00:00 UTC."""
         try:
+            self.summary_tracker.force_flush()
             summary = self.summary_tracker.get_daily_summary()
             timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')
             
             win_rate_emoji = "📈" if summary['win_rate_pct'] >= 50 else "📉"
             pnl_emoji = "💰" if summary['daily_pnl'] >= 0 else "📉"
             
-            message = (
-                f"📊 *DAILY SUMMARY*\n"
-                f"━━━━━━━━━━━━━━━━━━\n"
-                f"*Trades Taken:* `{summary['trades_count']}`\n"
-                f"*Win Rate:* {win_rate_emoji} `{summary['win_rate_pct']:.1f}%`\n"
-                f"*Daily PnL:* {pnl_emoji} `${summary['daily_pnl']:+.2f}`\n"
-                f"*Max Drawdown:* `${summary['max_drawdown']:.2f}`\n"
-                f"*Report Time:* `{timestamp}`"
+            message = DAILY_SUMMARY_TPL.format(
+                win_rate_emoji=win_rate_emoji, pnl_emoji=pnl_emoji, timestamp=timestamp, **summary
             )
             
-            await self._send_message(message)
+            await self._dispatch(message)
         except Exception as e:
             logger.error(f"Error sending daily summary alert: {e}")
 
     async def error_alert(self, error_message: str, severity_level: str = "WARNING"):
         """Send error/alert notification."""
         try:
-            timestamp = datetime.now(timezone.utc).strftime('%H:%M:%S UTC')
+            timestamp = _ts_hms_utc()
             
             severity_emoji = "⚠️" if severity_level == "WARNING" else "🚨"
             
-            message = (
-                f"{severity_emoji} *{severity_level} ALERT*\n"
-                f"━━━━━━━━━━━━━━━━━━\n"
-                f"*Error:* `{error_message}`\n"
-                f"*Time:* `{timestamp}`"
+            message = ERROR_TPL.format(
+                severity_emoji=severity_emoji, severity_level=severity_level,
+                error_message=error_message, timestamp=timestamp
             )
             
-            await self._send_message(message)
+            await self._dispatch(message)
         except Exception as e:
             logger.error(f"Error sending error alert: {e}")
 
     async def shutdown(self):
         """Gracefully shutdown Telegram bot."""
+        if self._sender_task is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=10.0)
+            except asyncio.TimeoutError:
+                logger.warning(f"Telegram shutdown: dropping {self._queue.qsize()} queued messages")
+            self._sender_task.cancel()
+            try:
+                await self._sender_task
+            except asyncio.CancelledError:
+                pass
+            self._sender_task = None
+            self._queue = None
+        
+        self.summary_tracker.force_flush()
         if self.bot:
             try:
-                await self.bot.close()
+                try:
+                    await self.bot.close()
+                finally:
+                    # Release the pooled HTTP client even when the Bot API rejects close (e.g. 429 right after launch)
+                    await self.bot.shutdown()
                 logger.info("Telegram bot closed")
             except Exception as e:
                 logger.error(f"Error closing Telegram bot: {e}")
\ No newline at end of file
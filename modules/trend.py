@@ -1,10 +1,41 @@
 import numpy as np
-import pandas as pd
 import logging
 
+from modules.candles import Candles
+from utils import njit
+
 logger = logging.getLogger(__name__)
 
 
+@njit(cache=True)
+def ema_fill(closes, period, seed, out):
+    """Fill out[period-1:] with the EMA recurrence, starting from seed (the SMA of the first period closes)."""
+    multiplier = 2.0 / (period + 1)
+    out[period - 1] = seed
+    for i in range(period, closes.shape[0]):
+        out[i] = closes[i] * multiplier + out[i - 1] * (1 - multiplier)
+
+
+@njit(cache=True)
+def ema_last_pair(closes, fast_period, fast_seed, slow_period, slow_seed):
+    """Final values of two EMAs of closes in one pass; seeds are the SMAs of each EMA's first period closes."""
+    fast_mult = 2.0 / (fast_period + 1)
+    slow_mult = 2.0 / (slow_period + 1)
+    fast = fast_seed
+    slow = slow_seed
+    for i in range(min(fast_period, slow_period), closes.shape[0]):
+        if i >= fast_period:
+            fast = closes[i] * fast_mult + fast * (1 - fast_mult)
+        if i >= slow_period:
+            slow = closes[i] * slow_mult + slow * (1 - slow_mult)
+    return fast, slow
+
+
+# Compile at import so the first trend evaluation doesn't pay the JIT cost
+ema_fill(np.zeros(2, dtype=np.float64), 1, 0.0, np.zeros(2, dtype=np.float64))
+ema_last_pair(np.zeros(2, dtype=np.float64), 1, 0.0, 1, 0.0)
+
+
 class TrendAnalyzer:
     """Analyzes trend using EMA50/200 on M15 and H1 candle body bias."""
 
@@ -17,34 +48,44 @@ class TrendAnalyzer:
         if len(closes) < period:
             return None
         
+        closes = np.ascontiguousarray(closes, dtype=np.float64)
         ema = np.zeros(len(closes))
-        multiplier = 2.0 / (period + 1)
-        
-        ema[period - 1] = np.mean(closes[:period])
-        
-        for i in range(period, len(closes)):
-            ema[i] = closes[i] * multiplier + ema[i - 1] * (1 - multiplier)
-        
+        ema_fill(closes, period, float(np.mean(closes[:period])), ema)
         return ema
 
+    @staticmethod
+    def _closes_array(candles):
+        """
+        Closes as a contiguous float64 array: the column of Candles or of a CANDLE_DTYPE record array,
+        a plain closes array as-is, or one preallocated pass over candle dicts.
+        """
+        if isinstance(candles, Candles):
+            closes = candles.close
+        elif isinstance(candles, np.ndarray):
+            closes = candles['close'] if candles.dtype.names else candles
+        else:
+            return np.fromiter((c['close'] for c in candles), dtype=np.float64, count=len(candles))
+        return np.ascontiguousarray(closes, dtype=np.float64)
+
+    @staticmethod
+    def _ema_last_pair(closes, fast_period, slow_period):
+        """Last values of the fast and slow EMAs from one fused pass, or None if closes is too short."""
+        if len(closes) < max(fast_period, slow_period):
+            return None
+        return ema_last_pair(closes, fast_period, float(np.mean(closes[:fast_period])),
+                             slow_period, float(np.mean(closes[:slow_period])))
+
     def analyze_trend(self, m15_candles):
         """
         Determine trend bias from M15 EMA50/200.
+        m15_candles may be candle dicts, Candles, a CANDLE_DTYPE record array or a closes array.
         Returns: {'trend': 'bullish'|'bearish'|'ranging', 'ema50': float, 'ema200': float}
         """
-        if len(m15_candles) < self.ema_slow:
+        if len(m15_candles) < max(self.ema_fast, self.ema_slow):
             return {'trend': 'ranging', 'ema50': None, 'ema200': None}
         
-        closes = np.array([c['close'] for c in m15_candles])
-        
-        ema50 = self.calculate_ema(closes, self.ema_fast)
-        ema200 = self.calculate_ema(closes, self.ema_slow)
-        
-        if ema50 is None or ema200 is None:
-            return {'trend': 'ranging', 'ema50': None, 'ema200': None}
-        
-        current_ema50 = ema50[-1]
-        current_ema200 = ema200[-1]
+        closes = self._closes_array(m15_candles)
+        current_ema50, current_ema200 = self._ema_last_pair(closes, self.ema_fast, self.ema_slow)
         
         tolerance = current_ema200 * 0.005
         
@@ -95,6 +136,29 @@ class TrendAnalyzer:
             'candle_range': float(candle_range)
         }
 
+    def analyze_h1_bias_batch(self, opens, highs, lows, closes):
+        """
+        H1 body bias over arrays of candles (e.g. one H1 candle per watchlist symbol).
+        Returns: {'bias': int8[] (+1 bullish, -1 bearish, 0 neutral), 'body_position': float[], 'candle_range': float[]}
+        Zero-range candles get body_position 0.5 and neutral bias, as in analyze_h1_bias.
+        """
+        opens = np.asarray(opens, dtype=np.float64)
+        highs = np.asarray(highs, dtype=np.float64)
+        lows = np.asarray(lows, dtype=np.float64)
+        closes = np.asarray(closes, dtype=np.float64)
+        
+        candle_range = highs - lows
+        has_range = candle_range != 0
+        mid_point = (opens + closes) / 2
+        body_position = np.where(has_range, (mid_point - lows) / np.where(has_range, candle_range, 1.0), 0.5)
+        bias = ((body_position > 0.5).astype(np.int8) - (body_position < 0.5).astype(np.int8))
+        
+        return {
+            'bias': bias,
+            'body_position': body_position,
+            'candle_range': candle_range
+        }
+
     def get_trend_confirmation(self, m15_candles, h1_candle):
         """
         Get combined trend confirmation from M15 EMA and H1 bias.
@@ -0,0 +1,130 @@
+import pytest
+import numpy as np
+import sys
+
+sys.path.insert(0, '/app/hydra_x_v2_1804')
+
+from modules.breakout import BreakoutEngine
+
+
+@pytest.fixture
+def engine():
+    return BreakoutEngine()
+
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(3)
+    result = []
+    price = 100.0
+    for _ in range(120):
+        close = price + rng.normal(0, 1)
+        open_price = price
+        result.append({
+            'open': open_price,
+            'high': max(open_price, close) + abs(rng.normal(0, 0.3)),
+            'low': min(open_price, close) - abs(rng.normal(0, 0.3)),
+            'close': close
+        })
+        price = close
+    return result
+
+
+class TestBodyWick:
+
+    def test_bullish_candle(self, engine):
+        result = engine.validate_body_wick({'open': 100.0, 'high': 110.0, 'low': 99.0, 'close': 109.0})
+        assert result['valid'] is True
+        assert result['direction'] == 'up'
+        assert result['body_ratio'] == pytest.approx(9 / 11)
+        assert result['wick_ratio'] == pytest.approx(1 / 11)
+
+    def test_doji_counts_as_down(self, engine):
+        result = engine.validate_body_wick({'open': 100.0, 'high': 101.0, 'low': 99.0, 'close': 100.0})
+        assert result['valid'] is False
+        assert result['direction'] == 'down'
+
+    def test_zero_range(self, engine):
+        result = engine.validate_body_wick({'open': 100.0, 'high': 100.0, 'low': 100.0, 'close': 100.0})
+        assert result['valid'] is False
+        assert result['direction'] == 'none'
+        assert result['body_ratio'] == 0
+
+    def test_batch_matches_scalar(self, engine, candles):
+        batch = engine.validate_body_wick_batch(
+            [c['open'] for c in candles],
+            [c['high'] for c in candles],
+            [c['low'] for c in candles],
+            [c['close'] for c in candles]
+        )
+        direction_names = {1: 'up', -1: 'down', 0: 'none'}
+
+        for i, candle in enumerate(candles):
+            scalar = engine.validate_body_wick(candle)
+            assert bool(batch['valid'][i]) == scalar['valid']
+            assert batch['body_ratio'][i] == pytest.approx(scalar['body_ratio'])
+            assert batch['wick_ratio'][i] == pytest.approx(scalar['wick_ratio'])
+            assert direction_names[int(batch['direction'][i])] == scalar['direction']
+
+    def test_scalar_pinned_to_batch(self, engine):
+        rng = np.random.default_rng(17)
+        opens = np.round(rng.uniform(99, 101, 2000), 2)
+        closes = np.round(rng.uniform(99, 101, 2000), 2)
+        closes[::7] = opens[::7]
+        highs = np.maximum(opens, closes) + np.round(rng.exponential(0.3, 2000), 2) * (rng.random(2000) > 0.1)
+        lows = np.minimum(opens, closes) - np.round(rng.exponential(0.3, 2000), 2) * (rng.random(2000) > 0.1)
+        highs[::50] = lows[::50] = opens[::50] = closes[::50]
+        batch = engine.validate_body_wick_batch(opens, highs, lows, closes)
+        direction_names = {1: 'up', -1: 'down', 0: 'none'}
+
+        for i in range(len(opens)):
+            scalar = engine._body_wick(opens[i], highs[i], lows[i], closes[i])
+            assert scalar == {
+                'valid': bool(batch['valid'][i]),
+                'body_ratio': float(batch['body_ratio'][i]),
+                'wick_ratio': float(batch['wick_ratio'][i]),
+                'direction': direction_names[int(batch['direction'][i])]
+            }
+
+
+class TestBreakoutSignal:
+
+    def test_insufficient_candles(self, engine, candles):
+        result = engine.generate_breakout_signal(candles[:10])
+        assert result == {'signal': 'NONE', 'strength': 0.0, 'details': {}}
+
+    def test_shared_true_range_matches_detectors(self, engine, candles):
+        tr_values = engine._true_range(engine._to_soa(candles))
+        assert engine._compression_from_tr(tr_values) == engine.detect_compression(candles)
+        assert engine._atr_spike_from_tr(tr_values) == engine.detect_atr_spike(candles)
+
+    def test_in_place_update_is_not_served_stale(self, engine, candles):
+        window = list(candles)
+        engine.calculate_atr(window)
+        window[-1] = dict(window[-1], high=window[-1]['high'] + 50.0)
+        assert engine.calculate_atr(window) == BreakoutEngine().calculate_atr(list(window))
+
+    def test_rejects_on_body_wick_before_range_checks(self, engine, candles):
+        doji = dict(candles[-1], close=candles[-1]['open'])
+        result = engine.generate_breakout_signal(candles[:-1] + [doji])
+        assert result['signal'] == 'NONE'
+        assert list(result['details']) == ['body_wick']
+
+    def test_atr_matches_manual_true_range(self, engine, candles):
+        true_ranges = [candles[0]['high'] - candles[0]['low']]
+        for prev, curr in zip(candles, candles[1:]):
+            true_ranges.append(max(curr['high'] - curr['low'],
+                                   abs(curr['high'] - prev['close']),
+                                   abs(curr['low'] - prev['close'])))
+        assert engine.calculate_atr(candles, period=14) == pytest.approx(np.mean(true_ranges[-14:]))
+
+    def test_signal_carries_atr(self, engine):
+        window = []
+        for i in range(60):
+            half_range = 0.1 if i < 40 else 0.1 - (i - 39) * 0.0025
+            window.append({'open': 100.0, 'high': 100.0 + half_range, 'low': 100.0 - half_range, 'close': 100.0})
+        window.append({'open': 100.0, 'high': 110.5, 'low': 99.9, 'close': 110.0})
+
+        result = engine.generate_breakout_signal(window)
+        assert result['signal'] == 'LONG'
+        assert result['atr'] == engine.calculate_atr(window, period=14)
@@ -0,0 +1,152 @@
+import pytest
+import numpy as np
+import sys
+
+sys.path.insert(0, '/app/hydra_x_v2_1804')
+
+from modules.candles import Candles
+from modules.data_streamer import DataStreamer
+
+
+@pytest.fixture
+def rows():
+    return [
+        [1700000000000, 100.0, 101.0, 99.0, 100.5, 3.0],
+        [1700000300000, 100.5, 102.0, 100.0, 101.5, 4.0],
+        [1700000600000, 101.5, 101.8, 100.2, 100.4, 2.5]
+    ]
+
+
+@pytest.fixture
+def candle_dicts(rows):
+    return [
+        {'timestamp': r[0], 'open': r[1], 'high': r[2], 'low': r[3], 'close': r[4], 'volume': r[5]}
+        for r in rows
+    ]
+
+
+class TestCandles:
+
+    def test_from_ohlcv_matches_from_dicts(self, rows, candle_dicts):
+        a = Candles.from_ohlcv(rows)
+        b = Candles.from_dicts(candle_dicts)
+
+        for field in ('timestamp', 'open', 'high', 'low', 'close', 'volume'):
+            assert np.array_equal(getattr(a, field), getattr(b, field))
+        assert a.timestamp.dtype == np.int64
+        assert a.close.flags['C_CONTIGUOUS']
+
+    def test_round_trip_to_dicts(self, candle_dicts):
+        candles = Candles.from_dicts(candle_dicts)
+        assert candles.to_dicts() == candle_dicts
+        assert list(candles) == candle_dicts
+
+    def test_indexing(self, candle_dicts):
+        candles = Candles.from_dicts(candle_dicts)
+        assert candles[-1] == candle_dicts[-1]
+
+        tail = candles[-2:]
+        assert isinstance(tail, Candles)
+        assert len(tail) == 2
+        assert tail.timestamp[0] == candle_dicts[1]['timestamp']
+
+    def test_optional_columns(self):
+        candles = Candles.from_dicts([{'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5}])
+        assert candles.timestamp is None
+        assert candles.volume is None
+        assert candles[0] == {'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5}
+
+    def test_empty(self):
+        candles = Candles.from_ohlcv([])
+        assert len(candles) == 0
+        assert not candles
+
+    def test_coerce(self, candle_dicts):
+        candles = Candles.from_dicts(candle_dicts)
+        assert Candles.coerce(candles) is candles
+        assert np.array_equal(Candles.coerce(candle_dicts).close, candles.close)
+
+    def test_astype_float32(self, candle_dicts):
+        candles = Candles.from_dicts(candle_dicts).astype(np.float32)
+        assert candles.high.dtype == np.float32
+        assert candles.volume.dtype == np.float32
+        assert candles.timestamp.dtype == np.int64
+        assert candles[1] == candle_dicts[1]
+
+
+class TestDataStreamerCandles:
+
+    @pytest.fixture
+    def streamer(self, rows):
+        config = {
+            'symbols': ['BTCUSDT'],
+            'timeframes': ['M5'],
+            'data_streaming': {}
+        }
+        streamer = DataStreamer(None, config)
+        for record in streamer._to_records(rows, 'BTCUSDT', 'M5'):
+            streamer._append_candle('BTCUSDT', 'M5', record)
+        return streamer
+
+    def test_get_candles_returns_columns(self, streamer, rows):
+        candles = streamer.get_candles('BTCUSDT', 'M5', count=2)
+        assert isinstance(candles, Candles)
+        assert candles.close.tolist() == [rows[1][4], rows[2][4]]
+        assert candles.timestamp.tolist() == [rows[1][0], rows[2][0]]
+
+    def test_get_candles_unknown_symbol(self, streamer):
+        assert len(streamer.get_candles('ETHUSDT', 'M5')) == 0
+
+    def test_get_latest_candle(self, streamer, rows):
+        assert streamer.get_latest_candle('BTCUSDT', 'M5')['close'] == rows[2][4]
+        assert streamer.get_latest_candle('ETHUSDT', 'M5') is None
+
+    def test_ring_buffer_wraps(self, rows):
+        config = {'symbols': ['BTCUSDT'], 'timeframes': ['M5'], 'data_streaming': {'candle_cache_size': 4}}
+        streamer = DataStreamer(None, config)
+        for i in range(10):
+            streamer._append_candle('BTCUSDT', 'M5', {
+                'timestamp': i, 'open': i, 'high': i + 1.0, 'low': i - 1.0, 'close': float(i), 'volume': 1.0
+            })
+
+        assert streamer.get_cache_size('BTCUSDT', 'M5') == 4
+        assert streamer.get_candles('BTCUSDT', 'M5').close.tolist() == [6.0, 7.0, 8.0, 9.0]
+        assert streamer.get_candles('BTCUSDT', 'M5', count=3).timestamp.tolist() == [7, 8, 9]
+        assert streamer.get_candles('BTCUSDT', 'M5').close.flags['C_CONTIGUOUS']
+
+    def test_to_records_drops_invalid_rows(self, streamer, rows):
+        bad = [
+            [1700000900000, 100.0, 99.0, 98.0, 100.5, 1.0],
+            [1700001200000, 100.0, 101.0, 99.0, 100.5, -1.0],
+            [1700001500000, 100.0, 101.0, 99.0, None, 1.0]
+        ]
+        records = streamer._to_records(rows + bad, 'BTCUSDT', 'M5')
+
+        assert records['timestamp'].tolist() == [r[0] for r in rows]
+        assert records.dtype == streamer.candles_cache['BTCUSDT']['M5'].dtype
+
+    def test_aggregate_higher_timeframe(self):
+        config = {'symbols': ['BTCUSDT'], 'timeframes': ['M5', 'M15'], 'data_streaming': {}}
+        streamer = DataStreamer(None, config)
+        for i in range(7):
+            streamer._append_candle('BTCUSDT', 'M5', {
+                'timestamp': 900_000 + i * 300_000, 'open': 10.0 + i, 'high': 20.0 + i,
+                'low': 5.0 - i, 'close': 11.0 + i, 'volume': 1.0
+            })
+        streamer._aggregate_timeframe('BTCUSDT', 'M5', 'M15', 900_000)
+
+        m15 = streamer.get_candles('BTCUSDT', 'M15')
+        assert m15.timestamp.tolist() == [900_000, 1_800_000, 2_700_000]
+        assert m15.open.tolist() == [10.0, 13.0, 16.0]
+        assert m15.high.tolist() == [22.0, 25.0, 26.0]
+        assert m15.low.tolist() == [3.0, 0.0, -1.0]
+        assert m15.close.tolist() == [13.0, 16.0, 17.0]
+        assert m15.volume.tolist() == [3.0, 3.0, 1.0]
+
+    def test_repeated_timestamp_updates_forming_candle(self, streamer, rows):
+        formed = streamer._to_records([rows[2][:2] + [106.0, 100.2, 105.0, 9.0], rows[0]], 'BTCUSDT', 'M5')
+        for record in formed:
+            streamer._append_candle('BTCUSDT', 'M5', record)
+
+        assert streamer.get_cache_size('BTCUSDT', 'M5') == 3
+        assert streamer.get_latest_candle('BTCUSDT', 'M5')['close'] == 105.0
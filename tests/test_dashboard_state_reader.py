@@ -0,0 +1,133 @@
+import pytest
+import json
+import sys
+
+sys.path.insert(0, '/app/hydra_x_v2_1804')
+
+from modules.dashboard_state_reader import DashboardStateReader
+from utils import jsonl_tail, read_jsonl_tail
+
+
+def make_trade(i):
+    return {
+        'symbol': 'BTCUSDT',
+        'direction': 'LONG' if i % 2 else 'SHORT',
+        'entry_price': 100.0 + i,
+        'exit_price': 101.0 + i,
+        'position_size': 1.0,
+        'entry_time': f"2025-01-01T{i % 24:02d}:{i % 60:02d}:00",
+        'exit_time': f"2025-01-02T{i % 24:02d}:{i % 60:02d}:00",
+        'exit_reason': 'TP1'
+    }
+
+
+@pytest.fixture
+def reader(tmp_path):
+    return DashboardStateReader(str(tmp_path))
+
+
+class TestJsonlTail:
+
+    @pytest.mark.parametrize("chunk_size", [7, 64, 8192])
+    def test_tail_matches_full_parse(self, tmp_path, chunk_size):
+        trades = [make_trade(i) for i in range(200)]
+        path = tmp_path / "trades.jsonl"
+        path.write_text("".join(json.dumps(t) + "\n" for t in trades))
+
+        assert read_jsonl_tail(path, 50, chunk_size=chunk_size) == trades[-50:]
+        assert read_jsonl_tail(path, 500, chunk_size=chunk_size) == trades
+
+    def test_tail_skips_partial_last_line(self, tmp_path):
+        path = tmp_path / "trades.jsonl"
+        path.write_text(json.dumps(make_trade(1)) + "\n" + '{"symbol": "BTC')
+
+        assert read_jsonl_tail(path, 5) == [make_trade(1)]
+
+    def test_tail_reports_reaching_start(self, tmp_path):
+        path = tmp_path / "trades.jsonl"
+        path.write_text("".join(json.dumps(make_trade(i)) + "\n" for i in range(10)) + '{"symbol": "BTC')
+
+        assert jsonl_tail(path, 10, chunk_size=16) == ([make_trade(i) for i in range(10)], True)
+        assert jsonl_tail(path, 9, chunk_size=16) == ([make_trade(i) for i in range(1, 10)], False)
+
+    def test_tail_empty_file(self, tmp_path):
+        path = tmp_path / "trades.jsonl"
+        path.write_text("")
+        assert read_jsonl_tail(path, 5) == []
+
+
+class TestSnapshot:
+
+    def test_snapshot_parses_changed_files(self, reader, tmp_path):
+        (tmp_path / "open_positions.json").write_text(json.dumps([]))
+        (tmp_path / "trend_cache.json").write_text(json.dumps({"BTCUSDT": {"trend": "BULLISH"}}))
+
+        versions = reader.snapshot()
+        assert set(versions) == {"open_positions.json", "trend_cache.json"}
+        assert reader._json_cache[tmp_path / "trend_cache.json"][2] == {"BTCUSDT": {"trend": "BULLISH"}}
+        assert reader.read_trend_data() == {"BTCUSDT": {"trend": "BULLISH"}}
+
+    def test_snapshot_changes_when_file_rewritten(self, reader, tmp_path):
+        state = tmp_path / "trend_cache.json"
+        state.write_text(json.dumps({}))
+        first = reader.snapshot()
+
+        state.write_text(json.dumps({"XAUTUSDT": {"trend": "BEARISH"}}))
+        assert reader.snapshot() != first
+        assert reader.read_trend_data() == {"XAUTUSDT": {"trend": "BEARISH"}}
+
+    def test_corrupted_file_reports_unavailable(self, reader, tmp_path):
+        state_file = tmp_path / "daily_summary_state.json"
+        state_file.write_text(json.dumps({"balance": 1000.0}))
+        assert reader.read_account_metrics()["available"] is True
+
+        state_file.write_text('{"balance": 10')
+        assert reader.read_json_safe(state_file) is None
+        assert reader._file_version(state_file) == (0, 0)
+        assert reader.read_account_metrics()["available"] is False
+
+class TestReadTradeHistory:
+
+    def test_prefers_jsonl(self, reader, tmp_path):
+        (tmp_path / "trade_history.json").write_text(json.dumps([make_trade(0)]))
+        (tmp_path / "trade_history.jsonl").write_text("".join(json.dumps(make_trade(i)) + "\n" for i in range(1, 80)))
+
+        trades = reader.read_trade_history(limit=50)
+        assert len(trades) == 50
+        assert {t['entry_price'] for t in trades} == {100.0 + i for i in range(30, 80)}
+
+    def test_short_jsonl_is_filled_from_legacy(self, reader, tmp_path):
+        (tmp_path / "trade_history.json").write_text(json.dumps([make_trade(i) for i in range(40)]))
+        (tmp_path / "trade_history.jsonl").write_text("".join(json.dumps(make_trade(i)) + "\n" for i in range(40, 45)))
+
+        trades = reader.read_trade_history(limit=20)
+        assert [t['entry_price'] for t in trades] == [100.0 + i for i in range(44, 24, -1)]
+
+        (tmp_path / "trade_history.json").write_text(json.dumps([make_trade(i) for i in range(10, 40)]))
+        trades = reader.read_trade_history(limit=50)
+        assert len(trades) == 35
+
+    def test_torn_last_line_does_not_pull_in_legacy(self, reader, tmp_path):
+        (tmp_path / "trade_history.json").write_text(json.dumps([make_trade(0)]))
+        (tmp_path / "trade_history.jsonl").write_text(
+            "".join(json.dumps(make_trade(i)) + "\n" for i in range(1, 51)) + '{"symbol": "BTC')
+
+        trades = reader.read_trade_history(limit=50)
+        assert {t['entry_price'] for t in trades} == {100.0 + i for i in range(1, 51)}
+
+    def test_falls_back_to_legacy_json(self, reader, tmp_path):
+        (tmp_path / "trade_history.json").write_text(json.dumps([make_trade(i) for i in range(3)]))
+
+        trades = reader.read_trade_history(limit=50)
+        assert [t['entry_time'] for t in trades] == sorted((make_trade(i)['entry_time'] for i in range(3)), reverse=True)
+
+    def test_pnl_and_duration(self, reader, tmp_path):
+        (tmp_path / "trade_history.jsonl").write_text(json.dumps(make_trade(1)) + "\n" + json.dumps(make_trade(2)) + "\n")
+
+        by_direction = {t['direction']: t for t in reader.read_trade_history()}
+        assert by_direction['LONG']['pnl'] == pytest.approx(1.0)
+        assert by_direction['SHORT']['pnl'] == pytest.approx(-1.0)
+        assert by_direction['LONG']['duration'] == "24:00"
+
+    def test_missing_history(self, reader):
+        assert reader.read_trade_history() == []
@@ -0,0 +1,251 @@
+import pytest
+import asyncio
+import sys
+from unittest.mock import AsyncMock
+
+sys.path.insert(0, '/app/hydra_x_v2_1804')
+
+from modules.candles import Candles
+from modules.exchange_connector import ExchangeConnector, TokenBucket
+
+
+@pytest.fixture
+def connector():
+    config = {
+        'exchange': 'bybit',
+        'symbols': ['BTCUSDT'],
+        'api': {'testnet': True}
+    }
+    connector = ExchangeConnector(config)
+    connector.exchange = AsyncMock()
+    connector.exchange_name = 'bybit'
+    return connector
+
+
+class TestExchangeConnector:
+
+    @pytest.mark.asyncio
+    async def test_fetch_ohlcv_awaits_exchange(self, connector):
+        connector.exchange.fetch_ohlcv.return_value = [[1, 2, 3, 1, 2, 10]]
+
+        result = await connector.fetch_ohlcv('BTCUSDT', 'M5', limit=1)
+
+        assert result == [[1, 2, 3, 1, 2, 10]]
+        connector.exchange.fetch_ohlcv.assert_awaited_once_with('BTCUSDT', '5', limit=1)
+
+    @pytest.mark.asyncio
+    async def test_fetch_candles_returns_columns(self, connector):
+        connector.exchange.fetch_ohlcv.return_value = [[1000, 1.0, 2.0, 0.5, 1.5, 10.0], [2000, 1.5, 2.5, 1.0, 2.0, 12.0]]
+
+        candles = await connector.fetch_candles('BTCUSDT', 'M5', limit=2)
+
+        assert isinstance(candles, Candles)
+        assert candles.close.tolist() == [1.5, 2.0]
+        assert candles.timestamp.tolist() == [1000, 2000]
+
+    @pytest.mark.asyncio
+    async def test_fetch_ohlcv_many_keeps_order_and_isolates_errors(self, connector):
+        async def fetch(symbol, timeframe, limit):
+            if symbol == 'XAUTUSDT':
+                raise RuntimeError("rate limited")
+            return [[symbol, timeframe]]
+        connector.exchange.fetch_ohlcv.side_effect = fetch
+
+        results = await connector.fetch_ohlcv_many([('BTCUSDT', 'M5'), ('XAUTUSDT', 'M5'), ('BTCUSDT', 'H1')])
+
+        assert results[0] == [['BTCUSDT', '5']]
+        assert isinstance(results[1], RuntimeError)
+        assert results[2] == [['BTCUSDT', '60']]
+
+    @pytest.mark.asyncio
+    async def test_fetch_ticker_reuses_fresh_result(self, connector):
+        connector.exchange.fetch_ticker.return_value = {'last': 100.0}
+
+        first = await connector.fetch_ticker('BTCUSDT')
+        second = await connector.fetch_ticker('BTCUSDT')
+
+        assert first == second == {'last': 100.0}
+        connector.exchange.fetch_ticker.assert_awaited_once_with('BTCUSDT')
+
+    @pytest.mark.asyncio
+    async def test_fetch_ticker_refetches_after_ttl(self, connector):
+        connector.ticker_ttl = 0
+        connector.exchange.fetch_ticker.side_effect = [{'last': 100.0}, {'last': 101.0}]
+
+        assert (await connector.fetch_ticker('BTCUSDT'))['last'] == 100.0
+        assert (await connector.fetch_ticker('BTCUSDT'))['last'] == 101.0
+
+    @pytest.mark.asyncio
+    async def test_streams_feed_caches_and_stop_on_close(self, connector, monkeypatch):
+        monkeypatch.setattr('modules.exchange_connector.HAS_CCXT_PRO', True)
+        connector.exchange.has = {'watchTicker': True, 'watchOHLCV': True}
+
+        async def watch_ticker(symbol):
+            await asyncio.sleep(0.001)
+            return {'last': 42.0}
+
+        async def watch_ohlcv(symbol, timeframe):
+            await asyncio.sleep(0.001)
+            return [[i, 1, 2, 0, 1, 5] for i in range(10)]
+
+        connector.exchange.watch_ticker.side_effect = watch_ticker
+        connector.exchange.watch_ohlcv.side_effect = watch_ohlcv
+
+        assert connector.start_streams(['BTCUSDT'], ['M5'])
+        await asyncio.sleep(0.01)
+
+        assert (await connector.fetch_ticker('BTCUSDT'))['last'] == 42.0
+        assert await connector.fetch_ohlcv('BTCUSDT', 'M5', limit=3) == [[i, 1, 2, 0, 1, 5] for i in range(7, 10)]
+        connector.exchange.fetch_ticker.assert_not_awaited()
+        connector.exchange.fetch_ohlcv.assert_not_awaited()
+
+        await connector.close()
+        assert connector._stream_tasks == []
+
+    @pytest.mark.asyncio
+    async def test_stream_updates_merge_into_rest_history(self, connector, monkeypatch):
+        monkeypatch.setattr('modules.exchange_connector.HAS_CCXT_PRO', True)
+        connector.exchange.has = {'watchTicker': True, 'watchOHLCV': True}
+        updates = asyncio.Queue()
+
+        async def watch_ohlcv(symbol, timeframe):
+            update = await updates.get()
+            if isinstance(update, Exception):
+                raise update
+            return update
+
+        async def watch_ticker(symbol):
+            await asyncio.Event().wait()
+
+        connector.exchange.watch_ohlcv.side_effect = watch_ohlcv
+        connector.exchange.watch_ticker.side_effect = watch_ticker
+        connector.exchange.fetch_ohlcv.return_value = [[i, 1, 2, 0, 1, 5] for i in range(5)]
+        connector.start_streams(['BTCUSDT'], ['M5'])
+
+        updates.put_nowait([[4, 1, 3, 0, 2, 6]])
+        await asyncio.sleep(0.01)
+        await connector.fetch_ohlcv('BTCUSDT', 'M5', limit=5)
+        updates.put_nowait([[5, 2, 2, 1, 1, 1]])
+        await asyncio.sleep(0.01)
+
+        assert await connector.fetch_ohlcv('BTCUSDT', 'M5', limit=6) == \
+            [[i, 1, 2, 0, 1, 5] for i in range(4)] + [[4, 1, 3, 0, 2, 6], [5, 2, 2, 1, 1, 1]]
+        assert connector.exchange.fetch_ohlcv.await_count == 1
+
+        updates.put_nowait(RuntimeError("disconnected"))
+        await asyncio.sleep(0.01)
+        assert ('BTCUSDT', 'M5') not in connector._ohlcv_cache
+        await connector.close()
+
+    @pytest.mark.asyncio
+    async def test_close_releases_exchange(self, connector):
+        exchange = connector.exchange
+
+        await connector.close()
+
+        exchange.close.assert_awaited_once()
+        assert connector.exchange is None
+        await connector.close()
+
+    @pytest.mark.asyncio
+    async def test_get_shared_connects_once_per_account(self, monkeypatch):
+        connects = []
+
+        async def connect(self):
+            connects.append(self)
+            self.exchange = AsyncMock()
+            return True
+
+        monkeypatch.setattr(ExchangeConnector, 'connect', connect)
+        monkeypatch.setattr('modules.exchange_connector._INSTANCES', {})
+        config = {'exchange': 'Bybit', 'symbols': ['BTCUSDT'], 'api': {'api_key': 'k1'}}
+
+        first, second = await asyncio.gather(ExchangeConnector.get_shared(config), ExchangeConnector.get_shared(config))
+        other = await ExchangeConnector.get_shared(dict(config, api={'api_key': 'k2'}))
+
+        assert first is second
+        assert other is not first
+        assert len(connects) == 2
+
+    @pytest.mark.asyncio
+    async def test_connection_test_primes_ticker_cache(self, connector):
+        connector.config['symbols'] = ['BTCUSDT', 'XAUTUSDT', 'ETHUSDT']
+
+        async def fetch_ticker(symbol):
+            if symbol == 'ETHUSDT':
+                raise RuntimeError("unknown symbol")
+            return {'symbol': symbol, 'last': 1.0}
+
+        connector.exchange.fetch_ticker.side_effect = fetch_ticker
+
+        await connector._test_connection()
+        assert (await connector.fetch_ticker('XAUTUSDT'))['symbol'] == 'XAUTUSDT'
+        assert connector.exchange.fetch_ticker.await_count == 3
+        assert 'ETHUSDT' not in connector._ticker_cache
+
+    @pytest.mark.asyncio
+    async def test_connection_test_fails_when_no_ticker_loads(self, connector):
+        connector.exchange.fetch_ticker.side_effect = RuntimeError("down")
+
+        with pytest.raises(Exception, match="Connection test failed"):
+            await connector._test_connection()
+
+    @pytest.mark.asyncio
+    async def test_connection_test_requires_symbols(self, connector):
+        connector.config['symbols'] = []
+
+        with pytest.raises(Exception, match="no symbols configured"):
+            await connector._test_connection()
+        connector.exchange.fetch_ticker.assert_not_awaited()
+
+
+class TestTokenBucket:
+
+    @pytest.mark.asyncio
+    async def test_burst_then_rate_limited(self):
+        bucket = TokenBucket(rate=100, burst=5)
+        loop = asyncio.get_running_loop()
+
+        start = loop.time()
+        for _ in range(5):
+            await bucket.acquire()
+        assert loop.time() - start < 0.02
+
+        await asyncio.gather(*(bucket.acquire() for _ in range(5)))
+        assert loop.time() - start >= 0.045
+
+    @pytest.mark.asyncio
+    async def test_connectors_for_one_account_share_a_bucket(self, monkeypatch):
+        monkeypatch.setattr('modules.exchange_connector._BUCKETS', {})
+        config = {'exchange': 'bybit', 'symbols': ['BTCUSDT'], 'api': {'api_key': 'k'},
+                  'exchange_rate_limit': 10, 'exchange_endpoint_weights': {'fetch_ohlcv': 2}}
+
+        first, second = ExchangeConnector(config), ExchangeConnector(config)
+        assert first._bucket is second._bucket
+        assert ExchangeConnector(dict(config, exchange_rate_limit=None))._bucket is None
+
+        first.exchange = AsyncMock()
+        first.exchange_name = 'bybit'
+        await first.fetch_ohlcv('BTCUSDT', 'M5', limit=1)
+        assert first._bucket._tokens == pytest.approx(8, abs=0.1)
+
+    @pytest.mark.asyncio
+    async def test_try_connect_copies_base_config(self, monkeypatch):
+        import modules.exchange_connector as module
+        created = []
+
+        def okx(config):
+            created.append(config)
+            exchange = AsyncMock()
+            exchange.fetch_ticker.return_value = {'last': 1.0}
+            return exchange
+
+        monkeypatch.setattr(module.ccxt_pro if module.HAS_CCXT_PRO else module.ccxt_async, 'okx', okx)
+        connector = ExchangeConnector({'exchange': 'okx', 'symbols': ['BTCUSDT'],
+                                       'api': {'api_key': 'k', 'passphrase': 'p', 'rate_limit_ms': 50, 'testnet': False}})
+
+        assert await connector._try_connect('okx')
+        assert created[0] == {'apiKey': 'k', 'secret': '', 'enableRateLimit': True, 'timeout': 30000,
+                              'rateLimit': 50, 'password': 'p'}
+        assert 'password' not in connector._base_exchange_config
+        assert connector._convert_timeframe('H1') == '1h'
@@ -0,0 +1,206 @@
+import pytest
+import numpy as np
+import sys
+
+sys.path.insert(0, '/app/hydra_x_v2_1804')
+
+import indicators
+
+
+def reference_ema_series(prices, period):
+    if len(prices) < period:
+        return [None] * len(prices)
+    multiplier = 2.0 / (period + 1)
+    values = [None] * (period - 1)
+    ema = float(np.mean(prices[:period]))
+    values.append(ema)
+    for price in prices[period:]:
+        ema = (price - ema) * multiplier + ema
+        values.append(ema)
+    return values
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(7)
+    return list(50000.0 + np.cumsum(rng.normal(0, 25, 300)))
+
+
+class TestEMA:
+
+    def test_ema_series_matches_reference(self, prices):
+        expected = reference_ema_series(prices, 50)
+        result = indicators.calculate_ema_series(prices, 50)
+
+        assert len(result) == len(prices)
+        assert result[:49] == [None] * 49
+        assert np.allclose(result[49:], expected[49:], rtol=1e-12)
+
+    def test_ema_last_value_matches_series(self, prices):
+        series = indicators.calculate_ema_series(prices, 200)
+        assert indicators.calculate_ema(prices, 200) == pytest.approx(series[-1], rel=1e-12)
+
+    def test_ema_insufficient_data(self):
+        assert indicators.calculate_ema([1.0, 2.0], 5) is None
+        assert indicators.calculate_ema_series([1.0, 2.0], 5) == [None, None]
+
+    def test_ema_period_equals_length(self):
+        prices = [1.0, 2.0, 3.0]
+        assert indicators.calculate_ema(prices, 3) == pytest.approx(2.0)
+        assert indicators.calculate_ema_series(prices, 3) == [None, None, pytest.approx(2.0)]
+
+
+def reference_atr(candles, period):
+    if len(candles) < period:
+        return None
+    true_ranges = []
+    for i in range(1, len(candles)):
+        high, low, prev_close = candles[i]['high'], candles[i]['low'], candles[i - 1]['close']
+        true_ranges.append(max(high - low, abs(high - prev_close), abs(low - prev_close)))
+    if len(true_ranges) < period:
+        return None
+    return float(np.mean(true_ranges[-period:]))
+
+
+@pytest.fixture
+def candles(prices):
+    rng = np.random.default_rng(11)
+    result = []
+    for close in prices:
+        open_price = close + rng.normal(0, 10)
+        result.append({
+            'open': open_price,
+            'high': max(open_price, close) + abs(rng.normal(0, 15)),
+            'low': min(open_price, close) - abs(rng.normal(0, 15)),
+            'close': close
+        })
+    return result
+
+
+class TestATR:
+
+    def test_atr_series_matches_reference(self, candles):
+        expected = [reference_atr(candles[:i + 1], 14) if i + 1 >= 14 else None for i in range(len(candles))]
+        result = indicators.calculate_atr_series(candles, 14)
+
+        assert len(result) == len(candles)
+        assert result[:14] == expected[:14] == [None] * 14
+        assert np.allclose(result[14:], expected[14:], rtol=1e-9)
+
+    def test_atr_matches_reference(self, candles):
+        assert indicators.calculate_atr(candles, 14) == pytest.approx(reference_atr(candles, 14))
+        assert indicators.calculate_atr(candles[:14], 14) is None
+
+    def test_atr_series_short_input(self, candles):
+        assert indicators.calculate_atr_series(candles[:10], 14) == [None] * 10
+        assert indicators.calculate_atr_series([], 14) == []
+
+    def test_true_range_first_candle_uses_own_range(self, candles):
+        tr = indicators.calculate_true_range(candles[:3])
+        assert tr[0] == pytest.approx(candles[0]['high'] - candles[0]['low'])
+        assert len(tr) == 3
+
+
+class TestIndicatorCache:
+
+    def test_hit_skips_recompute(self, candles):
+        cache = indicators.IndicatorCache()
+        window = [dict(c, timestamp=i) for i, c in enumerate(candles)]
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return indicators.calculate_atr(window, 14)
+
+        first = cache.get_or_compute('BTCUSDT', 'M5', 'atr', 14, window, compute)
+        second = cache.get_or_compute('BTCUSDT', 'M5', 'atr', 14, window, compute)
+
+        assert first == second
+        assert len(calls) == 1
+
+    def test_new_candle_or_updated_close_invalidates(self, candles):
+        cache = indicators.IndicatorCache()
+        window = [dict(c, timestamp=i) for i, c in enumerate(candles)]
+        cache.get_or_compute('BTCUSDT', 'M5', 'atr', 14, window[:-1], lambda: 1)
+
+        assert cache.get_or_compute('BTCUSDT', 'M5', 'atr', 14, window[1:], lambda: 2) == 2
+
+        updated = window[:-1]
+        updated[-1] = dict(updated[-1], close=updated[-1]['close'] + 1)
+        assert cache.get_or_compute('BTCUSDT', 'M5', 'atr', 14, updated, lambda: 3) == 3
+
+    def test_no_timestamp_is_not_cached(self, candles):
+        cache = indicators.IndicatorCache()
+        assert cache.get_or_compute('BTCUSDT', 'M5', 'atr', 14, candles, lambda: 1) == 1
+        assert cache.get_or_compute('BTCUSDT', 'M5', 'atr', 14, candles, lambda: 2) == 2
+
+    def test_columnar_window_shares_key_with_dicts(self, candles):
+        cache = indicators.IndicatorCache()
+        window = [dict(c, timestamp=i, volume=1.0) for i, c in enumerate(candles)]
+        cache.get_or_compute('BTCUSDT', 'M5', 'atr', 14, window, lambda: 1)
+
+        columns = indicators.Candles.from_dicts(window)
+        assert cache.get_or_compute('BTCUSDT', 'M5', 'atr', 14, columns, lambda: 2) == 1
+        assert indicators.IndicatorCache.candle_key(indicators.Candles.from_dicts(candles)) is None
+
+    def test_lru_eviction(self, candles):
+        cache = indicators.IndicatorCache(maxsize=2)
+        window = [dict(c, timestamp=i) for i, c in enumerate(candles)]
+        for period in (10, 14, 20):
+            cache.get_or_compute('BTCUSDT', 'M5', 'atr', period, window, lambda: period)
+
+        assert cache.get_or_compute('BTCUSDT', 'M5', 'atr', 10, window, lambda: 'recomputed') == 'recomputed'
+
+
+class TestPatternBatches:
+
+    @staticmethod
+    def columns(candles):
+        return [np.array([c[k] for c in candles]) for k in ('open', 'high', 'low', 'close')]
+
+    def test_engulfing_batch_matches_scalar(self, candles):
+        out = np.empty(len(candles), dtype=np.int8)
+        indicators.engulfing_batch(*self.columns(candles), out)
+
+        expected = [None] + [indicators.detect_engulfing_pattern(candles[i - 1:i + 1]) for i in range(1, len(candles))]
+        assert [indicators.ENGULFING_NAMES[code] for code in out] == expected
+        assert any(expected)
+
+    def test_pin_bar_batch_matches_scalar(self, candles):
+        out = np.empty(len(candles), dtype=np.int8)
+        indicators.pin_bar_batch(*self.columns(candles), out)
+
+        expected = [indicators.detect_pin_bar(c) for c in candles]
+        assert [indicators.PIN_BAR_NAMES[code] for code in out] == expected
+
+    def test_pin_bar_batch_zero_range(self):
+        flat = [np.array([1.0])] * 4
+        out = np.full(1, 9, dtype=np.int8)
+        indicators.pin_bar_batch(*flat, out)
+        assert out[0] == 0
+
+
+def reference_rsi(prices, period):
+    if len(prices) < period:
+        return None
+    deltas = np.diff(np.array(prices, dtype=np.float64))
+    avg_gain = np.mean(np.where(deltas > 0, deltas, 0)[-period:])
+    avg_loss = np.mean(np.where(deltas < 0, -deltas, 0)[-period:])
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else 0.0
+    return float(100 - (100 / (1 + avg_gain / avg_loss)))
+
+
+class TestRSI:
+
+    @pytest.mark.parametrize("period", [2, 14, 50])
+    def test_rsi_matches_reference(self, prices, period):
+        for end in range(period, len(prices), 17):
+            assert indicators.calculate_rsi(prices[:end], period) == pytest.approx(reference_rsi(prices[:end], period), rel=1e-9)
+
+    def test_rsi_monotonic_series(self):
+        assert indicators.calculate_rsi([float(i) for i in range(20)], 14) == 100.0
+        assert indicators.calculate_rsi([5.0] * 20, 14) == 0.0
+
+    def test_rsi_insufficient_data(self):
+        assert indicators.calculate_rsi([1.0, 2.0], 14) is None
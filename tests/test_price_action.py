@@ -0,0 +1,90 @@
+import pytest
+import numpy as np
+import sys
+
+sys.path.insert(0, '/app/hydra_x_v2_1804')
+
+import indicators
+from modules.candles import Candles
+from modules.price_action import PriceActionAnalyzer
+
+
+def candle(o, h, l, c):
+    return {'open': o, 'high': h, 'low': l, 'close': c}
+
+
+@pytest.fixture
+def analyzer():
+    return PriceActionAnalyzer()
+
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(5)
+    result = []
+    price = 100.0
+    for _ in range(60):
+        open_price = price + rng.normal(0, 1)
+        close = open_price + rng.normal(0, 1.5)
+        result.append(candle(open_price,
+                             max(open_price, close) + abs(rng.normal(0, 0.8)),
+                             min(open_price, close) - abs(rng.normal(0, 0.8)),
+                             close))
+        price = close
+    return result
+
+
+class TestPatterns:
+
+    def test_engulfing(self, analyzer):
+        result = analyzer.detect_engulfing([candle(100, 101, 99, 100.5), candle(99.5, 102, 98, 101.8)])
+        assert result['detected'] is True
+        assert result['confidence'] == pytest.approx(1.0)
+
+    def test_break_of_structure_up(self, analyzer):
+        history = [candle(100, 101, 99, 100.5)] * 4 + [candle(100.5, 103, 100.4, 102.0)]
+        result = analyzer.detect_break_of_structure(history)
+        assert result['detected'] is True
+        assert result['confidence'] == pytest.approx(1.0 / 101)
+
+    def test_sr_retest_picks_first_crossed_zone(self, analyzer):
+        history = [candle(100, 101, 99, 100.5), candle(100.5, 100.6, 99.4, 99.5)]
+        zones = [{'price': 90.0, 'strength': 0.9}, {'price': 100.0, 'strength': 0.4}, {'price': 99.8}]
+        result = analyzer.detect_sr_retest(history, zones)
+        assert result['detected'] is True
+        assert result['confidence'] == pytest.approx(0.6)
+
+    def test_short_history(self, analyzer):
+        assert analyzer.detect_morning_star([candle(1, 2, 0, 1)]) == {'detected': False, 'confidence': 0.0}
+        assert analyzer.calculate_confirmation_score([])['confirmation_count'] == 0
+
+
+class TestConfirmationScore:
+
+    def test_candles_input_matches_dicts(self, analyzer, candles):
+        ema = [c['close'] * 1.001 for c in candles]
+        zones = [{'price': candles[-1]['close'] * 1.002, 'strength': 0.5}]
+
+        for end in range(1, len(candles) + 1):
+            window = candles[:end]
+            expected = analyzer.calculate_confirmation_score(window, sr_zones=zones, ema_values=ema[:end])
+            result = analyzer.calculate_confirmation_score(Candles.from_dicts(window), sr_zones=zones, ema_values=ema[:end])
+            assert result == expected
+
+    def test_batch_matches_per_bar_scores(self, analyzer, candles):
+        ema = indicators.calculate_ema_series([c['close'] for c in candles], 12)
+        counts, scores = analyzer.confirmation_batch(candles, ema_values=ema)
+
+        for i in range(len(candles)):
+            expected = analyzer.calculate_confirmation_score(candles[:i + 1], ema_values=ema[:i + 1])
+            assert counts[i] == expected['confirmation_count']
+            assert scores[i] == pytest.approx(expected['confirmation_score'], rel=1e-12)
+        assert counts.max() >= 2
+
+    def test_batch_without_ema(self, analyzer, candles):
+        counts, scores = analyzer.confirmation_batch(candles)
+
+        for i in range(len(candles)):
+            expected = analyzer.calculate_confirmation_score(candles[:i + 1])
+            assert counts[i] == expected['confirmation_count']
+            assert scores[i] == pytest.approx(expected['confirmation_score'], rel=1e-12)
@@ -1,6 +1,7 @@
 import pytest
 import asyncio
 import json
+import numpy as np
 import tempfile
 from pathlib import Path
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
@@ -56,6 +57,14 @@ class TestRiskManager:
         
         assert position_size >= risk_manager.exchange_min_lot_size
     
+    def test_position_sizing_follows_balance_changes(self, risk_manager):
+        risk_manager.account_balance = 20000.0
+        assert risk_manager.position_size(100.0, 95.0) == pytest.approx(20000.0 * 0.0175 / 5.0)
+        
+        risk_manager.risk_percent = 2.0
+        assert risk_manager.position_size(100.0, 95.0) == pytest.approx(20000.0 * 0.02 / 5.0)
+        assert risk_manager.position_size(100.0, 99.0) == 400.0
+    
     def test_position_sizing_zero_sl_distance(self, risk_manager):
         entry_price = 100.0
         stop_loss = 100.0
@@ -64,6 +73,23 @@ class TestRiskManager:
         
         assert position_size == 0.0
     
+    def test_batches_match_scalar(self, risk_manager):
+        rng = np.random.default_rng(5)
+        entries = np.round(rng.uniform(90, 110, 200), 2)
+        stops = np.round(entries + rng.normal(0, 2, 200), 2)
+        stops[:5] = entries[:5]
+        bids = np.round(rng.uniform(-1, 110, 200), 3)
+        asks = np.round(bids + rng.normal(0.01, 0.1, 200), 3)
+        
+        sizes = risk_manager.position_size_batch(entries, stops)
+        spreads = risk_manager.spread_filter_batch(bids, asks)
+        acceptable, slippage = risk_manager.slippage_tracker_batch(bids, asks)
+        
+        for i in range(200):
+            assert sizes[i] == pytest.approx(risk_manager.position_size(entries[i], stops[i]))
+            assert spreads[i] == risk_manager.spread_filter(bids[i], asks[i])
+            assert (acceptable[i], slippage[i]) == pytest.approx(risk_manager.slippage_tracker(bids[i], asks[i]))
+    
     def test_spread_filter_valid(self, risk_manager):
         bid = 100.0
         ask = 100.005
@@ -92,6 +118,70 @@ class TestRiskManager:
             assert data['trades_today'] == 1
             assert data['winning_trades'] == 1
     
+    def test_daily_pnl_state_stays_in_memory(self, risk_manager, temp_dir):
+        risk_manager.track_daily_pnl(100.0, "BTC/USDT")
+        Path(temp_dir, "daily_pnl.json").write_text("corrupted")
+        risk_manager.track_daily_pnl(-40.0, "BTC/USDT")
+        
+        data = json.loads(Path(temp_dir, "daily_pnl.json").read_text())
+        assert data['cumulative_pnl'] == 60.0
+        assert (data['trades_today'], data['winning_trades'], data['losing_trades']) == (2, 1, 1)
+    
+    def test_daily_pnl_written_atomically(self, config, temp_dir):
+        daily_pnl_file = Path(temp_dir) / "daily_pnl.json"
+        daily_pnl_file.write_text('{"date": "torn')
+        
+        risk_manager = RiskManager(dict(config, daily_pnl_flush_interval=3600), data_dir=temp_dir)
+        risk_manager.track_daily_pnl(-10.0, "BTC/USDT")
+        risk_manager.flush_daily_pnl()
+        
+        assert not daily_pnl_file.with_suffix('.tmp').exists()
+        assert json.loads(daily_pnl_file.read_text())['cumulative_pnl'] == -10.0
+    
+    def test_write_through_skips_fsync(self, risk_manager, temp_dir):
+        with patch('modules.risk.atomic_write_bytes') as atomic_write:
+            risk_manager.track_daily_pnl(5.0, "BTC/USDT")
+        
+        atomic_write.assert_not_called()
+        assert json.loads(Path(temp_dir, "daily_pnl.json").read_text())['cumulative_pnl'] == 5.0
+    
+    def test_deferred_daily_pnl_flush(self, config, temp_dir):
+        risk_manager = RiskManager(dict(config, daily_pnl_flush_interval=3600), data_dir=temp_dir)
+        risk_manager.track_daily_pnl(25.0, "BTC/USDT")
+        risk_manager.track_daily_pnl(25.0, "BTC/USDT")
+        
+        daily_pnl_file = Path(temp_dir) / "daily_pnl.json"
+        assert json.loads(daily_pnl_file.read_text())['trades_today'] == 0
+        
+        risk_manager.flush_daily_pnl()
+        assert json.loads(daily_pnl_file.read_text())['cumulative_pnl'] == 50.0
+        assert RiskManager(config, data_dir=temp_dir).daily_loss_accumulation == 50.0
+    
+    def test_close_stops_writer_and_flushes(self, config, temp_dir):
+        risk_manager = RiskManager(dict(config, daily_pnl_flush_interval=3600), data_dir=temp_dir)
+        risk_manager.track_daily_pnl(25.0, "BTC/USDT")
+        thread = risk_manager._flush_thread
+        
+        risk_manager.close()
+        assert not thread.is_alive()
+        assert json.loads(Path(temp_dir, "daily_pnl.json").read_text())['cumulative_pnl'] == 25.0
+        
+        risk_manager.track_daily_pnl(5.0, "BTC/USDT")
+        assert risk_manager._flush_thread is None
+        assert json.loads(Path(temp_dir, "daily_pnl.json").read_text())['cumulative_pnl'] == 30.0
+    
+    def test_flush_writes_outside_state_lock(self, config, temp_dir):
+        risk_manager = RiskManager(dict(config, daily_pnl_flush_interval=3600), data_dir=temp_dir)
+        risk_manager.track_daily_pnl(25.0, "BTC/USDT")
+        
+        def save(data, durable=True):
+            assert not risk_manager._daily_lock.locked()
+        
+        with patch.object(risk_manager, '_save_daily_pnl', side_effect=save) as saved:
+            risk_manager.flush_daily_pnl()
+        saved.assert_called_once()
+        risk_manager.close()
+    
     def test_consecutive_losses_increment(self, risk_manager):
         result, reason = risk_manager.increment_consecutive_losses()
         assert result is True
@@ -192,6 +282,20 @@ class TestOrderExecutor:
         assert 0.38 <= tp2_pct <= 0.42
         assert abs(tp1_pct + tp2_pct + runner_pct - 1.0) < 0.001
     
+    def test_random_buffers_refill_when_exhausted(self, executor):
+        draws = [executor._uniform(0.28, 0.35) for _ in range(len(executor._uniform_buf) + 10)]
+        gauss = [executor._gauss(1.0, 0.01) for _ in range(len(executor._gauss_buf) + 10)]
+        
+        assert all(0.28 <= d < 0.35 for d in draws)
+        assert executor._uniform_idx == 10 and executor._gauss_idx == 10
+        assert abs(np.mean(gauss) - 1.0) < 0.001
+    
+    def test_retry_delay_is_clamped(self, executor):
+        delays = [executor.retry_delay(attempt, 0.05, 2.0, 1.0) for attempt in (1, 10) for _ in range(200)]
+        
+        assert all(0.0 <= d <= 1.0 for d in delays)
+        assert max(delays) == 1.0
+    
     def test_order_validation_spread_check(self, executor):
         bid = 100.0
         ask = 100.1
@@ -289,6 +393,31 @@ class TestFirstRunSafetyTrade:
         is_first_run, reason = safety_trade.check_first_run_status()
         assert is_first_run is True
     
+    def test_first_run_uses_last_jsonl_trade(self, safety_trade, temp_dir):
+        Path(temp_dir, "hydra_first_run.done").write_text("test")
+        old = (datetime.utcnow() - timedelta(days=60)).isoformat()
+        recent = datetime.utcnow().isoformat()
+        Path(temp_dir, "trade_history.json").write_text(json.dumps([{'close_time': recent}]))
+        Path(temp_dir, "trade_history.jsonl").write_text(
+            "".join(json.dumps({'close_time': old, 'i': i}) + "\n" for i in range(2000)) + json.dumps({'close_time': recent}) + "\n"
+        )
+        
+        assert safety_trade.check_first_run_status() == (False, "Trading history exists and recent")
+        
+        with open(Path(temp_dir, "trade_history.jsonl"), 'a') as f:
+            f.write(json.dumps({'close_time': old}) + "\n")
+        assert safety_trade.check_first_run_status()[0] is True
+    
+    def test_torn_last_line_uses_previous_trade(self, safety_trade, temp_dir):
+        Path(temp_dir, "hydra_first_run.done").write_text("test")
+        recent = datetime.utcnow().isoformat()
+        Path(temp_dir, "trade_history.jsonl").write_text(json.dumps({'close_time': recent}) + "\n" + '{"close_ti')
+        assert safety_trade.check_first_run_status() == (False, "Trading history exists and recent")
+        
+        with open(Path(temp_dir, "trade_history.jsonl"), 'a') as f:
+            f.write("me\": \n")
+        assert safety_trade.check_first_run_status() == (False, "Trading history exists and recent")
+    
     def test_marker_file_creation(self, safety_trade, temp_dir):
         safety_trade.create_marker_file()
         
@@ -342,6 +471,107 @@ class TestStateManager:
         assert len(trades) == 1
         assert trades[0]['symbol'] == 'BTC/USDT'
     
+    def test_trade_history_is_append_only_jsonl(self, state_manager, temp_dir):
+        Path(temp_dir, "trade_history.json").write_text(json.dumps([{'symbol': 'LEGACY'}]))
+        
+        for i in range(3):
+            state_manager.save_trade_history({'symbol': f'T{i}', 'pnl': i})
+        
+        lines = state_manager.trade_history_file.read_text().splitlines()
+        assert [json.loads(line)['symbol'] for line in lines] == ['T0', 'T1', 'T2']
+        assert [t['symbol'] for t in state_manager.load_trade_history()] == ['LEGACY', 'T0', 'T1', 'T2']
+    
+    def test_batched_trades_flush_on_load(self, temp_dir):
+        state_manager = StateManager(data_dir=temp_dir, batch_size=3, flush_interval=3600)
+        state_manager.save_trade_history({'symbol': 'BTC/USDT'})
+        
+        assert not state_manager.trade_history_file.exists()
+        assert len(state_manager.load_trade_history()) == 1
+        assert state_manager.trade_history_file.exists()
+    
+    def test_batch_size_without_flush_interval(self, temp_dir):
+        with patch('modules.execution.atexit.register'):
+            state_manager = StateManager(data_dir=temp_dir, batch_size=3)
+        
+        for i in range(2):
+            state_manager.save_trade_history({'symbol': f'T{i}'})
+            assert not state_manager.trade_history_file.exists()
+        
+        state_manager.save_trade_history({'symbol': 'T2'})
+        assert len(state_manager.trade_history_file.read_text().splitlines()) == 3
+    
+    def test_batched_trades_flush_at_exit(self, temp_dir):
+        with patch('modules.execution.atexit.register') as register:
+            state_manager = StateManager(data_dir=temp_dir, batch_size=3, flush_interval=3600)
+        state_manager.save_trade_history({'symbol': 'BTC/USDT'})
+        
+        register.assert_called_once_with(state_manager.flush_trade_history)
+        register.call_args.args[0]()
+        assert json.loads(state_manager.trade_history_file.read_text())['symbol'] == 'BTC/USDT'
+    
+    def test_executor_passes_batching_config(self, temp_dir):
+        config = {'trade_history_batch_size': 5, 'trade_history_flush_interval': 2.0}
+        with patch('modules.execution.atexit.register'):
+            executor = OrderExecutor(Mock(), config, data_dir=temp_dir)
+        assert executor.state_manager.batch_size == 5
+        assert executor.state_manager.flush_interval == 2.0
+    
+    def test_trade_history_is_memoized_and_parsed_incrementally(self, state_manager):
+        state_manager.save_trade_history_bulk([{'symbol': f'T{i}'} for i in range(5)])
+        state_manager.load_trade_history()
+        
+        with patch('modules.execution.json_loads', wraps=json.loads) as loads:
+            assert len(state_manager.load_trade_history()) == 5
+            assert loads.call_count == 0
+            
+            state_manager.save_trade_history({'symbol': 'T5'})
+            trades = state_manager.load_trade_history()
+            assert loads.call_count == 1
+        
+        assert [t['symbol'] for t in trades] == [f'T{i}' for i in range(6)]
+        trades.clear()
+        assert len(state_manager.load_trade_history()) == 6
+    
+    def test_trade_history_reloads_when_log_is_replaced(self, state_manager):
+        state_manager.save_trade_history_bulk([{'symbol': 'A'}, {'symbol': 'B'}])
+        state_manager.load_trade_history()
+        
+        state_manager.trade_history_file.write_bytes(b'{"symbol": "C"}\n')
+        
+        assert state_manager.load_trade_history() == [{'symbol': 'C'}]
+    
+    def test_bulk_save_appends_in_one_write(self, state_manager):
+        state_manager.save_trade_history({'symbol': 'T0'})
+        
+        with patch('modules.execution.os.fsync') as fsync:
+            state_manager.save_trade_history_bulk([{'symbol': f'T{i}'} for i in range(1, 4)])
+        
+        assert fsync.call_count == 1
+        assert [t['symbol'] for t in state_manager.load_trade_history()] == ['T0', 'T1', 'T2', 'T3']
+    
+    def test_unchanged_positions_are_not_rewritten(self, state_manager):
+        positions = [{'symbol': 'BTC/USDT', 'direction': 'BUY'}]
+        state_manager.save_open_positions(positions)
+        
+        with patch('modules.execution.atomic_write_bytes') as write:
+            state_manager.save_open_positions([dict(p) for p in positions])
+            assert write.call_count == 0
+            
+            state_manager.save_open_positions(positions + [{'symbol': 'ETH/USDT', 'direction': 'SELL'}])
+            assert write.call_count == 1
+    
+    def test_dump_json_exports_indented_state(self, state_manager, temp_dir):
+        state_manager.save_trade_history({'symbol': 'BTC/USDT', 'pnl': 1.5})
+        state_manager.save_open_positions([{'symbol': 'ETH/USDT'}])
+        
+        path = state_manager.dump_json(Path(temp_dir) / "export.json")
+        
+        assert path.read_text().startswith('{\n  ')
+        assert json.loads(path.read_text()) == {
+            'trades': [{'symbol': 'BTC/USDT', 'pnl': 1.5}],
+            'open_positions': [{'symbol': 'ETH/USDT'}]
+        }
+    
     def test_save_and_load_open_positions(self, state_manager, temp_dir):
         positions = [
             {
@@ -366,6 +596,14 @@ class TestStateManager:
         
         temp_file = state_manager.open_positions_file.with_suffix('.tmp')
         assert not temp_file.exists()
+    
+    def test_atomic_write_fsyncs_file_and_directory(self, state_manager):
+        with patch('utils.os.fsync') as fsync, patch('utils.os.replace', wraps=os.replace) as replace:
+            state_manager.save_open_positions([{'symbol': 'BTC/USDT'}])
+        
+        assert fsync.call_count == 2
+        replace.assert_called_once_with(state_manager.open_positions_file.with_suffix('.tmp'), state_manager.open_positions_file)
+        assert json.loads(state_manager.open_positions_file.read_text()) == [{'symbol': 'BTC/USDT'}]
 
 
 class TestGracefulShutdown:
@@ -0,0 +1,72 @@
+import pytest
+import numpy as np
+import sys
+
+sys.path.insert(0, '/app/hydra_x_v2_1804')
+
+from modules.candles import Candles
+from modules import signal_generator
+from modules.signal_generator import SignalGenerator
+
+
+def make_candles(n, seed, drift):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(drift / n, 1, n))
+    opens = np.concatenate([[100.0], closes[:-1]])
+    return Candles(
+        open=opens,
+        high=np.maximum(opens, closes) + np.abs(rng.normal(0, 0.3, n)),
+        low=np.minimum(opens, closes) - np.abs(rng.normal(0, 0.3, n)),
+        close=closes,
+        timestamp=np.arange(n, dtype=np.int64) * 300_000
+    )
+
+
+@pytest.fixture
+def tasks():
+    result = []
+    for symbol, seed in (('BTCUSDT', 1), ('XAUTUSDT', 2), ('ETHUSDT', 3)):
+        m15 = make_candles(250, seed + 10, 15)
+        h1 = make_candles(50, seed + 20, 15)
+        m5 = make_candles(160, seed, 15)
+        for end in (120, 140, 160):
+            result.append((symbol, m5[:end], m15, h1, 0))
+    return result
+
+
+class TestBatchSignals:
+
+    def test_matches_sequential_per_symbol(self, tasks):
+        expected = []
+        generators = {}
+        for task in tasks:
+            generator = generators.setdefault(task[0], SignalGenerator({}))
+            expected.append(generator.generate_signal(*task))
+
+        results = SignalGenerator({}).generate_signals_batch(tasks, max_workers=2)
+
+        assert [r.symbol for r in results] == [t[0] for t in tasks]
+        assert results == expected
+
+    def test_single_worker_runs_in_process(self, tasks):
+        results = SignalGenerator({}).generate_signals_batch(tasks[:3], max_workers=1)
+        assert len(results) == 3
+        assert all(r.symbol == 'BTCUSDT' for r in results)
+
+    def test_in_process_run_leaves_worker_config_alone(self, tasks, monkeypatch):
+        monkeypatch.setattr('modules.signal_generator._worker_config', None)
+        SignalGenerator({'min_signal_strength': 0.5}).generate_signals_batch(tasks[:3], max_workers=1)
+        assert signal_generator._worker_config is None
+
+
+class TestTakeProfits:
+
+    def test_multipliers_from_config(self):
+        generator = SignalGenerator({'atr_multiplier_tp1': 1.0, 'atr_multiplier_tp2': 3.0})
+        assert generator._compute_tps(100.0, 2.0, True) == (102.0, 106.0)
+        assert generator._compute_tps(100.0, 2.0, False) == (98.0, 94.0)
+
+    def test_setter_rebuilds_closure(self):
+        generator = SignalGenerator({})
+        generator.atr_multiplier_tp2 = 4.0
+        assert generator._compute_tps(100.0, 1.0, True) == (101.5, 104.0)
@@ -0,0 +1,151 @@
+import pytest
+import numpy as np
+import sys
+
+sys.path.insert(0, '/app/hydra_x_v2_1804')
+
+from modules.candles import Candles
+from modules.support_resistance import SupportResistanceDetector
+
+
+def reference_swings(candles, lookback):
+    swings = []
+    for i in range(lookback, len(candles) - lookback):
+        neighbours = [candles[i - j] for j in range(1, lookback + 1)] + [candles[i + j] for j in range(1, lookback + 1)]
+        if all(candles[i]['high'] > c['high'] for c in neighbours):
+            swings.append({'price': candles[i]['high'], 'type': 'high', 'index': i})
+        if all(candles[i]['low'] < c['low'] for c in neighbours):
+            swings.append({'price': candles[i]['low'], 'type': 'low', 'index': i})
+    return swings
+
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(21)
+    closes = np.round(100 + np.cumsum(rng.normal(0, 1, 200)), 1)
+    return [
+        {'open': float(c), 'high': float(c + round(abs(rng.normal()), 1)), 'low': float(c - round(abs(rng.normal()), 1)), 'close': float(c)}
+        for c in closes
+    ]
+
+
+class TestSwings:
+
+    @pytest.mark.parametrize("lookback", [1, 3, 5])
+    def test_matches_reference(self, candles, lookback):
+        detector = SupportResistanceDetector(lookback=lookback)
+        expected = reference_swings(candles, lookback)
+
+        assert detector.detect_swings(candles) == expected
+        assert detector.detect_swings(Candles.from_dicts(candles)) == expected
+        assert expected
+
+    def test_float32_columns(self, candles):
+        detector = SupportResistanceDetector(lookback=3)
+        columns = Candles.from_dicts(candles)
+        narrow = detector.detect_swings(columns.astype(np.float32))
+
+        assert [(s['type'], s['index']) for s in narrow] == [(s['type'], s['index']) for s in detector.detect_swings(columns)]
+
+    def test_equal_neighbour_is_not_a_swing(self):
+        flat = [{'open': 1.0, 'high': 2.0, 'low': 1.0, 'close': 1.0}] * 7
+        assert SupportResistanceDetector(lookback=3).detect_swings(flat) == []
+
+    def test_too_few_candles(self, candles):
+        assert SupportResistanceDetector(lookback=3).detect_swings(candles[:6]) == []
+
+
+class TestZoneUpdates:
+
+    def test_sliding_window_reuses_swings(self, candles):
+        columns = Candles.from_dicts([dict(c, timestamp=i * 300_000) for i, c in enumerate(candles)])
+        detector = SupportResistanceDetector(lookback=3)
+        detector._window_swings(columns[:120])
+
+        for start, end in [(5, 125), (5, 125), (20, 150), (60, 200)]:
+            assert detector._window_swings(columns[start:end]) == detector.detect_swings(columns[start:end])
+
+    def test_updated_last_candle_is_rescanned(self, candles):
+        windows = [dict(c, timestamp=i) for i, c in enumerate(candles[:100])]
+        detector = SupportResistanceDetector(lookback=2)
+        detector._window_swings(windows)
+
+        windows[-3] = dict(windows[-3], high=windows[-3]['high'] + 50)
+        swings = detector._window_swings(windows)
+
+        assert swings == detector.detect_swings(windows)
+        assert {'price': windows[-3]['high'], 'type': 'high', 'index': 97} in swings
+
+    def test_unchanged_swings_return_same_zone_list(self, candles):
+        detector = SupportResistanceDetector()
+        first = detector.update_zones(candles)
+        assert detector.update_zones(candles) is first
+
+
+class TestNearestZone:
+
+    @staticmethod
+    def zone(price, zone_type, strength):
+        return {'price': price, 'type': zone_type, 'strength': strength, 'touches': 2}
+
+    def test_matches_linear_scan(self, candles):
+        detector = SupportResistanceDetector()
+        detector.zones = [self.zone(101.0, 'resistance', 0.1), self.zone(99.0, 'support', 0.2),
+                          self.zone(103.0, 'resistance', 0.3), self.zone(99.0, 'resistance', 0.4)]
+
+        for price in np.arange(97.0, 105.0, 0.25):
+            for zone_type in (None, 'support', 'resistance'):
+                pool = [z for z in detector.zones if not zone_type or z['type'] == zone_type]
+                expected = min(pool, key=lambda z: abs(z['price'] - price))
+                assert detector.find_nearest_zone(price, zone_type)['strength'] == expected['strength']
+
+    def test_tie_goes_to_first_listed_zone(self):
+        detector = SupportResistanceDetector()
+        detector.zones = [self.zone(102.0, 'resistance', 0.1), self.zone(98.0, 'support', 0.2)]
+        assert detector.find_nearest_zone(100.0)['strength'] == 0.1
+
+    def test_index_follows_replaced_zones(self):
+        detector = SupportResistanceDetector()
+        detector.zones = [self.zone(100.0, 'support', 0.1)]
+        assert detector.find_nearest_zone(100.0, 'resistance') is None
+
+        detector.zones = [self.zone(100.0, 'resistance', 0.5)]
+        assert detector.find_nearest_zone(100.0, 'resistance')['strength'] == 0.5
+
+    def test_index_follows_reassigned_zones(self):
+        detector = SupportResistanceDetector()
+        detector.zones = [self.zone(100.0, 'support', 0.1)]
+        assert detector.find_nearest_zone(100.0, 'resistance') is None
+
+        zones = detector.zones
+        zones[0] = self.zone(100.0, 'resistance', 0.5)
+        zones.append(self.zone(90.0, 'support', 0.2))
+        detector.zones = zones
+        assert detector.find_nearest_zone(100.0, 'resistance')['strength'] == 0.5
+        assert detector.find_nearest_zone(91.0)['strength'] == 0.2
+
+
+class TestRollingZones:
+
+    @pytest.mark.parametrize("lookback", [1, 3])
+    def test_matches_full_window_scan(self, candles, lookback):
+        detector = SupportResistanceDetector(lookback=lookback, cluster_tolerance=0.002, window=60)
+        reference = SupportResistanceDetector(lookback=lookback, cluster_tolerance=0.002)
+
+        for end, candle in enumerate(candles, start=1):
+            zones = detector.on_new_candle(candle)
+            window = candles[max(0, end - 60):end]
+            assert zones == reference.cluster_zones(reference.detect_swings(window))
+
+        assert detector.get_zones() is zones
+        assert zones
+
+    def test_unchanged_swings_keep_zone_list(self, candles):
+        detector = SupportResistanceDetector(lookback=3, window=500)
+        for candle in candles[:50]:
+            detector.on_new_candle(candle)
+        zones = detector.zones
+        detector.on_new_candle(dict(candles[49]))
+        detector.on_new_candle(dict(candles[49]))
+
+        assert detector.zones is zones
@@ -0,0 +1,87 @@
+import pytest
+import sys
+
+sys.path.insert(0, '/app/hydra_x_v2_1804')
+
+from modules.candles import Candles
+from modules.sweep import LiquiditySweepDetector
+
+
+@pytest.fixture
+def detector():
+    return LiquiditySweepDetector(wick_touch_tolerance=0.001, min_closure_ratio=0.5)
+
+
+@pytest.fixture
+def candles():
+    return [
+        {'open': 100.0, 'high': 102.0, 'low': 98.0, 'close': 101.0},
+        {'open': 100.5, 'high': 103.05, 'low': 99.5, 'close': 101.8}
+    ]
+
+
+class TestDetectSweep:
+
+    def test_picks_best_touched_zone(self, detector, candles):
+        zones = [
+            {'price': 90.0, 'strength': 1.0},
+            {'price': 103.0, 'strength': 0.4},
+            {'price': 103.1, 'strength': 0.8},
+            {'price': 99.5}
+        ]
+        result = detector.detect_sweep(candles, zones)
+
+        assert result['sweep_detected'] is True
+        assert result['direction'] == 'up'
+        assert result['touched_level'] == 103.1
+        assert result['zone_strength'] == 0.8
+        assert result['score'] == pytest.approx((1 - 0.05 / 1.031 + 0.95) / 2 * 0.8)
+
+    def test_low_touch_counts_as_down(self, detector, candles):
+        result = detector.detect_sweep(candles, [{'price': 99.45, 'strength': 1.0}])
+        assert result['direction'] == 'down'
+
+    def test_close_outside_previous_range(self, detector, candles):
+        candles[-1]['close'] = 102.5
+        assert detector.detect_sweep(candles, [{'price': 103.0}])['sweep_detected'] is False
+
+    def test_columnar_input(self, detector, candles):
+        zones = [{'price': 103.0, 'strength': 0.6}]
+        from_dicts = detector.detect_sweep(candles, zones)
+        zones[0] = {'price': 50.0, 'strength': 0.6}
+        zones.append({'price': 103.0, 'strength': 0.6})
+
+        assert detector.detect_sweep(Candles.from_dicts(candles), zones) == from_dicts
+
+    def test_zone_edited_in_place(self, detector, candles):
+        zones = [{'price': 103.0, 'strength': 0.6}]
+        assert detector.detect_sweep(candles, zones)['sweep_detected'] is True
+        zones[0]['price'] = 50.0
+        assert detector.detect_sweep(candles, zones)['sweep_detected'] is False
+        assert detector.detect_sweep(candles, []) == {'sweep_detected': False, 'direction': 'none', 'score': 0.0, 'touched_level': None}
+
+
+class TestWickTouch:
+
+    def test_high_wick_wins_over_low_wick(self, detector):
+        result = detector.detect_wick_touch({'high': 100.05, 'low': 99.95}, None, 100.0)
+        assert result == {'touched': True, 'direction': 'up', 'distance': pytest.approx(0.05)}
+
+    def test_untouched_reports_nearest_wick(self, detector, candles):
+        result = detector.detect_wick_touch(candles[-1], candles[-2], 105.0)
+        assert result == {'touched': False, 'direction': 'none', 'distance': pytest.approx(1.95)}
+
+class TestClosureInside:
+
+    def test_ratio_within_previous_range(self, detector):
+        result = detector.validate_closure_inside({'open': 99.0, 'close': 99.0}, {'high': 102.0, 'low': 98.0})
+        assert result == {'inside': True, 'closure_ratio': 0.25}
+
+    def test_flat_previous_candle(self, detector):
+        result = detector.validate_closure_inside({'open': 100.0, 'close': 100.0}, {'high': 100.0, 'low': 100.0})
+        assert result == {'inside': True, 'closure_ratio': 0.5}
+
+    def test_outside_is_zero(self, detector):
+        result = detector.validate_closure_inside({'open': 97.0, 'close': 97.0}, {'high': 102.0, 'low': 98.0})
+        assert result['inside'] is False
+        assert str(result['closure_ratio']) == '0.0'
@@ -1,4 +1,5 @@
 import asyncio
+import time
 import json
 import pytest
 from pathlib import Path
@@ -8,7 +9,8 @@ from datetime import datetime, timezone
 import sys
 sys.path.insert(0, '/app/hydra_x_v2_1804')
 
-from modules.telegram import TelegramNotifier, DailySummaryTracker
+from modules.telegram import TelegramNotifier, DailySummaryTracker, _ts_hms_utc, _utc_date
+from telegram.error import RetryAfter, TimedOut
 
 
 class TestDailySummaryTracker:
@@ -103,6 +105,58 @@ class TestDailySummaryTracker:
         assert summary['trades_count'] == 2
         assert summary['daily_pnl'] == 50.0
 
+    def test_state_file_is_compact_and_replaced_atomically(self, tmp_path):
+        """Test state is written as compact JSON without leaving a temp file."""
+        state_file = tmp_path / "state.json"
+        tracker = DailySummaryTracker(str(state_file))
+        
+        tracker.record_trade(pnl=25.0, is_win=True)
+        
+        content = state_file.read_text()
+        assert json.loads(content)['trades_taken'] == 1
+        assert '\n' not in content and ': ' not in content
+        assert not (tmp_path / "state.tmp").exists()
+
+    def test_write_behind_flush(self, tmp_path):
+        """Test trades are coalesced in memory until the flush interval or force_flush."""
+        state_file = tmp_path / "state.json"
+        tracker = DailySummaryTracker(str(state_file), flush_interval=3600)
+        
+        tracker.record_trade(pnl=10.0, is_win=True)
+        tracker.record_trade(pnl=-5.0, is_win=False)
+        assert DailySummaryTracker(str(state_file)).state['trades_taken'] == 0
+        
+        tracker.force_flush()
+        assert DailySummaryTracker(str(state_file)).state['trades_taken'] == 2
+
+    def test_summary_memoized_until_state_changes(self, tmp_path):
+        """Test get_daily_summary reuses its result until a trade or reset."""
+        state_file = tmp_path / "state.json"
+        tracker = DailySummaryTracker(str(state_file))
+        tracker.record_trade(pnl=10.0, is_win=True)
+        
+        first = tracker.get_daily_summary()
+        assert tracker.get_daily_summary() is first
+        
+        tracker.record_trade(pnl=-5.0, is_win=False)
+        second = tracker.get_daily_summary()
+        assert second is not first
+        assert second['trades_count'] == 2
+        assert second['win_rate_pct'] == 50.0
+        
+        tracker.reset_daily_stats()
+        assert tracker.get_daily_summary()['trades_count'] == 0
+
+    def test_summary_rolls_over_on_new_day(self, tmp_path):
+        """Test a cached summary is not served across a date change."""
+        state_file = tmp_path / "state.json"
+        tracker = DailySummaryTracker(str(state_file))
+        tracker.record_trade(pnl=10.0, is_win=True)
+        assert tracker.get_daily_summary()['trades_count'] == 1
+        
+        tracker.state['date'] = '2000-01-01'
+        assert tracker.get_daily_summary()['trades_count'] == 0
+
     def test_max_drawdown_tracking(self, tmp_path):
         """Test max drawdown calculation."""
         state_file = tmp_path / "state.json"
@@ -114,6 +168,25 @@ class TestDailySummaryTracker:
         assert summary['max_drawdown'] > 0
 
 
+class TestTimestampCache:
+    """Test cases for the cached UTC time strings."""
+
+    def test_cached_strings_match_datetime(self):
+        """Test cached strings agree with datetime formatting."""
+        now = datetime.now(timezone.utc)
+        assert _utc_date() == now.strftime('%Y-%m-%d')
+        assert _ts_hms_utc().endswith(' UTC')
+
+    def test_reformats_on_new_second(self):
+        """Test the strings are rebuilt when the second or day changes."""
+        with patch('modules.telegram.time.time', return_value=3661.2):
+            assert _ts_hms_utc() == '01:01:01 UTC'
+            assert _utc_date() == '1970-01-01'
+        with patch('modules.telegram.time.time', return_value=86400.0 + 59.9):
+            assert _ts_hms_utc() == '00:00:59 UTC'
+            assert _utc_date() == '1970-01-02'
+
+
 class TestTelegramNotifier:
     """Test cases for TelegramNotifier."""
 
@@ -157,6 +230,21 @@ class TestTelegramNotifier:
         await notifier.initialize()
         assert notifier.enabled is False
 
+    @pytest.mark.asyncio
+    async def test_initialize_uses_pooled_request(self):
+        """Test the bot is built once with a pooled HTTPX request and initialized."""
+        config = {'telegram': {'enabled': True, 'token': 'test_token', 'chat_id': '123'}}
+        notifier = TelegramNotifier(config)
+        
+        with patch('modules.telegram.Bot') as bot_cls, patch('modules.telegram.HTTPXRequest') as request_cls:
+            bot_cls.return_value.initialize = AsyncMock()
+            await notifier.initialize()
+        
+        assert request_cls.call_args.kwargs['connection_pool_size'] == 8
+        bot_cls.assert_called_once_with(token='test_token', request=request_cls.return_value)
+        bot_cls.return_value.initialize.assert_awaited_once()
+        assert notifier.enabled is True
+
     def test_message_format_trade_entry(self):
         """Test trade entry message formatting."""
         config = {'telegram': {'enabled': True, 'token': 'test', 'chat_id': '123'}}
@@ -199,6 +287,21 @@ class TestTelegramNotifier:
         
         assert notifier.bot.send_message.called
 
+    @pytest.mark.asyncio
+    async def test_trade_entry_alert_text(self):
+        """Test the trade entry template renders every field."""
+        config = {'telegram': {'enabled': True, 'token': 'test_token', 'chat_id': '123456789'}}
+        notifier = TelegramNotifier(config)
+        notifier.bot = AsyncMock()
+        notifier.bot.send_message = AsyncMock(return_value=MagicMock())
+        
+        await notifier.trade_entry_alert('BTCUSDT', 'SHORT', 45000.126, 45500.0, 44000.0, 43000.0, 0.51234, 1.75)
+        
+        text = notifier.bot.send_message.call_args.kwargs['text']
+        assert text.startswith("🚀 *TRADE ENTRY ALERT*\n━━━━━━━━━━━━━━━━━━\n*Symbol:* `BTCUSDT`\n")
+        assert "*Direction:* 🔴 *SHORT*\n*Entry Price:* `$45000.13`\n" in text
+        assert "*Take Profit 2:* 🎯 `$43000.00` (40% close)\n*Position Size:* `0.5123`\n*Risk:* `1.75%`\n" in text
+
     @pytest.mark.asyncio
     async def test_partial_close_alert_formatting(self):
         """Test partial close alert message formatting."""
@@ -332,6 +435,22 @@ class TestTelegramNotifier:
         assert result is True
         assert call_count[0] == 3
 
+    @pytest.mark.asyncio
+    async def test_send_message_http_timeouts(self):
+        """Test per-call HTTP timeouts are passed and TimedOut is retried."""
+        config = {'telegram': {'enabled': True, 'token': 'test_token', 'chat_id': '123'}}
+        notifier = TelegramNotifier(config)
+        notifier.bot = AsyncMock()
+        notifier.bot.send_message = AsyncMock(side_effect=[TimedOut(), MagicMock()])
+        
+        with patch('modules.telegram.asyncio.sleep', new=AsyncMock()):
+            result = await notifier._send_message('Test message')
+        
+        assert result is True
+        assert notifier.bot.send_message.call_count == 2
+        assert notifier.bot.send_message.call_args.kwargs['read_timeout'] == 10
+        assert notifier.bot.send_message.call_args.kwargs['write_timeout'] == 10
+
     @pytest.mark.asyncio
     async def test_send_message_disabled(self):
         """Test send message when Telegram is disabled."""
@@ -383,6 +502,55 @@ class TestTelegramNotifier:
         
         assert result is False
 
+    @pytest.mark.asyncio
+    async def test_alerts_are_queued_for_sender(self):
+        """Test alerts return immediately and the sender task delivers them in order."""
+        config = {'telegram': {'enabled': True, 'token': 'test_token', 'chat_id': '123'}}
+        notifier = TelegramNotifier(config)
+        notifier.bot = AsyncMock()
+        notifier._queue = asyncio.Queue(maxsize=256)
+        
+        await notifier.error_alert("first")
+        await notifier.error_alert("second")
+        assert notifier.bot.send_message.call_count == 0
+        assert notifier._queue.qsize() == 2
+        
+        notifier._sender_task = asyncio.create_task(notifier._drain())
+        await asyncio.wait_for(notifier._queue.join(), timeout=1.0)
+        
+        texts = [call.kwargs['text'] for call in notifier.bot.send_message.call_args_list]
+        assert "first" in texts[0] and "second" in texts[1]
+        await notifier.shutdown()
+        assert notifier._sender_task is None
+
+    @pytest.mark.asyncio
+    async def test_queue_full_drops_message(self):
+        """Test a full queue drops the alert instead of blocking the caller."""
+        config = {'telegram': {'enabled': True, 'token': 'test_token', 'chat_id': '123'}}
+        notifier = TelegramNotifier(config)
+        notifier.bot = AsyncMock()
+        notifier._queue = asyncio.Queue(maxsize=1)
+        
+        await notifier.error_alert("kept")
+        await notifier.error_alert("dropped")
+        
+        assert notifier._queue.qsize() == 1
+        assert "kept" in notifier._queue.get_nowait()
+
+    @pytest.mark.asyncio
+    async def test_retry_after_sets_cooldown(self):
+        """Test RetryAfter records a cooldown that later sends honor."""
+        config = {'telegram': {'enabled': True, 'token': 'test_token', 'chat_id': '123'}}
+        notifier = TelegramNotifier(config)
+        notifier.bot = AsyncMock()
+        notifier.bot.send_message = AsyncMock(side_effect=[RetryAfter(1), MagicMock()])
+        
+        with patch('modules.telegram.asyncio.sleep', new=AsyncMock()):
+            result = await notifier._send_message('Test message')
+        
+        assert result is True
+        assert notifier._retry_until > time.monotonic()
+
     @pytest.mark.asyncio
     async def test_shutdown(self):
         """Test graceful shutdown."""
@@ -401,6 +569,18 @@ class TestTelegramNotifier:
         
         assert notifier.bot.close.called
 
+    @pytest.mark.asyncio
+    async def test_shutdown_releases_client_when_close_fails(self):
+        """Test the HTTP client is shut down even if the Bot API rejects close."""
+        config = {'telegram': {'enabled': True, 'token': 'test_token', 'chat_id': '123'}}
+        notifier = TelegramNotifier(config)
+        notifier.bot = AsyncMock()
+        notifier.bot.close = AsyncMock(side_effect=RetryAfter(600))
+        
+        await notifier.shutdown()
+        
+        notifier.bot.shutdown.assert_awaited_once()
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
\ No newline at end of file
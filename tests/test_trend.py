@@ -0,0 +1,96 @@
+import pytest
+import numpy as np
+import sys
+
+sys.path.insert(0, '/app/hydra_x_v2_1804')
+
+from modules.candles import CANDLE_DTYPE, Candles
+from modules.trend import TrendAnalyzer
+
+
+def reference_ema(closes, period):
+    ema = np.zeros(len(closes))
+    multiplier = 2.0 / (period + 1)
+    ema[period - 1] = np.mean(closes[:period])
+    for i in range(period, len(closes)):
+        ema[i] = closes[i] * multiplier + ema[i - 1] * (1 - multiplier)
+    return ema
+
+
+@pytest.fixture
+def analyzer():
+    return TrendAnalyzer(ema_fast=50, ema_slow=200)
+
+
+@pytest.fixture
+def closes():
+    rng = np.random.default_rng(11)
+    return np.round(100 + np.cumsum(rng.normal(0.05, 1, 400)), 2)
+
+
+class TestEma:
+
+    @pytest.mark.parametrize("period", [1, 14, 50, 200])
+    def test_matches_reference_loop(self, analyzer, closes, period):
+        assert np.array_equal(analyzer.calculate_ema(closes, period), reference_ema(closes, period))
+
+    def test_accepts_lists(self, analyzer, closes):
+        assert np.array_equal(analyzer.calculate_ema(closes.tolist(), 50), reference_ema(closes, 50))
+
+    def test_too_short(self, analyzer, closes):
+        assert analyzer.calculate_ema(closes[:10], 14) is None
+
+
+class TestAnalyzeTrend:
+
+    def test_fused_pair_matches_full_series(self, analyzer, closes):
+        result = analyzer.analyze_trend([{'close': c} for c in closes])
+        assert result['ema50'] == reference_ema(closes, 50)[-1]
+        assert result['ema200'] == reference_ema(closes, 200)[-1]
+        assert result['trend'] == 'bullish'
+
+    def test_fast_period_longer_than_slow(self, closes):
+        assert TrendAnalyzer._ema_last_pair(closes, 30, 10) == (reference_ema(closes, 30)[-1], reference_ema(closes, 10)[-1])
+        assert TrendAnalyzer._ema_last_pair(closes[:20], 30, 10) is None
+
+    def test_short_history_is_ranging(self, analyzer, closes):
+        assert analyzer.analyze_trend([{'close': c} for c in closes[:199]])['trend'] == 'ranging'
+
+    def test_columnar_inputs(self, analyzer, closes):
+        records = np.zeros(len(closes), dtype=CANDLE_DTYPE)
+        records['close'] = closes
+        expected = analyzer.analyze_trend([{'close': c} for c in closes])
+
+        assert analyzer.analyze_trend(closes) == expected
+        assert analyzer.analyze_trend(records) == expected
+        assert analyzer.analyze_trend(Candles.from_records(records)) == expected
+
+    def test_calls_do_not_share_state(self, analyzer, closes):
+        analyzer.analyze_trend(closes[:300])
+        updated = closes[1:301].copy()
+        updated[-1] += 3.0
+
+        result = analyzer.analyze_trend(updated)
+        assert result['ema50'] == reference_ema(updated, 50)[-1]
+        assert result['ema200'] == reference_ema(updated, 200)[-1]
+
+
+class TestH1BiasBatch:
+
+    def test_batch_matches_scalar(self, analyzer):
+        rng = np.random.default_rng(11)
+        opens = 100 + rng.normal(0, 1, 50)
+        closes = opens + rng.normal(0, 1, 50)
+        highs = np.maximum(opens, closes) + np.abs(rng.normal(0, 0.5, 50))
+        lows = np.minimum(opens, closes) - np.abs(rng.normal(0, 0.5, 50))
+        highs[:3] = lows[:3] = opens[:3] = closes[:3] = 100.0
+        opens[3], closes[3], highs[3], lows[3] = 101.0, 99.0, 102.0, 98.0
+
+        batch = analyzer.analyze_h1_bias_batch(opens, highs, lows, closes)
+        bias_names = {1: 'bullish', -1: 'bearish', 0: 'neutral'}
+
+        for i in range(50):
+            scalar = analyzer.analyze_h1_bias({'open': opens[i], 'high': highs[i], 'low': lows[i], 'close': closes[i]})
+            assert bias_names[int(batch['bias'][i])] == scalar['bias']
+            assert batch['body_position'][i] == scalar['body_position']
+            assert batch['candle_range'][i] == scalar.get('candle_range', 0.0)
@@ -4,6 +4,7 @@ import json
 import logging
 import asyncio
 import signal
+import time
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -11,6 +12,24 @@ import yaml
 from dotenv import load_dotenv
 import colorlog
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit when numba is not installed."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 load_dotenv()
 
 _shutdown_event = None
@@ -142,19 +161,143 @@ def validate_ohlc_data(candle: Dict[str, float]) -> bool:
     
     return True
 
+def json_dumps(data: Any, indent: bool = False, default=None, newline: bool = False) -> bytes:
+    """Serialize data to UTF-8 JSON bytes, using orjson when available; newline=True terminates it for JSON Lines."""
+    if HAS_ORJSON:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(data, option=option, default=default)
+    payload = json.dumps(data, indent=2 if indent else None, default=default).encode('utf-8')
+    return payload + b'\n' if newline else payload
+
+def json_loads(data) -> Any:
+    """Parse JSON from bytes or str, using orjson when available."""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def write_json_file(filepath, data: Any, indent: bool = True, default=None) -> None:
+    """Write data to a JSON file in a single binary write."""
+    with open(filepath, 'wb') as f:
+        f.write(json_dumps(data, indent=indent, default=default))
+
+def fsync_directory(dirpath) -> None:
+    """Flush a directory entry (new, renamed or replaced files) to disk; a no-op where unsupported."""
+    try:
+        fd = os.open(str(dirpath), os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def atomic_write_bytes(filepath, payload: bytes) -> None:
+    """Durably replace filepath: write and fsync a temp file, os.replace it, then fsync the directory."""
+    path = Path(filepath)
+    temp_file = path.with_suffix('.tmp')
+    with open(temp_file, 'wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, path)
+    fsync_directory(path.parent)
+
+def read_json_file(filepath) -> Any:
+    """Read and parse a JSON file."""
+    with open(filepath, 'rb') as f:
+        return json_loads(f.read())
+
+def jsonl_tail(filepath, limit: int, chunk_size: int = 8192) -> Tuple[List[Any], bool]:
+    """Parse the last limit complete records of a JSON Lines file, reading backwards from the end in chunks.
+    
+    An unterminated trailing line (a write still in progress) is ignored. Returns (records, reached_start):
+    reached_start is True when the whole file was scanned, i.e. it holds no records before these.
+    """
+    if limit <= 0:
+        return [], False
+    
+    with open(filepath, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        buf = b''
+        while pos > 0 and buf.count(b'\n') <= limit:
+            step = min(chunk_size, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    
+    buf = buf[:buf.rfind(b'\n') + 1]
+    lines = [line for line in buf.splitlines() if line.strip()]
+    reached_start = pos == 0 and len(lines) <= limit
+    
+    records = []
+    for line in lines[-limit:]:
+        try:
+            records.append(json_loads(line))
+        except ValueError:
+            continue
+    return records, reached_start
+
+def read_jsonl_tail(filepath, limit: int, chunk_size: int = 8192) -> List[Any]:
+    """Parse the last limit complete records of a JSON Lines file (see jsonl_tail)."""
+    return jsonl_tail(filepath, limit, chunk_size)[0]
+
+def scan_file_stats(base_dir, relative_paths: List[str]) -> Dict[str, os.stat_result]:
+    """Stat the given files with one os.scandir pass per parent directory; missing files are omitted."""
+    wanted: Dict[str, set] = {}
+    for rel_path in relative_paths:
+        parent, name = os.path.split(rel_path)
+        wanted.setdefault(parent, set()).add(name)
+    
+    stats = {}
+    for parent, names in wanted.items():
+        try:
+            with os.scandir(os.path.join(base_dir, parent)) as entries:
+                for entry in entries:
+                    if entry.name in names and entry.is_file():
+                        stats[os.path.join(parent, entry.name)] = entry.stat()
+        except FileNotFoundError:
+            continue
+    return stats
+
+class TokenBucket:
+    """Async token bucket: refills at rate tokens/s up to burst; acquire waits (FIFO) until enough tokens are available."""
+    
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(burst) if burst else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self, tokens: float = 1.0) -> None:
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
 def save_state_to_json(data: Any, filepath: str) -> None:
     """Save state data to JSON file."""
     Path(filepath).parent.mkdir(parents=True, exist_ok=True)
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2, default=str)
+    write_json_file(filepath, data, default=str)
 
 def load_state_from_json(filepath: str) -> Optional[Any]:
-    """Load state data from JSON file."""
-    if not os.path.exists(filepath):
+    """Load state data from JSON file; None if it does not exist."""
+    try:
+        return read_json_file(filepath)
+    except FileNotFoundError:
         return None
-    
-    with open(filepath, 'r') as f:
-        return json.load(f)
 
 def setup_graceful_shutdown(logger: logging.Logger) -> asyncio.Event:
     """Setup graceful shutdown handler for SIGINT."""
@@ -157,9 +157,9 @@ class DashboardValidator:
                 }
             ]
             
-            trade_file = self.data_dir / "trade_history.json"
+            trade_file = self.data_dir / "trade_history.jsonl"
             with open(trade_file, 'w') as f:
-                json.dump(mock_trades, f)
+                f.writelines(json.dumps(trade) + "\n" for trade in mock_trades)
             
             trades = reader.read_trade_history(limit=50)
             
@@ -44,7 +44,7 @@ class DashboardValidatorFixed:
             reader = DashboardStateReader()
             
             backup_files = {}
-            test_files = ["daily_summary_state.json", "open_positions.json", "trade_history.json"]
+            test_files = ["daily_summary_state.json", "open_positions.json", "trade_history.jsonl", "trade_history.json"]
             
             for filename in test_files:
                 filepath = self.data_dir / filename